@@ -46,6 +46,12 @@ cmd_admin
     botbase/
         commandtype
         necrobot
+    database/
+        dbconnect
+    util/
+        dmbroadcast
+        scheduler
+        timestr
 cmd_all
     config
     botbase/
@@ -88,6 +94,7 @@ necrobot
         server
     util/
         console
+        scheduler
         singleton
 necroevent
     util
@@ -18,6 +18,11 @@ class BotChannel(object):
             cmd_all.Info(self),
         ]
 
+        # Map from command names (and aliases) to the CommandTypes they call; see _get_command_index()
+        self._command_index = None
+        self._indexed_commands = None
+        self._indexed_lengths = None
+
     @property
     def client(self) -> discord.Client:
         return server.client
@@ -46,11 +51,30 @@ class BotChannel(object):
 
     async def execute(self, command) -> None:
         """Attempts to execute the given command (if a command of its type is in channel_commands)"""
-        for cmd_type in self.channel_commands:
-            await cmd_type.execute(command)
-        for cmd_type in self.default_commands:
+        for cmd_type in self._get_command_index().get(command.command, ()):
             await cmd_type.execute(command)
 
+    def _get_command_index(self) -> dict:
+        """Map from command names to the CommandTypes in all_commands that they call, in order.
+
+        The index is rebuilt whenever channel_commands is replaced (as MatchRoom does when a match begins or ends)
+        or the command lists change length.
+        """
+        lengths = (len(self.channel_commands), len(self.default_commands),)
+        if self._command_index is None \
+                or self._indexed_commands is not self.channel_commands \
+                or self._indexed_lengths != lengths:
+            index = {}
+            for cmd_type in self.all_commands:
+                for name in cmd_type.command_name_list:
+                    handlers = index.setdefault(name, [])
+                    if cmd_type not in handlers:
+                        handlers.append(cmd_type)
+            self._command_index = index
+            self._indexed_commands = self.channel_commands
+            self._indexed_lengths = lengths
+        return self._command_index
+
     def _virtual_is_admin(self, discord_member: discord.Member) -> bool:
         """Override this to add channel-specific admins."""
         return False
@@ -1,6 +1,42 @@
+import datetime
+
+import pytz
+
 import necrobot.exception
 from necrobot.botbase.commandtype import CommandType
 from necrobot.botbase.necrobot import Necrobot
+from necrobot.database.dbconnect import DBConnect
+from necrobot.util import timestr
+from necrobot.util.dmbroadcast import DMBroadcaster
+from necrobot.util.scheduler import Scheduler
+
+
+class Broadcasts(CommandType):
+    def __init__(self, bot_channel):
+        CommandType.__init__(self, bot_channel, 'broadcasts')
+        self.help_text = 'Show how quickly recent alert DMs were delivered, and how many could not be.'
+        self.admin_only = True
+
+    async def _do_execute(self, cmd):
+        reports = DMBroadcaster().recent_reports()
+        if not reports:
+            await cmd.channel.send('No alerts have been sent since the bot started.')
+            return
+
+        text = ''
+        for report in reports[-10:]:
+            text += '{0}\n'.format(report)
+        await cmd.channel.send('```\n{0}```'.format(text))
+
+
+class DBStats(CommandType):
+    def __init__(self, bot_channel):
+        CommandType.__init__(self, bot_channel, 'dbstats')
+        self.help_text = 'Show how busy the database connection pool has been, and how long queries have taken.'
+        self.admin_only = True
+
+    async def _do_execute(self, cmd):
+        await cmd.channel.send('```\n{0}```'.format(DBConnect.pool_metrics()))
 
 
 class Die(CommandType):
@@ -33,6 +69,53 @@ class RedoInit(CommandType):
         await Necrobot().redo_init()
 
 
+class ScheduledJobs(CommandType):
+    def __init__(self, bot_channel):
+        CommandType.__init__(self, bot_channel, 'scheduledjobs')
+        self.help_text = 'List upcoming scheduled jobs, and how late recent jobs ran. Use `{0} all` to list every ' \
+                         'upcoming job.'.format(self.mention)
+        self.admin_only = True
+
+    async def _do_execute(self, cmd):
+        scheduler = Scheduler()
+        utcnow = pytz.utc.localize(datetime.datetime.utcnow())
+        max_listed = None if 'all' in cmd.args else 15
+
+        pending = scheduler.pending_jobs()
+        text = '{0} jobs pending.\n'.format(len(pending))
+        for job in pending[:max_listed]:
+            time_until = job.when - utcnow
+            time_str = timestr.timedelta_to_str(time_until) if time_until >= datetime.timedelta(minutes=1) \
+                else 'under a minute'
+            text += '  in {0}: {1}\n'.format(time_str, job.name)
+        if max_listed is not None and len(pending) > max_listed:
+            text += '  ...\n'
+
+        waiting = scheduler.waiting_jobs()
+        if waiting:
+            text += '\nSaved before restart, not yet rescheduled:\n'
+            for _, name, when in waiting:
+                text += '  {0}: {1}\n'.format(when.strftime('%Y-%m-%d %H:%M:%S UTC'), name)
+
+        recent = scheduler.recent_jobs()
+        if recent:
+            latenesses = [job.lateness.total_seconds() for job in recent]
+            text += '\nLast {0} jobs ran {1:.2f}s late on average, {2:.2f}s at worst:\n'.format(
+                len(recent), sum(latenesses) / len(latenesses), max(latenesses)
+            )
+            for job in recent[-10:]:
+                text += '  {0:.2f}s late: {1}\n'.format(job.lateness.total_seconds(), job.name)
+
+        # Split into messages under discord's length limit
+        message = ''
+        for line in text.splitlines(keepends=True):
+            if len(message) + len(line) > 1900:
+                await cmd.channel.send('```\n{0}```'.format(message))
+                message = ''
+            message += line
+        await cmd.channel.send('```\n{0}```'.format(message))
+
+
 class RaiseException(CommandType):
     def __init__(self, bot_channel):
         CommandType.__init__(self, bot_channel, 'raiseexception')
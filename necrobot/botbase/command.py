@@ -9,23 +9,26 @@ class Command(object):
     """Represents a full user command input (e.g. `.make -c Cadence -seed 12345 -custom 4-shrine`)"""
     def __init__(self, message: discord.Message):
         self.command = None         # type: Optional[str]
-        self.args = []              # type: List[str]
+        self._args = None           # type: Optional[List[str]]
         self._message = message     # type: discord.Message
         self._arg_string = ''       # type: str
 
         if message is None:
             return
 
-        if message.content.startswith(Config.BOT_COMMAND_PREFIX):
-            try:
-                self.args = shlex.split(message.content)
-            except ValueError:
-                self.args = message.content.split()
-            prefix_len = len(Config.BOT_COMMAND_PREFIX)
-            self.command = (self.args.pop(0)[prefix_len:]).lower()
+        self.command = parse_command_name(message.content)
+        if self.command is not None:
             cut_len = len(Config.BOT_COMMAND_PREFIX) + len(self.command) + 1
             self._arg_string = self._message.content[cut_len:].strip(' ')
 
+    @property
+    def args(self) -> List[str]:
+        """The command's arguments. These are only parsed (shell-style) once some CommandType handles the command,
+        and are then cached, so changes made to the list persist."""
+        if self._args is None:
+            self._args = parse_args(self.content) if self.command is not None else []
+        return self._args
+
     @property
     def author(self) -> discord.User or discord.Member:
         return self._message.author
@@ -62,19 +65,11 @@ class TestCommand(Command):
         # noinspection PyTypeChecker
         Command.__init__(self, message=None)
 
-        self.command = None
-        self.args = []                      # type: List[str]
         self._author = author               # type: Union[discord.User, discord.Member]
         self._channel = channel             # type: discord.TextChannel
         self._message_str = message_str     # type: str
 
-        if message_str.startswith(Config.BOT_COMMAND_PREFIX):
-            try:
-                self.args = shlex.split(message_str)
-            except ValueError:
-                self.args = message_str.split()
-            prefix_len = len(Config.BOT_COMMAND_PREFIX)
-            self.command = (self.args.pop(0)[prefix_len:]).lower()
+        self.command = parse_command_name(message_str)
 
     @property
     def author(self) -> discord.User or discord.Member:
@@ -104,3 +99,19 @@ class TestCommand(Command):
     def arg_string(self) -> str:
         cut_len = len(Config.BOT_COMMAND_PREFIX) + len(self.command) + 1
         return self.content[cut_len:]
+
+
+def parse_command_name(content: str) -> Optional[str]:
+    """Return the (lowercased) command name called by the message content, or None if it isn't a command."""
+    if not content.startswith(Config.BOT_COMMAND_PREFIX):
+        return None
+    return content.split(maxsplit=1)[0][len(Config.BOT_COMMAND_PREFIX):].lower()
+
+
+def parse_args(content: str) -> List[str]:
+    """Split the message content into arguments, shell-style, and drop the command name."""
+    try:
+        args = shlex.split(content)
+    except ValueError:
+        args = content.split()
+    return args[1:]
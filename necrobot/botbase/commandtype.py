@@ -97,18 +97,17 @@ class CommandType(object):
                 channel_name = "<Unknown channel>"
 
             console.info(
-                'Call {0}: <ID={1}> <Caller={2}> <Channel={3}> <Message={4}>'.format(
-                    type(self).__name__,
-                    this_id,
-                    cmd.author.name,
-                    channel_name,
-                    cmd.content
-                )
+                'Call {0}: <ID={1}> <Caller={2}> <Channel={3}> <Message={4}>',
+                type(self).__name__,
+                this_id,
+                cmd.author.name,
+                channel_name,
+                cmd.content
             )
 
             try:
                 await self._do_execute(cmd)
-                console.info('Exit {0}: <ID={1}>'.format(type(self).__name__, this_id))
+                console.info('Exit {0}: <ID={1}>', type(self).__name__, this_id)
             except Exception as e:
                 console.warning(
                     'Error exiting {name} <ID={id}>: {error_msg}'.format(
@@ -13,3 +13,6 @@ class Manager(object):
 
     def on_botchannel_create(self, channel, bot_channel):
         pass
+
+    def on_botchannel_delete(self, channel, bot_channel):
+        pass
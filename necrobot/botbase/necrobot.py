@@ -11,6 +11,7 @@ from necrobot.util import console
 from necrobot.config import Config
 from necrobot.botbase.command import Command, TestCommand
 from necrobot.botbase.manager import Manager
+from necrobot.util.scheduler import Scheduler
 from necrobot.util.singleton import Singleton
 
 
@@ -57,8 +58,12 @@ class Necrobot(object, metaclass=Singleton):
             mgr.on_botchannel_create(discord_channel, bot_channel)
 
     def unregister_bot_channel(self, discord_channel: discord.TextChannel) -> None:
-        """Unegister a BotChannel"""
-        del self._bot_channels[discord_channel]
+        """Unegister a BotChannel, if one is registered for the channel"""
+        bot_channel = self._bot_channels.pop(discord_channel, None)
+        if bot_channel is None:
+            return
+        for mgr in self._managers:
+            mgr.on_botchannel_delete(discord_channel, bot_channel)
 
     def register_pm_channel(self, pm_bot_channel) -> None:
         """Register a BotChannel for PMs"""
@@ -127,6 +132,7 @@ class Necrobot(object, metaclass=Singleton):
         """Called on shutdown"""
         for manager in self._managers:
             await manager.close()
+        Scheduler().close()
 
     async def logout(self) -> None:
         """Log out of discord"""
@@ -192,6 +198,49 @@ class Necrobot(object, metaclass=Singleton):
             cmd = Command(message)
             await self._execute(cmd)
 
+        # Keep the server module's name indexes up to date
+        @client.event
+        async def on_guild_channel_create(channel):
+            server.on_channel_create(channel)
+
+        @client.event
+        async def on_guild_channel_delete(channel):
+            server.on_channel_delete(channel)
+            # However the channel was deleted, its BotChannel is gone
+            self.unregister_bot_channel(channel)
+
+        @client.event
+        async def on_guild_channel_update(before, after):
+            server.on_channel_update(before, after)
+
+        @client.event
+        async def on_member_join(member: discord.Member):
+            server.on_member_join(member)
+
+        @client.event
+        async def on_member_remove(member: discord.Member):
+            server.on_member_remove(member)
+
+        @client.event
+        async def on_member_update(member_before: discord.Member, member_after: discord.Member):
+            server.on_member_update(member_before, member_after)
+
+        @client.event
+        async def on_user_update(user_before: discord.User, user_after: discord.User):
+            server.on_user_update(user_before, user_after)
+
+        @client.event
+        async def on_guild_role_create(role: discord.Role):
+            server.on_role_create(role)
+
+        @client.event
+        async def on_guild_role_delete(role: discord.Role):
+            server.on_role_delete(role)
+
+        @client.event
+        async def on_guild_role_update(role_before: discord.Role, role_after: discord.Role):
+            server.on_role_update(role_before, role_after)
+
         # noinspection PyUnusedLocal
         @client.event
         async def on_error(event: str, *args, **kwargs):
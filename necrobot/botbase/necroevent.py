@@ -1,3 +1,7 @@
+import asyncio
+import time
+from typing import Dict, Iterable, List, Optional
+
 from necrobot.util import console
 from necrobot.util.singleton import Singleton
 
@@ -11,11 +15,69 @@ class NecroEvent(object):
         return self._argdict[item]
 
 
+class SubscriberStats(object):
+    """Processing counters for one NEDispatch subscriber. Times are in seconds."""
+    def __init__(self, name: str):
+        self.name = name
+        self.num_events = 0
+        self.num_errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    @property
+    def mean_time(self) -> float:
+        return self.total_time / self.num_events if self.num_events else 0.0
+
+    def record(self, latency: float, error: bool) -> None:
+        self.num_events += 1
+        self.total_time += latency
+        self.max_time = max(self.max_time, latency)
+        if error:
+            self.num_errors += 1
+
+    def __str__(self):
+        return '{name}: {num} events, mean {mean:.1f} ms, max {max:.1f} ms, {err} errors'.format(
+            name=self.name,
+            num=self.num_events,
+            mean=1000*self.mean_time,
+            max=1000*self.max_time,
+            err=self.num_errors
+        )
+
+
+class _Subscription(object):
+    def __init__(self, subscriber, event_types: Optional[Iterable[str]]):
+        self.subscriber = subscriber
+        self.event_types = frozenset(event_types) if event_types is not None else None
+        self.stats = SubscriberStats(type(subscriber).__name__)
+
+    def handles(self, event_type: str) -> bool:
+        return self.event_types is None or event_type in self.event_types
+
+
 class NEDispatch(object, metaclass=Singleton):
+    """Publishes NecroEvents to subscribers.
+
+    A subscriber may declare which event types it handles when it subscribes, and will then only be sent events
+    of those types. By default, subscribers process each event one after another, in the order they subscribed,
+    and an exception raised by a subscriber propagates to the publisher. If `concurrent` is set, all subscribers
+    process an event at once, and an exception raised by one subscriber is logged without affecting the others.
+    """
     def __init__(self):
-        self._subscribers = list()
+        self._subscriptions = list()    # type: List[_Subscription]
+        self._routes = dict()           # type: Dict[str, List[_Subscription]]
+        self.concurrent = False
 
-    def subscribe(self, subscriber):
+    def subscribe(self, subscriber, event_types: Optional[Iterable[str]] = None):
+        """Subscribe to events.
+
+        Parameters
+        ----------
+        subscriber
+            An object implementing `async def ne_process(self, ev: NecroEvent)`.
+        event_types: Iterable[str]
+            The event types to send to this subscriber. If None, it is sent every event.
+        """
         if 'ne_process' not in type(subscriber).__dict__:
             console.warning(
                 "Object of type {0} tried to subscribe to NEDispatch, but doesn't implement ne_process.".format(
@@ -24,11 +86,43 @@ class NEDispatch(object, metaclass=Singleton):
             )
             return
 
-        self._subscribers.append(subscriber)
+        self._subscriptions.append(_Subscription(subscriber, event_types))
+        self._routes.clear()
+
+    @property
+    def subscriber_stats(self) -> List[SubscriberStats]:
+        return [sub.stats for sub in self._subscriptions]
 
     async def publish(self, event_type: str, **kwargs):
         ev = NecroEvent(event_type, **kwargs)
-        console.info('Processing event of type {0}.'.format(ev.event_type))
+        console.info('Processing event of type {0}.', ev.event_type)
 
-        for subber in self._subscribers:
-            await subber.ne_process(ev)
+        if self.concurrent:
+            await asyncio.gather(*[self._process_isolated(sub, ev) for sub in self._get_route(event_type)])
+        else:
+            for sub in self._get_route(event_type):
+                await self._process(sub, ev)
+
+    def _get_route(self, event_type: str) -> List[_Subscription]:
+        if event_type not in self._routes:
+            self._routes[event_type] = [sub for sub in self._subscriptions if sub.handles(event_type)]
+        return self._routes[event_type]
+
+    @staticmethod
+    async def _process(sub: _Subscription, ev: NecroEvent):
+        start = time.monotonic()
+        error = True
+        try:
+            await sub.subscriber.ne_process(ev)
+            error = False
+        finally:
+            sub.stats.record(time.monotonic() - start, error=error)
+
+    @staticmethod
+    async def _process_isolated(sub: _Subscription, ev: NecroEvent):
+        try:
+            await NEDispatch._process(sub, ev)
+        except Exception:
+            console.error(
+                'Subscriber {0} raised an exception processing event of type {1}.', sub.stats.name, ev.event_type
+            )
@@ -42,12 +42,14 @@ condormgr
         manager
     gsheet/
         cmd_sheet
+        sheetjobqueue
         sheetlib
         matchupsheet
         standingssheet
     league/
         leaguemgr
         leaguestats
+        standings
     match/
         matchutil
         match
@@ -3,7 +3,10 @@ from necrobot.botbase.command import Command
 from necrobot.botbase.commandtype import CommandType
 from necrobot.condorbot.condormgr import CondorMgr
 from necrobot.league.leaguemgr import LeagueMgr
+from necrobot.league.scheduleindex import ScheduleIndex
 from necrobot.match import matchdb, matchutil
+from necrobot.race import racedb
+from necrobot.user import userlib
 from necrobot.util.parse import dateparse
 
 
@@ -16,11 +19,35 @@ class ScrubDatabase(CommandType):
     async def _do_execute(self, cmd: Command):
         await matchdb.scrub_unchanneled_unraced_matches()
         matchutil.invalidate_cache()
+        ScheduleIndex().invalidate()
         await cmd.channel.send(
             'Database scrubbed.'
         )
 
 
+class RefreshCache(CommandType):
+    def __init__(self, bot_channel):
+        CommandType.__init__(self, bot_channel, 'refreshcache')
+        self.help_text = 'Forget all cached matches, users, race types, and the schedule of upcoming matches, so that ' \
+                         'they are read from the database again. (Matches with an open match room are kept.)'
+        self.admin_only = True
+
+    async def _do_execute(self, cmd: Command):
+        libraries = [matchutil.match_library, userlib.user_library_by_uid, userlib.user_library_by_did]
+        stats_str = '\n'.join(str(library) for library in libraries)
+
+        ScheduleIndex().invalidate()
+        num_matches = matchutil.match_library.clear()
+        num_users = userlib.invalidate_cache()
+        racedb.invalidate_race_type_cache()
+
+        await cmd.channel.send(
+            'Cache refreshed ({0} matches and {1} users forgotten). Before refreshing:\n```\n{2}\n```'.format(
+                num_matches, num_users, stats_str
+            )
+        )
+
+
 class Deadline(CommandType):
     def __init__(self, bot_channel):
         CommandType.__init__(self, bot_channel, 'deadline')
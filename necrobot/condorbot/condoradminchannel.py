@@ -1,3 +1,4 @@
+from necrobot.botbase import cmd_admin
 from necrobot.botbase import cmd_seedgen
 from necrobot.botbase.botchannel import BotChannel
 from necrobot.condorbot import cmd_event
@@ -17,9 +18,13 @@ class CondorAdminChannel(BotChannel):
     def __init__(self):
         BotChannel.__init__(self)
         self.channel_commands = [
+            cmd_admin.DBStats(self),
+            cmd_admin.ScheduledJobs(self),
+
             cmd_event.Deadline(self),
             cmd_event.GetCurrentEvent(self),
             cmd_event.RegisterCondorEvent(self),
+            cmd_event.RefreshCache(self),
             cmd_event.ScrubDatabase(self),
             cmd_event.SetCondorEvent(self),
             cmd_event.SetDeadline(self),
@@ -42,7 +47,9 @@ class CondorAdminChannel(BotChannel):
             cmd_racemake.MakePrivate(self),
 
             cmd_sheet.GetGSheet(self),
+            cmd_sheet.GSheetJobs(self),
             cmd_sheet.OverwriteGSheet(self),
+            cmd_sheet.RefreshGSheet(self),
             cmd_sheet.SetEventGSheet(self),
             cmd_sheet.SetLeagueWorksheet(self),
 
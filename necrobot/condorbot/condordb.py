@@ -21,7 +21,7 @@ async def is_condor_event(schema_name: str) -> bool:
     """
     params = (schema_name,)
     async with DBConnect(commit=False) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT `schema_name` 
             FROM `events`
@@ -57,7 +57,7 @@ async def set_event_params(
     async with DBConnect(commit=True) as cursor:
         if event_name is not None:
             params = (event_name, schema_name,)
-            cursor.execute(
+            await cursor.execute_async(
                 """
                 UPDATE `events`
                 SET `event_name` = %s
@@ -67,7 +67,7 @@ async def set_event_params(
             )
         if deadline is not None:
             params = (deadline, schema_name,)
-            cursor.execute(
+            await cursor.execute_async(
                 """
                 UPDATE `events`
                 SET `deadline` = %s
@@ -77,7 +77,7 @@ async def set_event_params(
             )
         if gsheet_id is not None:
             params = (gsheet_id, schema_name,)
-            cursor.execute(
+            await cursor.execute_async(
                 """
                 UPDATE `events`
                 SET `gsheet_id` = %s
@@ -101,7 +101,7 @@ async def get_event(schema_name: str) -> CondorEvent:
     """
     params = (schema_name,)
     async with DBConnect(commit=False) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT `event_name`, `deadline`, `gsheet_id`
             FROM `events`
@@ -135,7 +135,7 @@ async def create_event(schema_name: str) -> CondorEvent:
 
     params = (schema_name,)
     async with DBConnect(commit=True) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT `schema_name`
             FROM `events` 
@@ -146,7 +146,7 @@ async def create_event(schema_name: str) -> CondorEvent:
         for _ in cursor:
             raise necrobot.exception.SchemaAlreadyExists('Event already exists.')
 
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT SCHEMA_NAME 
             FROM INFORMATION_SCHEMA.SCHEMATA 
@@ -157,14 +157,14 @@ async def create_event(schema_name: str) -> CondorEvent:
         for _ in cursor:
             raise necrobot.exception.SchemaAlreadyExists('Schema already exists, but is not a CoNDOR event.')
 
-        cursor.execute(
+        await cursor.execute_async(
             """
             CREATE SCHEMA `{schema_name}` 
             DEFAULT CHARACTER SET = utf8 
             DEFAULT COLLATE = utf8_general_ci
             """.format(schema_name=schema_name)
         )
-        cursor.execute(
+        await cursor.execute_async(
             """
             INSERT INTO `events` 
             (`schema_name`) 
@@ -173,7 +173,7 @@ async def create_event(schema_name: str) -> CondorEvent:
             params
         )
 
-        cursor.execute(
+        await cursor.execute_async(
             """
             CREATE TABLE `{schema_name}`.`entrants` (
                 `user_id` smallint unsigned NOT NULL,
@@ -183,7 +183,7 @@ async def create_event(schema_name: str) -> CondorEvent:
         )
 
         for table_name in ['leagues', 'matches', 'match_races', 'races', 'race_runs']:
-            cursor.execute(
+            await cursor.execute_async(
                 "CREATE TABLE `{league_schema}`.`{table}` LIKE `{necrobot_schema}`.`{table}`".format(
                     league_schema=schema_name,
                     necrobot_schema=Config.MYSQL_DB_NAME,
@@ -194,7 +194,7 @@ async def create_event(schema_name: str) -> CondorEvent:
         def tablename(table):
             return '`{league_schema}`.`{table}`'.format(league_schema=schema_name, table=table)
 
-        cursor.execute(
+        await cursor.execute_async(
             """
             CREATE VIEW {race_summary} AS
                 SELECT 
@@ -233,7 +233,7 @@ async def create_event(schema_name: str) -> CondorEvent:
             )
         )
 
-        cursor.execute(
+        await cursor.execute_async(
             """
             CREATE VIEW {match_info} AS
                 SELECT 
@@ -287,7 +287,7 @@ async def create_event(schema_name: str) -> CondorEvent:
             )
         )
 
-        cursor.execute(
+        await cursor.execute_async(
             """
             CREATE VIEW {event_info} AS
                 SELECT *
@@ -1,5 +1,6 @@
 import asyncio
 import datetime
+import functools
 import unittest
 from typing import Optional
 
@@ -11,9 +12,11 @@ from necrobot.condorbot import condordb
 from necrobot.database import dbutil
 from necrobot.gsheet import sheetlib
 from necrobot.gsheet.matchupsheet import MatchupSheet
+from necrobot.gsheet.sheetjobqueue import SheetJobQueue
 from necrobot.gsheet.standingssheet import StandingsSheet
 from necrobot.league.leaguemgr import LeagueMgr
 from necrobot.league import leaguestats
+from necrobot.league import standings
 from necrobot.league import leagueutil
 from necrobot.league.league import League
 from necrobot.match.match import Match
@@ -34,7 +37,19 @@ class CondorMgr(Manager, metaclass=Singleton):
         self._schedule_channel = None
         self._client = None
         self._event = None
-        NEDispatch().subscribe(self)
+        NEDispatch().subscribe(
+            self,
+            event_types=[
+                'change_match_results',
+                'end_match',
+                'match_alert',
+                'notify',
+                'schedule_match',
+                'unschedule_match',
+                'set_cawmentary',
+                'set_vod',
+            ]
+        )
 
     async def initialize(self):
         self._main_channel = server.find_channel(channel_id=Config.MAIN_CHANNEL_ID)
@@ -86,10 +101,12 @@ class CondorMgr(Manager, metaclass=Singleton):
 
             try:
                 league = await LeagueMgr().get_league(ev.match.league_tag)
-                asyncio.ensure_future(self._overwrite_gsheet(league=league))
+                asyncio.ensure_future(
+                    self._record_standings(league=league, match=ev.match, r1_wins=ev.r1_wins, r2_wins=ev.r2_wins)
+                )
             except necrobot.exception.LeagueDoesNotExist:
                 pass
-            asyncio.ensure_future(self._overwrite_schedule_gsheet())
+            self._queue_schedule_gsheet_overwrite()
             asyncio.ensure_future(send_mainchannel_message())
 
             matchroom = await matchchannelutil.get_match_room(ev.match)  # type: Optional[MatchRoom]
@@ -98,6 +115,14 @@ class CondorMgr(Manager, metaclass=Singleton):
 
         elif ev.event_type == 'end_match_race':
             pass
+
+        elif ev.event_type == 'change_match_results':
+            # A race result was corrected after the fact, so the match's standings entry may be stale
+            try:
+                league = await LeagueMgr().get_league(ev.match.league_tag)
+                asyncio.ensure_future(self._reload_standings(league=league))
+            except necrobot.exception.LeagueDoesNotExist:
+                pass
             # asyncio.ensure_future(VodRecorder().end_record(ev.match.racer_1.rtmp_name))
             # asyncio.ensure_future(VodRecorder().end_record(ev.match.racer_2.rtmp_name))
 
@@ -118,20 +143,20 @@ class CondorMgr(Manager, metaclass=Singleton):
             pass
 
         elif ev.event_type == 'schedule_match':
-            asyncio.ensure_future(self._overwrite_schedule_gsheet())
+            self._queue_schedule_gsheet_overwrite()
 
         elif ev.event_type == 'unschedule_match':
             await self._cawmentator_alert_unschedule(ev.match)
 
         elif ev.event_type == 'set_cawmentary':
-            asyncio.ensure_future(self._overwrite_schedule_gsheet())
+            self._queue_schedule_gsheet_overwrite()
             if not ev.add:
                 matchroom = await matchchannelutil.get_match_room(ev.match)  # type: Optional[MatchRoom]
                 if matchroom is not None:
                     await matchroom.remove_cawmentator_permissions()
 
         elif ev.event_type == 'set_vod':
-            asyncio.ensure_future(self._overwrite_schedule_gsheet())
+            self._queue_schedule_gsheet_overwrite()
             cawmentator = await ev.match.get_cawmentator()
             await self._main_channel.send(
                 '{cawmentator} added a vod for {em}**{r1}** - **{r2}**: <{url}>'.format(
@@ -229,10 +254,39 @@ class CondorMgr(Manager, metaclass=Singleton):
             return dateparse.parse_datetime(self._event.deadline_str)
         return None
 
-    async def _overwrite_gsheet(self, league: League):
+    async def _record_standings(self, league: League, match: Match, r1_wins: int, r2_wins: int):
+        await standings.record_match(match=match, r1_wins=r1_wins, r2_wins=r2_wins)
+        self._queue_standings_gsheet_update(league)
+
+    async def _reload_standings(self, league: League):
+        # Reloading gives a new matrix, so the whole standings sheet is rewritten
+        await standings.get_standings(league_tag=league.tag, reload=True)
+        self._queue_standings_gsheet_update(league)
+
+    def _queue_standings_gsheet_update(self, league: League):
+        if self._event is None or self._event.gsheet_id is None:
+            return
+        SheetJobQueue().submit(
+            gsheet_id=self._event.gsheet_id,
+            wks_id=league.worksheet_id,
+            callback=functools.partial(self._update_standings_gsheet, league=league),
+            name='standings for {0}'.format(league.tag)
+        )
+
+    def _queue_schedule_gsheet_overwrite(self):
+        if self._event is None or self._event.gsheet_id is None:
+            return
+        SheetJobQueue().submit(
+            gsheet_id=self._event.gsheet_id,
+            wks_id=0,
+            callback=self._overwrite_schedule_gsheet,
+            name='schedule'
+        )
+
+    async def _update_standings_gsheet(self, league: League):
         # noinspection PyShadowingNames
         sheet = await self._get_gsheet(league=league)
-        await sheet.overwrite_gsheet(league.tag)
+        await sheet.update_gsheet(league.tag)
 
     async def _overwrite_schedule_gsheet(self):
         # noinspection PyShadowingNames
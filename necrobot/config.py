@@ -19,6 +19,17 @@ ADMIN_ROLE_NAMES: list[str]
 STAFF_ROLE: str
     The specific role that should be pinged when staff-relevant things happen.
 
+Alerts
+------
+DM_BROADCAST_CONCURRENCY: int
+    The number of direct messages to send at once when alerting many users.
+DM_BROADCAST_RATE: float
+    The maximum number of alert direct messages to send per second.
+DM_BROADCAST_RETRIES: int
+    The number of times to retry an alert direct message that was rate-limited or hit a server error.
+DM_BROADCAST_HISTORY_SIZE: int
+    The number of recent alert broadcasts to keep delivery statistics for.
+
 Channels
 --------
 MAIN_CHANNEL_NAME: str
@@ -38,11 +49,28 @@ MYSQL_DB_PASSWD: str
     The database password.
 MYSQL_DB_NAME: str
     The default schema name.
+MYSQL_DB_POOL_SIZE: int
+    The maximum number of simultaneous connections to the database.
+
+Dailies
+-------
+DAILY_PREPARE_TIME: datetime.timedelta
+    How long before a new daily begins to make its seed and leaderboard, and find the users to alert about it.
 
 GSheet
 ------
 OAUTH_CREDENTIALS_JSON: str
     The filename where GSheet OAuth credentials are stored.
+GSHEET_WRITE_DELAY: float
+    The number of seconds to collect GSheet cell updates for before sending them as one request.
+GSHEET_LAYOUT_CACHE_FILE: str
+    The file where the layouts (header rows and column indicies) of GSheet worksheets are cached.
+GSHEET_JOB_QUIET_PERIOD: float
+    The number of seconds without a new job for a worksheet to wait before rewriting it.
+GSHEET_JOB_MAX_DELAY: float
+    The maximum number of seconds to put off rewriting a worksheet while new jobs for it keep arriving.
+GSHEET_JOB_CONCURRENCY: int
+    The maximum number of worksheet rewrites to run at once.
 
 Ladder
 ------
@@ -55,6 +83,14 @@ LEAGUE_NAME: str
     The schema name of the current league.
 LOG_DIRECTORY: str
     The directory to write match logs to.
+LOG_FORMAT: str
+    The format of match logs: 'text' for plain text, or 'jsonl' for one JSON object per message.
+LOG_COMPRESS: bool
+    Whether to gzip match logs.
+LOG_MESSAGE_LIMIT: int
+    The maximum number of messages to write to a match log.
+LOG_WRITE_CONCURRENCY: int
+    The maximum number of channels to log at once when logging many channels.
 
 Login
 -----
@@ -74,6 +110,12 @@ MATCH_FINAL_WARNING: datetime.timedelta
     The time before match start at which to make the final ping to the racers.
 MATCH_CHANNEL_CATEGORY_NAME: str
     The channel category name for newly created match channels.
+MATCH_RECOVERY_CONCURRENCY: int
+    The maximum number of match rooms to recover at once on startup.
+MATCH_CREATION_CONCURRENCY: int
+    The maximum number of match rooms to set up at once when making many matches.
+MATCH_LIBRARY_SIZE: int
+    The number of recently used matches to keep in memory (matches with a live room are always kept).
 
 Races
 -----
@@ -85,6 +127,13 @@ INCREMENTAL_COUNTDOWN_START: int
     The second at which to start counting down second-by-second.
 FINALIZE_TIME_SEC: int
     The number of seconds after the end of the race before its data is recorded.
+RACE_RECORD_DELAY: float
+    The number of seconds to collect finalized races for before recording them together.
+RACE_STATS_RECOMPUTE_TIME: datetime.timedelta
+    How often to recompute a user's cached race stats from scratch, rather than only adding races with newer IDs.
+RACE_JOURNAL_DIRECTORY: str
+    The subdirectory of LOG_DIRECTORY where the state of each race in progress is journaled, so that it can be restored
+    after a restart.
 
 RaceRooms
 ---------
@@ -100,6 +149,20 @@ NO_ENTRANTS_CLEANUP_WARNING: datetime.timedelta
 RACE_POKE_DELAY: int
     The minimum number of seconds between .poke mentions.
 
+Scheduler
+---------
+SCHEDULE_FILE: str
+    The file where keyed scheduled jobs (e.g. match alerts) are saved, so that they survive a restart.
+SCHEDULE_HISTORY_SIZE: int
+    The number of recently run jobs to remember, for listing how late they ran.
+SCHEDULE_KEEP_RUN_JOBS: datetime.timedelta
+    How long to remember that a keyed job has run, so that it isn't run again.
+
+Users
+-----
+USER_LIBRARY_SIZE: int
+    The number of recently used users to keep in memory.
+
 Vod recording
 -------------
 VODRECORD_USERNAME: str
@@ -143,6 +206,12 @@ class Config(object):
     STAFF_ROLE = 'CoNDOR Staff'
     REFEREE_ROLE = 'Referee'
 
+    # Alerts ----------------------------------------------------------------------------------
+    DM_BROADCAST_CONCURRENCY = 8
+    DM_BROADCAST_RATE = 20.0
+    DM_BROADCAST_RETRIES = 2
+    DM_BROADCAST_HISTORY_SIZE = 20
+
     # Channels --------------------------------------------------------------------------------
     MAIN_CHANNEL_ID = None
     LADDER_ADMIN_CHANNEL_NAME = 'ladder_admin'
@@ -156,9 +225,18 @@ class Config(object):
     MYSQL_DB_USER = 'root'
     MYSQL_DB_PASSWD = ''
     MYSQL_DB_NAME = 'necrobot'
+    MYSQL_DB_POOL_SIZE = 5
+
+    # Dailies ---------------------------------------------------------------------------------
+    DAILY_PREPARE_TIME = datetime.timedelta(minutes=5)
 
     # GSheet ----------------------------------------------------------------------------------
     OAUTH_CREDENTIALS_JSON = 'data/necrobot-service-acct.json'
+    GSHEET_WRITE_DELAY = 1.0
+    GSHEET_LAYOUT_CACHE_FILE = 'data/gsheet_layout_cache.json'
+    GSHEET_JOB_QUIET_PERIOD = 10.0
+    GSHEET_JOB_MAX_DELAY = 60.0
+    GSHEET_JOB_CONCURRENCY = 2
 
     # Ladder ----------------------------------------------------------------------------------
     RATINGS_IN_NICKNAMES = True
@@ -166,6 +244,10 @@ class Config(object):
     # League ----------------------------------------------------------------------------------
     LEAGUE_NAME = ''
     LOG_DIRECTORY = 'logs'
+    LOG_FORMAT = 'text'
+    LOG_COMPRESS = False
+    LOG_MESSAGE_LIMIT = 5000
+    LOG_WRITE_CONCURRENCY = 4
     UNMADE_MATCHES_FILE_PREFIX = 'data/unmade_'
 
     # Login -----------------------------------------------------------------------------------
@@ -177,12 +259,18 @@ class Config(object):
     MATCH_FIRST_WARNING = datetime.timedelta(minutes=15)
     MATCH_FINAL_WARNING = datetime.timedelta(minutes=5)
     MATCH_CHANNEL_CATEGORY_NAME = "Race rooms"
+    MATCH_RECOVERY_CONCURRENCY = 4
+    MATCH_CREATION_CONCURRENCY = 3
+    MATCH_LIBRARY_SIZE = 500
 
     # Races -----------------------------------------------------------------------------------
     COUNTDOWN_LENGTH = int(10)
     UNPAUSE_COUNTDOWN_LENGTH = int(3)
     INCREMENTAL_COUNTDOWN_START = int(3)
     FINALIZE_TIME_SEC = int(30)
+    RACE_RECORD_DELAY = 0.5
+    RACE_STATS_RECOMPUTE_TIME = datetime.timedelta(minutes=10)
+    RACE_JOURNAL_DIRECTORY = 'race_journals'
     RACE_CHANNEL_CATEGORY_NAME = "Race rooms"
 
     # RaceRooms -------------------------------------------------------------------------------
@@ -191,6 +279,14 @@ class Config(object):
     NO_ENTRANTS_CLEANUP_WARNING = datetime.timedelta(minutes=1, seconds=30)
     RACE_POKE_DELAY = int(10)
 
+    # Scheduler -------------------------------------------------------------------------------
+    SCHEDULE_FILE = 'data/schedule.json'
+    SCHEDULE_HISTORY_SIZE = 50
+    SCHEDULE_KEEP_RUN_JOBS = datetime.timedelta(days=2)
+
+    # Users -----------------------------------------------------------------------------------
+    USER_LIBRARY_SIZE = 2000
+
     # Methods ---------------------------------------------------------------------------------
     @staticmethod
     def write():
@@ -203,6 +299,7 @@ class Config(object):
             ['mysql_db_user', Config.MYSQL_DB_USER],
             ['mysql_db_passwd', Config.MYSQL_DB_PASSWD],
             ['mysql_db_name', Config.MYSQL_DB_NAME],
+            ['mysql_db_pool_size', Config.MYSQL_DB_POOL_SIZE],
 
             ['main_channel_id', Config.MAIN_CHANNEL_ID],
             ['match_category_name', Config.MATCH_CHANNEL_CATEGORY_NAME],
@@ -234,6 +331,7 @@ def init(config_filename):
         'mysql_db_user': 'root',
         'mysql_db_passwd': '',
         'mysql_db_name': 'necrobot',
+        'mysql_db_pool_size': '5',
         'league_name': '',
         'test_level': '',
         'main_channel_id': '',
@@ -258,6 +356,7 @@ def init(config_filename):
     Config.MYSQL_DB_USER = defaults['mysql_db_user']
     Config.MYSQL_DB_PASSWD = defaults['mysql_db_passwd']
     Config.MYSQL_DB_NAME = defaults['mysql_db_name']
+    Config.MYSQL_DB_POOL_SIZE = int(defaults['mysql_db_pool_size'])
 
     Config.MAIN_CHANNEL_ID = defaults['main_channel_id']
     Config.MATCH_CHANNEL_CATEGORY_NAME = defaults['match_category_name']
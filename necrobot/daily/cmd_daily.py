@@ -368,4 +368,4 @@ class ForceUpdateLeaderboard(DailyCommandType):
 
         number = daily.today_number - days_back
         show_seed = show_seed or days_back > 0
-        await daily.update_leaderboard(number, show_seed)
+        await daily.update_leaderboard(number, show_seed, refresh=True)
@@ -1,20 +1,24 @@
 import asyncio
 import datetime
 from enum import Enum
+from typing import Dict, List, Optional, Tuple
 
 import discord
 
 from necrobot.daily import dailydb
+from necrobot.daily import dailyleaderboard
 from necrobot.botbase.necrobot import Necrobot
 from necrobot.config import Config
 from necrobot.daily import dailytype
 from necrobot.daily.dailytype import DailyType
+from necrobot.daily.dailyleaderboard import DailyLeaderboard
 from necrobot.user import userlib
 from necrobot.user.userprefs import UserPrefs
 from necrobot.util import racetime
 from necrobot.util import server
-from necrobot.util import strutil
 from necrobot.util import timestr
+from necrobot.util.dmbroadcast import DMBroadcaster
+from necrobot.util.scheduler import JobHandle, Scheduler
 from necrobot.user import userdb
 from necrobot.util.necrodancer import level, seedgen
 
@@ -28,6 +32,14 @@ class DailyUserStatus(Enum):
     closed = 3
 
 
+class _PreparedDaily(object):
+    """Everything on_new_daily needs that can be worked out before the daily begins."""
+    def __init__(self, daily_number: int, alert_ids: List[Tuple[int, int]], alert_text: str):
+        self.daily_number = daily_number
+        self.alert_ids = alert_ids      # (user_id, discord_id) of each user to register and alert
+        self.alert_text = alert_text
+
+
 class Daily(object):
     """
     Represents a kind of speedrun daily, e.g. the Cadence daily, or the Rotating-char daily. (Is not anchored to
@@ -48,11 +60,20 @@ class Daily(object):
 
     def __init__(self, daily_type: DailyType):
         self._daily_type = daily_type
-        self._daily_update_future = asyncio.ensure_future(self._daily_update())
+        self._daily_update_job = None  # type: Optional[JobHandle]
+        self._daily_prepare_job = None  # type: Optional[JobHandle]
+        self._prepared = None  # type: Optional[_PreparedDaily]
+        self._schedule_daily_update()
+        self._schedule_daily_prepare()
         self._leaderboard_channel = server.find_channel(channel_name=Config.DAILY_LEADERBOARDS_CHANNEL_NAME)
+        self._leaderboard_lock = asyncio.Lock()
+        self._posted_text = dict()  # type: Dict[int, str]
+        self._messages = dict()  # type: Dict[int, discord.PartialMessage]
 
     def close(self):
-        self._daily_update_future.cancel()
+        self._daily_update_job.cancel()
+        if self._daily_prepare_job is not None:
+            self._daily_prepare_job.cancel()
 
     @property
     def client(self) -> discord.Client:
@@ -136,59 +157,46 @@ class Daily(object):
 
     async def leaderboard_text(self, daily_number: int, display_seed=False):
         """The text (results) for the leaderboard"""
-        text = "``` \n"
-        text += self.leaderboard_header(daily_number) + '\n'
-
-        if display_seed:
+        leaderboard = await self._get_leaderboard(daily_number)
+        if display_seed and leaderboard.seed is None:
             for row in await dailydb.get_daily_seed(daily_id=daily_number, daily_type=self.daily_type.value):
-                text += "Seed: {}\n".format(row[0])
+                leaderboard.seed = row[0]
                 break
-
-        no_entries = True
-        rank = int(0)
-
-        prior_result = ''   # detect and handle ties
-        rank_to_display = int(1)
-        reverse_levelsort = dailytype.character(daily_type=self.daily_type, daily_number=daily_number) == 'Aria'
-        daily_times = sorted(
-                await dailydb.get_daily_times(daily_id=daily_number, daily_type=self.daily_type.value),
-                key=lambda x: level.level_sortval(int(x[1]), reverse=reverse_levelsort),
-                reverse=True)
-
-        for row in daily_times:
-            name = strutil.tickless(row[0])
-            lv = row[1]
-            time = row[2]
-            if lv == level.LEVEL_FINISHED:
-                result_string = racetime.to_str(time)
-            elif lv == level.LEVEL_NOS:
-                continue
-            else:
-                result_string = level.to_str(lv)
-                if result_string == '':
-                    result_string = "death"
-                else:
-                    result_string = "death ({0})".format(result_string)
-
-            rank += 1
-            no_entries = False
-
-            # update the rank only if we've gotten a different result than the last entrant
-            if result_string != prior_result:   # kinda hacky to use a string comparison here, but works
-                rank_to_display = rank
-
-            prior_result = result_string
-
-            text += '{0: >3}. {1: <24} {2}\n'.format(rank_to_display, name, result_string)
-
-        if no_entries:
-            text += 'No entries yet.\n'
-
-        text += '```'
-        return text
+        return leaderboard.text(display_seed)
+
+    async def _get_leaderboard(self, daily_number: int) -> DailyLeaderboard:
+        """The in-memory leaderboard for the given daily number, loading it from the database if necessary"""
+        async with self._leaderboard_lock:
+            leaderboard = dailyleaderboard.get_loaded(self.daily_type.value, daily_number)
+            if leaderboard is not None:
+                return leaderboard
+
+            leaderboard = DailyLeaderboard(
+                header=self.leaderboard_header(daily_number),
+                reverse_levelsort=dailytype.character(daily_type=self.daily_type, daily_number=daily_number) == 'Aria'
+            )
+
+            # Register the leaderboard before reading it, so that it gets any runs written meanwhile; those are newer
+            # than what we read, so they take precedence
+            dailyleaderboard.add(self.daily_type.value, daily_number, leaderboard)
+            try:
+                for user_id, name, lv, time in await dailydb.get_daily_runs(
+                        daily_id=daily_number, daily_type=self.daily_type.value):
+                    if not leaderboard.has_registered(int(user_id)):
+                        leaderboard.set_run(user_id=int(user_id), lv=int(lv), time=int(time), name=name)
+            except Exception:
+                dailyleaderboard.forget(self.daily_type.value, daily_number)
+                raise
+            return leaderboard
+
+    def _leaderboard_is_cached(self, daily_number: int) -> bool:
+        """Whether to answer questions about the given daily from its in-memory leaderboard"""
+        return self.today_number - 1 <= daily_number <= self.today_number
 
     async def has_submitted(self, daily_number: int, user_id: int) -> bool:
         """True if the given user has submitted for the given daily"""
+        if self._leaderboard_is_cached(daily_number):
+            return (await self._get_leaderboard(daily_number)).has_submitted(user_id)
         return await dailydb.has_submitted_daily(
             user_id=user_id,
             daily_id=daily_number,
@@ -196,6 +204,8 @@ class Daily(object):
 
     async def has_registered(self, daily_number: int, user_id: int) -> bool:
         """True if the given user has registered for the given daily"""
+        if self._leaderboard_is_cached(daily_number):
+            return (await self._get_leaderboard(daily_number)).has_registered(user_id)
         return await dailydb.has_registered_daily(
             user_id=user_id,
             daily_id=daily_number,
@@ -310,6 +320,25 @@ class Daily(object):
         """Returns the Discord Message ID for the leaderboard entry for the given daily number"""
         return await dailydb.get_daily_message_id(daily_id=daily_number, daily_type=self.daily_type.value)
 
+    async def _get_message(self, daily_number: int) -> Optional[discord.PartialMessage]:
+        """The leaderboard message for the given daily number, or None if it has none. The message isn't fetched from
+        Discord, since it is only ever edited."""
+        msg = self._messages.get(daily_number)
+        if msg is None:
+            msg_id = await self.get_message_id(daily_number)
+            if not msg_id:
+                return None
+            msg = self._leaderboard_channel.get_partial_message(msg_id)
+            self._messages[daily_number] = msg
+        return msg
+
+    async def _post_leaderboard(self, daily_number: int, text: str) -> None:
+        """Post a new leaderboard message for the given daily number"""
+        msg = await self._leaderboard_channel.send(text)
+        await self.register_message(daily_number, msg.id)
+        self._messages[daily_number] = self._leaderboard_channel.get_partial_message(msg.id)
+        self._posted_text[daily_number] = text
+
     async def user_status(self, user_id: int, daily_number: int) -> DailyUserStatus:
         """Return a DailyUserStatus corresponding to the status of the current daily for the given user"""
         if not self.is_open(daily_number):
@@ -321,48 +350,107 @@ class Daily(object):
         else:
             return DailyUserStatus.unregistered
 
-    async def update_leaderboard(self, daily_number: int, display_seed: bool = False) -> None:
-        """Update an existing leaderboard message for the given daily number"""
-        msg_id = await self.get_message_id(daily_number)
+    async def update_leaderboard(self, daily_number: int, display_seed: bool = False, refresh: bool = False) -> None:
+        """Update an existing leaderboard message for the given daily number. The message is only edited if its text
+        has changed. If refresh is True, re-reads the leaderboard from the database first."""
+        if refresh:
+            dailyleaderboard.forget(self.daily_type.value, daily_number)
+            self._posted_text.pop(daily_number, None)
+            self._messages.pop(daily_number, None)
 
-        # If no message, make one
-        if not msg_id:
-            text = await self.leaderboard_text(daily_number, display_seed)
-            msg = await self._leaderboard_channel.send(text)
-            await self.register_message(daily_number, msg.id)
-        else:
-            async for msg in self._leaderboard_channel.history(limit=10):
-                if int(msg.id) == msg_id:
-                    await msg.edit(content=await self.leaderboard_text(daily_number, display_seed))
+        text = await self.leaderboard_text(daily_number, display_seed)
+        if self._posted_text.get(daily_number) == text:
+            return
 
-    async def on_new_daily(self) -> None:
-        """Run when a new daily happens"""
-        # Make the leaderboard message
-        text = await self.leaderboard_text(self.today_number, display_seed=False)
-        msg = await self._leaderboard_channel.send(text)
-        await self.register_message(self.today_number, msg.id)
+        msg = await self._get_message(daily_number)
+        if msg is not None:
+            try:
+                await msg.edit(content=text)
+                self._posted_text[daily_number] = text
+                return
+            except discord.NotFound:
+                self._messages.pop(daily_number, None)
+
+        # If no message (or it was deleted), make one
+        await self._post_leaderboard(daily_number, text)
 
-        # Update yesterday's leaderboard with the seed
-        await self.update_leaderboard(self.today_number - 1, display_seed=True)
+    async def prepare(self, daily_number: int) -> _PreparedDaily:
+        """Make the seed and the (empty) leaderboard for the given daily, and find the users to alert about it"""
+        seed = await self.get_seed(daily_number)
+        await self._get_leaderboard(daily_number)
 
-        # PM users with the daily_alert preference
         auto_pref = UserPrefs(daily_alert=True, race_alert=None)
-        for member_id in await userdb.get_all_discord_ids_matching_prefs(auto_pref):
-            member = server.find_member(discord_id=member_id)
-            if member is not None:
-                await self.register(self.today_number, member.id)
-                await member.send(
-                    "({0}) Today's {2} speedrun seed: {1}".format(
-                        self.today_date.strftime("%d %b"),
-                        await self.get_seed(self.today_number),
-                        dailytype.character(self.daily_type, self.today_number)))
+        alert_ids = [
+            (user_id, discord_id,) for user_id, discord_id in await userdb.get_all_ids_matching_prefs(auto_pref)
+            if server.find_member(discord_id=discord_id) is not None
+        ]
+        alert_text = "({0}) Today's {2} speedrun seed: {1}".format(
+            self.daily_to_date(daily_number).strftime("%d %b"),
+            seed,
+            dailytype.character(self.daily_type, daily_number)
+        )
+        return _PreparedDaily(daily_number=daily_number, alert_ids=alert_ids, alert_text=alert_text)
+
+    async def on_new_daily(self) -> None:
+        """Run when a new daily happens"""
+        today_number = self.today_number
+        prepared = self._prepared
+        self._prepared = None
+        if prepared is None or prepared.daily_number != today_number:
+            prepared = await self.prepare(today_number)
+
+        # Forget leaderboards that can no longer change
+        dailyleaderboard.forget_older_than(self.daily_type.value, today_number - 1)
+        for daily_number in [number for number in self._posted_text.keys() if number < today_number - 1]:
+            del self._posted_text[daily_number]
+        for daily_number in [number for number in self._messages.keys() if number < today_number - 1]:
+            del self._messages[daily_number]
+
+        # Post today's leaderboard, add the seed to yesterday's, and register users with the daily_alert preference
+        await asyncio.gather(
+            self._post_leaderboard(today_number, await self.leaderboard_text(today_number, display_seed=False)),
+            self.update_leaderboard(today_number - 1, display_seed=True),
+            dailydb.register_dailies(
+                user_ids=[user_id for user_id, _ in prepared.alert_ids],
+                daily_id=today_number,
+                daily_type=self.daily_type.value
+            )
+        )
+
+        # PM the alert users without waiting for delivery
+        asyncio.ensure_future(DMBroadcaster().broadcast(
+            name='{0} daily seed'.format(self.daily_type.name.capitalize()),
+            discord_ids=[discord_id for _, discord_id in prepared.alert_ids],
+            content=prepared.alert_text
+        ))
+
+    def _schedule_daily_update(self) -> None:
+        """Schedule _daily_update for just after this daily next rolls over"""
+        self._daily_update_job = Scheduler().schedule_in(
+            self.time_until_next + datetime.timedelta(seconds=1),
+            self._daily_update,
+            name='{0} daily rollover'.format(self.daily_type.name.capitalize())
+        )
 
     async def _daily_update(self) -> None:
-        """Call DailyManager's on_new_daily coroutine when this daily rolls over"""
-        while True:
-            await asyncio.sleep(self.time_until_next.total_seconds() + 1)  # sleep until next daily
+        """Call on_new_daily, then schedule the next rollover"""
+        try:
             await self.on_new_daily()
-            await asyncio.sleep(120)  # buffer b/c i'm worried for some reason about idk
+        finally:
+            self._schedule_daily_update()
+            self._schedule_daily_prepare()
+
+    def _schedule_daily_prepare(self) -> None:
+        """Schedule _daily_prepare for Config.DAILY_PREPARE_TIME before this daily next rolls over"""
+        self._daily_prepare_job = Scheduler().schedule_in(
+            max(self.time_until_next - Config.DAILY_PREPARE_TIME, datetime.timedelta(0)),
+            self._daily_prepare,
+            name='{0} daily preparation'.format(self.daily_type.name.capitalize())
+        )
+
+    async def _daily_prepare(self) -> None:
+        """Prepare the next daily, so that on_new_daily has less to do"""
+        self._prepared = await self.prepare(self.today_number + 1)
 
     @staticmethod
     def _format_as_timestr(td: datetime.timedelta) -> str:
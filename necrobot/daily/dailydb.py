@@ -1,7 +1,10 @@
 """
 Interaction with the necrobot.dailies and necrobot.daily_runs tables.
+
+Writes to daily_runs are passed on to any loaded leaderboard in dailyleaderboard.
 """
 
+from necrobot.daily import dailyleaderboard
 from necrobot.util.necrodancer import level as necrolevel
 from necrobot.database.dbconnect import DBConnect
 
@@ -9,7 +12,7 @@ from necrobot.database.dbconnect import DBConnect
 async def get_daily_seed(daily_id, daily_type):
     async with DBConnect(commit=False) as cursor:
         params = (daily_id, daily_type,)
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT seed
             FROM dailies
@@ -22,7 +25,7 @@ async def get_daily_seed(daily_id, daily_type):
 async def get_daily_times(daily_id, daily_type):
     async with DBConnect(commit=False) as cursor:
         params = (daily_id, daily_type,)
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT users.discord_name,daily_runs.level,daily_runs.time
             FROM daily_runs 
@@ -34,10 +37,25 @@ async def get_daily_times(daily_id, daily_type):
         return cursor.fetchall()
 
 
+async def get_daily_runs(daily_id, daily_type):
+    """Get (user_id, discord_name, level, time) for every registered user, including those who haven't submitted."""
+    async with DBConnect(commit=False) as cursor:
+        params = (daily_id, daily_type,)
+        await cursor.execute_async(
+            """
+            SELECT users.user_id,users.discord_name,daily_runs.level,daily_runs.time
+            FROM daily_runs 
+                INNER JOIN users ON daily_runs.user_id=users.user_id
+            WHERE daily_runs.daily_id=%s AND daily_runs.type=%s
+            """,
+            params)
+        return cursor.fetchall()
+
+
 async def has_submitted_daily(user_id, daily_id, daily_type):
     async with DBConnect(commit=False) as cursor:
         params = (user_id, daily_id, daily_type,)
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT user_id
             FROM daily_runs_uinfo
@@ -50,7 +68,7 @@ async def has_submitted_daily(user_id, daily_id, daily_type):
 async def has_registered_daily(user_id, daily_id, daily_type):
     async with DBConnect(commit=False) as cursor:
         params = (user_id, daily_id, daily_type,)
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT user_id
             FROM daily_runs_uinfo
@@ -63,7 +81,7 @@ async def has_registered_daily(user_id, daily_id, daily_type):
 async def register_daily(user_id, daily_id, daily_type, level=necrolevel.LEVEL_NOS, time=-1):
     async with DBConnect(commit=True) as cursor:
         params = (user_id, daily_id, daily_type, level, time,)
-        cursor.execute(
+        await cursor.execute_async(
             """
             INSERT INTO daily_runs
                 (user_id, daily_id, type, level, time)
@@ -77,11 +95,54 @@ async def register_daily(user_id, daily_id, daily_type, level=necrolevel.LEVEL_N
             """,
             params)
 
+        name = None
+        leaderboard = dailyleaderboard.get_loaded(daily_type, daily_id)
+        if leaderboard is not None and not leaderboard.has_name(user_id):
+            await cursor.execute_async("SELECT discord_name FROM users WHERE user_id=%s", (user_id,))
+            row = cursor.fetchone()
+            name = row[0] if row is not None else None
+
+    dailyleaderboard.on_run_written(daily_type, daily_id, user_id, level, time, name=name)
+
+
+async def register_dailies(user_ids, daily_id, daily_type):
+    """Register every given user for the daily in a single query, leaving alone any run already registered."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+
+    async with DBConnect(commit=True) as cursor:
+        params = [(user_id, daily_id, daily_type, necrolevel.LEVEL_NOS, -1,) for user_id in user_ids]
+        await cursor.executemany_async(
+            """
+            INSERT INTO daily_runs
+                (user_id, daily_id, type, level, time)
+            VALUES (%s,%s,%s,%s,%s)
+            ON DUPLICATE KEY UPDATE
+                user_id=user_id
+            """,
+            params)
+
+        names = dict()
+        leaderboard = dailyleaderboard.get_loaded(daily_type, daily_id)
+        if leaderboard is not None:
+            need_names = [user_id for user_id in user_ids if not leaderboard.has_registered(user_id)]
+            if need_names:
+                await cursor.execute_async(
+                    "SELECT user_id, discord_name FROM users WHERE user_id IN ({0})".format(
+                        ','.join(['%s'] * len(need_names))
+                    ),
+                    need_names)
+                names = {int(row[0]): row[1] for row in cursor.fetchall()}
+
+    for user_id, name in names.items():
+        dailyleaderboard.on_run_written(daily_type, daily_id, user_id, necrolevel.LEVEL_NOS, -1, name=name)
+
 
 async def registered_daily(user_id, daily_type):
     async with DBConnect(commit=False) as cursor:
         params = (user_id, daily_type,)
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT daily_id
             FROM daily_runs_uinfo
@@ -97,7 +158,7 @@ async def registered_daily(user_id, daily_type):
 async def submitted_daily(user_id, daily_type):
     async with DBConnect(commit=False) as cursor:
         params = (user_id, daily_type,)
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT daily_id 
             FROM daily_runs_uinfo 
@@ -113,7 +174,7 @@ async def submitted_daily(user_id, daily_type):
 async def delete_from_daily(user_id, daily_id, daily_type):
     async with DBConnect(commit=True) as cursor:
         params = (user_id, daily_id, daily_type,)
-        cursor.execute(
+        await cursor.execute_async(
             """
             UPDATE daily_runs_uinfo 
             SET level=-1 
@@ -121,11 +182,16 @@ async def delete_from_daily(user_id, daily_id, daily_type):
             """,
             params)
 
+    # Only users who have registered have a run to delete
+    leaderboard = dailyleaderboard.get_loaded(daily_type, daily_id)
+    if leaderboard is not None and leaderboard.has_registered(user_id):
+        dailyleaderboard.on_run_written(daily_type, daily_id, user_id, necrolevel.LEVEL_NOS)
+
 
 async def create_daily(daily_id, daily_type, seed, message_id=0):
     async with DBConnect(commit=True) as cursor:
         params = (daily_id, daily_type, seed, message_id)
-        cursor.execute(
+        await cursor.execute_async(
             """
             INSERT INTO dailies 
             (daily_id, type, seed, msg_id) 
@@ -137,7 +203,7 @@ async def create_daily(daily_id, daily_type, seed, message_id=0):
 async def register_daily_message(daily_id, daily_type, message_id):
     async with DBConnect(commit=True) as cursor:
         params = (message_id, daily_id, daily_type,)
-        cursor.execute(
+        await cursor.execute_async(
             """
             UPDATE dailies 
             SET msg_id=%s 
@@ -149,7 +215,7 @@ async def register_daily_message(daily_id, daily_type, message_id):
 async def get_daily_message_id(daily_id, daily_type):
     async with DBConnect(commit=False) as cursor:
         params = (daily_id, daily_type,)
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT msg_id 
             FROM dailies 
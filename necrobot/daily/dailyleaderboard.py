@@ -0,0 +1,200 @@
+"""
+In-memory leaderboards for dailies.
+
+A DailyLeaderboard holds every run for one (daily type, daily number), with the submitted runs kept in ranked order,
+and caches its rendered text until a run changes. Leaderboards are loaded by Daily, and kept up to date by the write
+functions in dailydb, which call on_run_written() after each write.
+"""
+
+import bisect
+import unittest
+from typing import Dict, List, Optional, Tuple
+
+from necrobot.util import racetime
+from necrobot.util import strutil
+from necrobot.util.necrodancer import level
+
+# Map from (daily type value, daily number) to the loaded leaderboard for that daily
+_leaderboards = dict()      # type: Dict[Tuple[int, int], DailyLeaderboard]
+
+
+class DailyLeaderboard(object):
+    def __init__(self, header: str, reverse_levelsort: bool = False):
+        """
+        Parameters
+        ----------
+        header: str
+            The header line for the leaderboard.
+        reverse_levelsort: bool
+            If True, deaths on lower levels rank higher (as for Aria).
+        """
+        self.header = header
+        self.seed = None                # type: Optional[int]
+        self._reverse_levelsort = reverse_levelsort
+        self._names = dict()            # type: Dict[int, str]
+        self._runs = dict()             # type: Dict[int, Tuple[int, int]]
+        self._ranked = list()           # type: List[Tuple[tuple, int]]
+        self._text = dict()             # type: Dict[bool, str]
+
+    def has_name(self, user_id: int) -> bool:
+        return user_id in self._names
+
+    def has_registered(self, user_id: int) -> bool:
+        return user_id in self._runs
+
+    def has_submitted(self, user_id: int) -> bool:
+        return user_id in self._runs and self._runs[user_id][0] != level.LEVEL_NOS
+
+    def get_run(self, user_id: int) -> Optional[Tuple[int, int]]:
+        """The user's (level, time), or None if they haven't registered."""
+        return self._runs.get(user_id)
+
+    def set_run(self, user_id: int, lv: int, time: int, name: str = None) -> None:
+        """Add or replace the user's run. A run on LEVEL_NOS is registered, but not submitted.
+
+        Parameters
+        ----------
+        user_id: int
+            The user's database ID.
+        lv: int
+            The level the run ended on, or LEVEL_FINISHED.
+        time: int
+            The run's time, in hundredths of a second, if it finished.
+        name: str
+            The user's name. If None, the name already on this leaderboard is used.
+        """
+        if name is not None:
+            self._names[user_id] = name
+
+        old_run = self._runs.get(user_id)
+        if old_run == (lv, time,):
+            return
+
+        if old_run is not None and old_run[0] != level.LEVEL_NOS:
+            self._ranked.remove((self._sortkey(old_run[0], old_run[1], user_id), user_id,))
+        self._runs[user_id] = (lv, time,)
+        if lv != level.LEVEL_NOS:
+            bisect.insort(self._ranked, (self._sortkey(lv, time, user_id), user_id,))
+        self._text.clear()
+
+    def text(self, display_seed: bool = False) -> str:
+        """The leaderboard, formatted for a discord message. Only re-rendered when a run has changed."""
+        display_seed = display_seed and self.seed is not None
+        if display_seed not in self._text:
+            self._text[display_seed] = self._render(display_seed)
+        return self._text[display_seed]
+
+    def _sortkey(self, lv: int, time: int, user_id: int) -> tuple:
+        # Best first: by level, then by time; user ID just makes the order deterministic
+        return -level.level_sortval(int(lv), reverse=self._reverse_levelsort), -int(lv), int(time), user_id
+
+    def _render(self, display_seed: bool) -> str:
+        text = "``` \n"
+        text += self.header + '\n'
+        if display_seed:
+            text += "Seed: {}\n".format(self.seed)
+
+        rank = 0
+        rank_to_display = 1
+        prior_result = ''   # detect and handle ties
+        for _, user_id in self._ranked:
+            lv, time = self._runs[user_id]
+            if lv == level.LEVEL_FINISHED:
+                result_string = racetime.to_str(time)
+            else:
+                result_string = level.to_str(lv)
+                if result_string == '':
+                    result_string = "death"
+                else:
+                    result_string = "death ({0})".format(result_string)
+
+            rank += 1
+
+            # update the rank only if we've gotten a different result than the last entrant
+            if result_string != prior_result:
+                rank_to_display = rank
+            prior_result = result_string
+
+            name = self._names.get(user_id)
+            name = strutil.tickless(name) if name is not None else ''
+            text += '{0: >3}. {1: <24} {2}\n'.format(rank_to_display, name, result_string)
+
+        if rank == 0:
+            text += 'No entries yet.\n'
+
+        text += '```'
+        return text
+
+
+def get_loaded(daily_type: int, daily_number: int) -> Optional[DailyLeaderboard]:
+    """Get the leaderboard for the given daily, if it has been loaded."""
+    return _leaderboards.get((daily_type, daily_number,))
+
+
+def add(daily_type: int, daily_number: int, leaderboard: DailyLeaderboard) -> None:
+    _leaderboards[(daily_type, daily_number,)] = leaderboard
+
+
+def forget(daily_type: int, daily_number: int) -> None:
+    _leaderboards.pop((daily_type, daily_number,), None)
+
+
+def forget_older_than(daily_type: int, daily_number: int) -> None:
+    """Forget all loaded leaderboards of the given type for dailies before daily_number."""
+    for key in [key for key in _leaderboards.keys() if key[0] == daily_type and key[1] < daily_number]:
+        del _leaderboards[key]
+
+
+def on_run_written(daily_type: int, daily_number: int, user_id: int, lv: int, time: int = None, name: str = None):
+    """Update the loaded leaderboard, if any, after a run has been written to the database.
+
+    Parameters
+    ----------
+    daily_type: int
+        The daily type value.
+    daily_number: int
+        The daily number.
+    user_id: int
+        The user's database ID.
+    lv: int
+        The level the run ended on, LEVEL_FINISHED, or LEVEL_NOS if the run was deleted.
+    time: int
+        The run's time. If None, keeps the time already on the leaderboard.
+    name: str
+        The user's name, if known.
+    """
+    leaderboard = get_loaded(daily_type, daily_number)
+    if leaderboard is None:
+        return
+
+    if time is None:
+        old_run = leaderboard.get_run(user_id)
+        time = old_run[1] if old_run is not None else -1
+    leaderboard.set_run(user_id=user_id, lv=lv, time=time, name=name)
+
+
+class TestDailyLeaderboard(unittest.TestCase):
+    def test_ranking(self):
+        leaderboard = DailyLeaderboard('Header')
+        leaderboard.set_run(1, level.LEVEL_FINISHED, 60000, name='slow')
+        leaderboard.set_run(2, level.LEVEL_FINISHED, 50000, name='fast')
+        leaderboard.set_run(3, 10, -1, name='dead')
+        leaderboard.set_run(4, level.LEVEL_NOS, -1, name='registered')
+        leaderboard.set_run(5, level.LEVEL_FINISHED, 60000, name='tied')
+
+        lines = leaderboard.text().split('\n')[2:-1]
+        self.assertEqual([line.split()[1] for line in lines], ['fast', 'slow', 'tied', 'dead'])
+        self.assertEqual([line.split()[0] for line in lines], ['1.', '2.', '2.', '4.'])
+        self.assertTrue(leaderboard.has_registered(4))
+        self.assertFalse(leaderboard.has_submitted(4))
+
+    def test_text_cached_until_change(self):
+        leaderboard = DailyLeaderboard('Header')
+        self.assertIn('No entries yet.', leaderboard.text())
+        text = leaderboard.text()
+        self.assertIs(leaderboard.text(), text)
+
+        leaderboard.set_run(1, level.LEVEL_FINISHED, 50000, name='racer')
+        self.assertIn('racer', leaderboard.text())
+        leaderboard.set_run(1, level.LEVEL_NOS, 50000)
+        self.assertIn('No entries yet.', leaderboard.text())
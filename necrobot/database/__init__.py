@@ -11,8 +11,22 @@ Dependencies
 ------------    
 dbconnect
     config
+    database/
+        dbpool
     util/
         console
+
+migrations
+    config
+    database/
+        dbconnect
+    util/
+        console
+
+dbpool
+    config
+    util/
+        singleton
         
 dbutil
 """
\ No newline at end of file
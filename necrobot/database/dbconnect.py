@@ -1,57 +1,44 @@
-import asyncio
-import mysql.connector
-
 from necrobot.util import console
 from necrobot.config import Config
+from necrobot.database.dbpool import DBPool, PoolMetrics, PooledCursor
 
 
 class DBConnect(object):
-    _lock = asyncio.Lock()
-    _db_connection = None
+    """Async context manager giving a cursor on a connection from the DBPool.
 
+    If commit is True, the transaction is committed on a clean exit and rolled back otherwise. Either way, the
+    connection is returned to the pool on exit.
+    """
     def __init__(self, commit=False):
         self.cursor = None
         self.commit = commit
+        self._connection = None
+
+    @staticmethod
+    def pool_metrics() -> PoolMetrics:
+        return DBPool().metrics
 
     async def __aenter__(self):
-        await DBConnect._lock.acquire()
+        pool = DBPool()
+        self._connection = await pool.acquire()
         try:
-            return self.__enter__()
-        except Exception:
-            DBConnect._lock.release()
+            cursor = PooledCursor(self._connection.cursor(buffered=True), pool)
+        except BaseException:
+            await pool.release(self._connection, commit=False)
             raise
 
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        try:
-            return self.__exit__(exc_type, exc_val, exc_tb)
-        finally:
-            DBConnect._lock.release()
-
-    def __enter__(self):
-        if DBConnect._db_connection is None:
-            DBConnect._db_connection = mysql.connector.connect(
-                user=Config.MYSQL_DB_USER,
-                password=Config.MYSQL_DB_PASSWD,
-                host=Config.MYSQL_DB_HOST,
-                database=Config.MYSQL_DB_NAME)
-        elif not DBConnect._db_connection.is_connected():
-            DBConnect._db_connection.reconnect()
-
-        if not DBConnect._db_connection.is_connected():
-            raise RuntimeError('Couldn\'t connect to the MySQL database.')
-
         if Config.debugging():
-            self.cursor = LoggingCursor(DBConnect._db_connection.cursor())
+            self.cursor = LoggingCursor(cursor)
         else:
-            self.cursor = DBConnect._db_connection.cursor()
+            self.cursor = cursor
         return self.cursor
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        self.cursor.close()
-        if exc_type is None and self.commit:
-            DBConnect._db_connection.commit()
-        elif self.commit:
-            DBConnect._db_connection.rollback()
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        try:
+            self.cursor.close()
+        finally:
+            await DBPool().release(self._connection, commit=(exc_type is None and self.commit))
+            self._connection = None
 
 
 class LoggingCursor(object):
@@ -68,5 +55,9 @@ class LoggingCursor(object):
         return self.cursor.__iter__()
 
     def execute(self, operation, *args, **kwargs):
-        console.debug('Execute SQL: <{0}> <args={1}> <kwargs={2}>'.format(operation, args, kwargs))
+        console.debug('Execute SQL: <{0}> <args={1}> <kwargs={2}>', operation, args, kwargs)
         return self.cursor.execute(operation, *args, **kwargs)
+
+    async def execute_async(self, operation, *args, **kwargs):
+        console.debug('Execute SQL: <{0}> <args={1}> <kwargs={2}>', operation, args, kwargs)
+        return await self.cursor.execute_async(operation, *args, **kwargs)
@@ -0,0 +1,265 @@
+"""
+A fixed-size pool of MySQL connections, shared by every DBConnect.
+
+Connections are created lazily, up to Config.MYSQL_DB_POOL_SIZE of them. Connecting, committing, and any
+query made through PooledCursor.execute_async run on a worker thread, so a slow query does not block the
+event loop.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import time
+import unittest
+
+import mysql.connector
+
+from necrobot.config import Config
+from necrobot.util.singleton import Singleton
+
+
+class PoolMetrics(object):
+    """Running totals for a DBPool. All times are in seconds."""
+    def __init__(self, size: int = 0):
+        self.size = size
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.num_acquires = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.num_queries = 0
+        self.total_query_time = 0.0
+        self.max_query_time = 0.0
+
+    @property
+    def mean_wait(self) -> float:
+        return self.total_wait / self.num_acquires if self.num_acquires else 0.0
+
+    @property
+    def mean_query_time(self) -> float:
+        return self.total_query_time / self.num_queries if self.num_queries else 0.0
+
+    def record_acquire(self, wait: float) -> None:
+        self.num_acquires += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def record_release(self) -> None:
+        self.in_use -= 1
+
+    def record_query(self, latency: float) -> None:
+        self.num_queries += 1
+        self.total_query_time += latency
+        self.max_query_time = max(self.max_query_time, latency)
+
+    def copy(self) -> 'PoolMetrics':
+        the_copy = PoolMetrics()
+        the_copy.__dict__.update(self.__dict__)
+        return the_copy
+
+    def __str__(self):
+        return 'Connections in use: {in_use}/{size} (peak {peak})\n' \
+               'Acquires: {acquires} (mean wait {mean_wait:.1f} ms, max {max_wait:.1f} ms)\n' \
+               'Queries: {queries} (mean {mean_query:.1f} ms, max {max_query:.1f} ms)'.format(
+                    in_use=self.in_use,
+                    size=self.size,
+                    peak=self.peak_in_use,
+                    acquires=self.num_acquires,
+                    mean_wait=1000*self.mean_wait,
+                    max_wait=1000*self.max_wait,
+                    queries=self.num_queries,
+                    mean_query=1000*self.mean_query_time,
+                    max_query=1000*self.max_query_time
+                )
+
+
+class DBPool(object, metaclass=Singleton):
+    def __init__(self):
+        self._size = max(1, int(Config.MYSQL_DB_POOL_SIZE))
+        self._idle = None       # type: asyncio.LifoQueue
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self._size,
+            thread_name_prefix='necrobot-db'
+        )
+        self._metrics = PoolMetrics(size=self._size)
+
+    @property
+    def metrics(self) -> PoolMetrics:
+        """A snapshot of the pool's current metrics."""
+        return self._metrics.copy()
+
+    async def run(self, func, *args, **kwargs):
+        """Run the blocking function func(*args, **kwargs) on one of the pool's worker threads.
+
+        If the calling task is cancelled, this still waits for func to finish before raising CancelledError, so that
+        the caller never closes or releases a connection that a worker thread is still using.
+        """
+        return await _finish(self._submit(func, *args, **kwargs))
+
+    async def acquire(self):
+        """Wait for a free connection, connecting (or reconnecting) it if necessary."""
+        if self._idle is None:
+            # Created here rather than in __init__ so that the queue belongs to the running loop. Empty slots
+            # (None) are connected on first use.
+            self._idle = asyncio.LifoQueue()
+            for _ in range(self._size):
+                self._idle.put_nowait(None)
+
+        wait_start = time.monotonic()
+        connection = await self._idle.get()
+        self._metrics.record_acquire(time.monotonic() - wait_start)
+
+        future = self._submit(self._connect, connection)
+        try:
+            return await _finish(future)
+        except BaseException:
+            # Return the slot, keeping the connection if it was made before the task was cancelled
+            if not future.cancelled() and future.exception() is None:
+                connection = future.result()
+            self._metrics.record_release()
+            self._idle.put_nowait(connection)
+            raise
+
+    async def release(self, connection, commit: bool) -> None:
+        """Return a connection to the pool, ending its transaction.
+
+        Read-only uses are rolled back rather than left open; otherwise a connection would keep reading from
+        the snapshot taken at its first query and never see writes made through other connections.
+        """
+        try:
+            if commit:
+                await self.run(connection.commit)
+            else:
+                await self.run(connection.rollback)
+        finally:
+            self._metrics.record_release()
+            self._idle.put_nowait(connection)
+
+    def record_query(self, latency: float) -> None:
+        self._metrics.record_query(latency)
+
+    def _submit(self, func, *args, **kwargs) -> asyncio.Future:
+        return asyncio.get_event_loop().run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    @staticmethod
+    def _connect(connection):
+        if connection is None:
+            connection = mysql.connector.connect(
+                user=Config.MYSQL_DB_USER,
+                password=Config.MYSQL_DB_PASSWD,
+                host=Config.MYSQL_DB_HOST,
+                database=Config.MYSQL_DB_NAME)
+        elif not connection.is_connected():
+            connection.reconnect()
+
+        if not connection.is_connected():
+            raise RuntimeError('Couldn\'t connect to the MySQL database.')
+        return connection
+
+
+async def _finish(future: asyncio.Future):
+    """Await a worker thread's future. If the awaiting task is cancelled, wait for the future to finish anyway (a
+    worker thread can't be interrupted), then raise CancelledError."""
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        while not future.done():
+            try:
+                await asyncio.wait([future])
+            except asyncio.CancelledError:
+                pass
+        raise
+
+
+class PooledCursor(object):
+    """Wraps a (buffered) mysql.connector cursor, timing each query.
+
+    Since the cursor is buffered, all rows are read during the execute call, and the fetch methods never touch
+    the network.
+    """
+    def __init__(self, cursor, pool: DBPool):
+        self.cursor = cursor
+        self._pool = pool
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+    def __next__(self):
+        return self.cursor.__next__()
+
+    def __iter__(self):
+        return self.cursor.__iter__()
+
+    def execute(self, operation, *args, **kwargs):
+        start = time.monotonic()
+        try:
+            return self.cursor.execute(operation, *args, **kwargs)
+        finally:
+            self._pool.record_query(time.monotonic() - start)
+
+    def executemany(self, operation, *args, **kwargs):
+        start = time.monotonic()
+        try:
+            return self.cursor.executemany(operation, *args, **kwargs)
+        finally:
+            self._pool.record_query(time.monotonic() - start)
+
+    async def execute_async(self, operation, *args, **kwargs):
+        """As execute, but the query runs on a worker thread instead of the event loop."""
+        return await self._pool.run(self.execute, operation, *args, **kwargs)
+
+    async def executemany_async(self, operation, *args, **kwargs):
+        """As executemany, but the query runs on a worker thread instead of the event loop."""
+        return await self._pool.run(self.executemany, operation, *args, **kwargs)
+
+
+class TestDBPool(unittest.TestCase):
+    class _Connection(object):
+        def __init__(self):
+            self.commits = 0
+
+        def commit(self):
+            time.sleep(0.05)
+            self.commits += 1
+
+    def test_cancelled_acquire_and_release(self):
+        pool = DBPool.__new__(DBPool)
+        pool._size = 2
+        pool._idle = None
+        pool._executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        pool._metrics = PoolMetrics(size=2)
+
+        def slow_connect(connection):
+            time.sleep(0.05)
+            return connection if connection is not None else TestDBPool._Connection()
+        pool._connect = slow_connect
+
+        async def cancel_soon(coro):
+            task = asyncio.ensure_future(coro)
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        async def run():
+            # Cancelled acquires give their slots back, keeping any connection made
+            await cancel_soon(pool.acquire())
+            await cancel_soon(pool.acquire())
+            self.assertEqual(pool.metrics.in_use, 0)
+            connection = await asyncio.wait_for(pool.acquire(), timeout=1)
+            self.assertIsInstance(connection, TestDBPool._Connection)
+
+            # A cancelled release waits for the commit to finish before returning the connection
+            await cancel_soon(pool.release(connection, commit=True))
+            self.assertEqual(connection.commits, 1)
+            self.assertEqual(pool.metrics.in_use, 0)
+            self.assertEqual(pool._idle.qsize(), 2)
+
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(run())
+        finally:
+            loop.close()
+            pool._executor.shutdown()
@@ -0,0 +1,48 @@
+"""
+Changes to the database schema, applied when the bot starts.
+
+Each migration first checks whether it has already been applied, so run_migrations() can safely be called every time
+the bot starts.
+"""
+
+from necrobot.config import Config
+from necrobot.database.dbconnect import DBConnect
+from necrobot.util import console
+
+
+async def run_migrations() -> None:
+    await _add_lowercase_name_columns()
+
+
+async def _column_exists(cursor, table_name: str, column_name: str) -> bool:
+    await cursor.execute_async(
+        """
+        SELECT COUNT(*)
+        FROM information_schema.columns
+        WHERE table_schema=%s AND table_name=%s AND column_name=%s
+        """,
+        (Config.MYSQL_DB_NAME, table_name, column_name,)
+    )
+    return bool(cursor.fetchone()[0])
+
+
+async def _add_lowercase_name_columns() -> None:
+    """Add indexed lowercase copies of the name columns of the `users` table, so that names can be looked up
+    case-insensitively without computing LOWER() for every row.
+    """
+    async with DBConnect(commit=True) as cursor:
+        if await _column_exists(cursor, 'users', 'discord_name_lc'):
+            return
+
+        console.info('Migrating database: adding lowercase name columns to `users`.')
+        await cursor.execute_async(
+            """
+            ALTER TABLE users
+                ADD COLUMN discord_name_lc VARCHAR(255) AS (LOWER(discord_name)) STORED,
+                ADD COLUMN twitch_name_lc VARCHAR(255) AS (LOWER(twitch_name)) STORED,
+                ADD COLUMN rtmp_name_lc VARCHAR(25) AS (LOWER(rtmp_name)) STORED,
+                ADD INDEX idx_discord_name_lc (discord_name_lc),
+                ADD INDEX idx_twitch_name_lc (twitch_name_lc),
+                ADD INDEX idx_rtmp_name_lc (rtmp_name_lc)
+            """
+        )
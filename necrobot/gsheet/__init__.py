@@ -18,8 +18,11 @@ cmd_sheet
         command
         commandtype
     gsheet/
+        sheetjobqueue
+        sheetlayoutcache
         sheetlib
         sheetutil
+        sheetwriter
         matchupsheet
         standingssheet
     league/
@@ -48,6 +51,17 @@ matchupsheet
 sheetcell
     gsheet/
         sheetutil
+sheetjobqueue
+    config
+    util/
+        console
+        scheduler
+        singleton
+sheetlayoutcache
+    config
+    util/
+        console
+        singleton
 sheetlib
     exception
     gsheet/
@@ -61,14 +75,25 @@ sheetutil
     gsheet/
         makerequest
         spreadsheets
+sheetwriter
+    config
+    gsheet/
+        makerequest
+        spreadsheets
+    util/
+        console
+        singleton
 spreadsheets
     config
 standingssheet
     gsheet/
         makerequest
         matchgsheetinfo
+        sheetwriter
         spreadsheets
         worksheetindexdata
+    league/
+        standings
     match/
         matchdb
         matchutil
@@ -83,6 +108,8 @@ worksheetindexdata
     gsheet/
         makerequest
         sheetcell
+        sheetlayoutcache
         sheetrange
+        sheetwriter
         spreadsheets
 """
\ No newline at end of file
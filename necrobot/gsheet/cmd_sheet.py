@@ -13,6 +13,9 @@ from necrobot.botbase.commandtype import CommandType
 from necrobot.match.match import Match
 from necrobot.match.matchracedata import MatchRaceData
 from necrobot.gsheet.matchupsheet import MatchupSheet
+from necrobot.gsheet.sheetjobqueue import SheetJobQueue
+from necrobot.gsheet.sheetlayoutcache import SheetLayoutCache
+from necrobot.gsheet.sheetwriter import SheetWriter
 from necrobot.gsheet.standingssheet import StandingsSheet
 from necrobot.league.leaguemgr import LeagueMgr
 from necrobot.condorbot.condormgr import CondorMgr
@@ -275,6 +278,57 @@ class GetGSheet(CommandType):
 #         )
 
 
+class GSheetJobs(CommandType):
+    def __init__(self, bot_channel):
+        CommandType.__init__(self, bot_channel, 'gsheetjobs')
+        self.help_text = 'Show how many GSheet rewrites are queued and running, and how many requests each GSheet ' \
+                         'write has served.'
+        self.admin_only = True
+
+    async def _do_execute(self, cmd: Command):
+        writer = SheetWriter()
+        await cmd.channel.send(
+            '```\n'
+            'Rewrite jobs: {jobs}\n'
+            'Cell updates: {updates} updates sent in {requests} requests ({ratio:.1f} per request)\n'
+            '```'.format(
+                jobs=SheetJobQueue(),
+                updates=writer.num_updates,
+                requests=writer.num_requests,
+                ratio=writer.coalesce_ratio
+            )
+        )
+
+
+class RefreshGSheet(CommandType):
+    def __init__(self, bot_channel):
+        CommandType.__init__(self, bot_channel, 'refreshgsheet')
+        self.help_text = '`{0}`: Forget the cached layout of the event\'s GSheet, so that the bot reads its header ' \
+                         'rows and columns again. Use this after editing the GSheet\'s layout by hand.' \
+                         .format(self.mention)
+        self.admin_only = True
+
+    @property
+    def short_help_text(self):
+        return "Re-read the event's GSheet layout."
+
+    async def _do_execute(self, cmd: Command):
+        gsheet_id = CondorMgr().event.gsheet_id
+        if gsheet_id is None:
+            await cmd.channel.send(
+                'Error: GSheet for this league is not yet set. Use `.setgsheet`.'
+            )
+            return
+
+        num_forgotten = SheetLayoutCache().invalidate(gsheet_id=gsheet_id)
+        sheetlib.clear_cache(gsheet_id=gsheet_id)
+        await cmd.channel.send(
+            'Forgot {0} cached worksheet layout(s); the GSheet will be re-read the next time it is used.'.format(
+                num_forgotten
+            )
+        )
+
+
 class SetLeagueWorksheet(CommandType):
     def __init__(self, bot_channel):
         CommandType.__init__(self, bot_channel, 'set-league-worksheet')
@@ -1,16 +1,23 @@
 import asyncio
+import concurrent.futures
+
 import googleapiclient.errors
 import necrobot.exception
 
 from necrobot.util.backoff import ExponentialBackoff
 
 
+# Requests are blocking, so they run off the event loop. The API client's httplib2 transport isn't thread-safe, so
+# they all share a single worker thread.
+_request_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='necrobot-gsheet')
+
+
 async def make_request(request):
     backoff = ExponentialBackoff(base=1, timeout=15)
 
     while True:
         try:
-            return request.execute()
+            return await asyncio.get_event_loop().run_in_executor(_request_executor, request.execute)
         except googleapiclient.errors.HttpError as e:
             backoff_errors = [429, 502]
             error_type = e.resp.status
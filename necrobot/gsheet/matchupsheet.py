@@ -133,6 +133,9 @@ class MatchupSheet(object):
 
     async def get_matches(self, **kwargs):
         """Read racer names and match types from the GSheet; create corresponding matches.
+
+        The sheet is only locked while its values are read. The racers for every row are then found (or registered)
+        together, and the matches are created or updated together, in a single transaction.
         
         Parameters
         ----------
@@ -149,85 +152,97 @@ class MatchupSheet(object):
 
         matches = []
         self._not_found_matches = []
-        register_match_ids = self.column_data.match_id is not None and 'register' in kwargs and kwargs['register']
-        match_ids = []
+        register = 'register' in kwargs and kwargs['register']
+        register_match_ids = self.column_data.match_id is not None and register
+        kwargs = {key: value for key, value in kwargs.items() if key != 'register'}
 
         async with Spreadsheets() as spreadsheets:
             value_range = await self.column_data.get_values(spreadsheets)
-            console.debug('get_matches: Got values from spreadsheets.')
+        console.debug('get_matches: Got values from spreadsheets.')
 
-            if 'values' not in value_range:
-                console.debug('get_matches: Values is empty.')
-                return matches
-            else:
-                console.debug('get_matches: Values: {0}'.format(value_range['values']))
+        if 'values' not in value_range:
+            console.debug('get_matches: Values is empty.')
+            return matches
+        else:
+            console.debug('get_matches: Values: {0}'.format(value_range['values']))
+
+        # Parse every row first, so that all the racers can be looked up at once
+        rows = []
+        for row_idx, row_values in enumerate(value_range['values']):
+            try:
+                racer_1_name = row_values[self.column_data.racer_1].rstrip(' ')
+                racer_2_name = row_values[self.column_data.racer_2].rstrip(' ')
+            except IndexError:
+                console.warning('Failed to make match from sheet row: <{}>'.format(row_values))
+                continue
+
+            if not racer_1_name or not racer_2_name:
+                continue
+
+            match_id = None
+            if register_match_ids:
+                try:
+                    match_id = int(row_values[self.column_data.match_id])
+                except (ValueError, IndexError):
+                    pass
+
+            rows.append((row_idx, row_values, racer_1_name, racer_2_name, match_id,))
+
+        users = await userlib.get_users_with_any_names(
+            names=[name for row in rows for name in [row[2], row[3]]],
+            register=True
+        )
 
-            for row_idx, row_values in enumerate(value_range['values']):
+        match_kwargs = []
+        match_rows = []
+        for row_idx, row_values, racer_1_name, racer_2_name, match_id in rows:
+            racer_1 = users.get(racer_1_name.lower())
+            racer_2 = users.get(racer_2_name.lower())
+            if racer_1 is None or racer_2 is None:
+                console.warning('Couldn\'t find racers for match {0}-{1}.'.format(
+                    racer_1_name, racer_2_name
+                ))
+                self._not_found_matches.append('{0}-{1}'.format(racer_1_name, racer_2_name))
+                continue
+
+            sheet_info = MatchGSheetInfo()
+            sheet_info.wks_id = self.wks_id
+            sheet_info.row = row_idx
+
+            kwarg_copy = kwargs.copy()
+            if self.column_data.type is not None:
+                match_info = kwarg_copy['match_info'] if 'match_info' in kwargs else matchinfo.MatchInfo()
                 try:
-                    racer_1_name = row_values[self.column_data.racer_1].rstrip(' ')
-                    racer_2_name = row_values[self.column_data.racer_2].rstrip(' ')
+                    parsed_args = shlex.split(row_values[self.column_data.type])
+                    kwarg_copy['match_info'] = matchinfo.parse_args_modify(parsed_args, match_info)
                 except IndexError:
-                    console.warning('Failed to make match from sheet row: <{}>'.format(row_values))
-                    continue
-
-                if not racer_1_name or not racer_2_name:
-                    continue
-
-                match_id = None
-                if register_match_ids:
-                    try:
-                        match_id = int(row_values[self.column_data.match_id])
-                    except ValueError:
-                        pass
-
-                # if racer_1_name[0] not in string.ascii_letters or racer_2_name[0] not in string.ascii_letters:
-                #     self._not_found_matches.append('{0}-{1}'.format(racer_1_name, racer_2_name))
-                #     continue
-
-                console.debug('get_matches: Creating {0}-{1}'.format(racer_1_name, racer_2_name))
-
-                racer_1 = await userlib.get_user(any_name=racer_1_name, register=True)
-                racer_2 = await userlib.get_user(any_name=racer_2_name, register=True)
-                if racer_1 is None or racer_2 is None:
-                    console.warning('Couldn\'t find racers for match {0}-{1}.'.format(
-                        racer_1_name, racer_2_name
-                    ))
-                    self._not_found_matches.append('{0}-{1}'.format(racer_1_name, racer_2_name))
-                    continue
-
-                sheet_info = MatchGSheetInfo()
-                sheet_info.wks_id = self.wks_id
-                sheet_info.row = row_idx
-
-                kwarg_copy = kwargs.copy()
-                if self.column_data.type is not None:
-                    match_info = kwarg_copy['match_info'] if 'match_info' in kwargs else matchinfo.MatchInfo()
-                    try:
-                        parsed_args = shlex.split(row_values[self.column_data.type])
-                        kwarg_copy['match_info'] = matchinfo.parse_args_modify(parsed_args, match_info)
-                    except IndexError:
-                        pass
-
-                new_match = await matchutil.make_match(
-                    update=True,
-                    match_id=match_id,
-                    racer_1_id=racer_1.user_id,
-                    racer_2_id=racer_2.user_id,
-                    gsheet_info=sheet_info,
-                    **kwarg_copy
-                )
+                    pass
 
-                if register_match_ids:
-                    match_ids.append([new_match.match_id] if new_match is not None else [''])
+            kwarg_copy.update(
+                match_id=match_id,
+                racer_1_id=racer_1.user_id,
+                racer_2_id=racer_2.user_id,
+                gsheet_info=sheet_info
+            )
+            match_kwargs.append(kwarg_copy)
+            match_rows.append((racer_1_name, racer_2_name,))
 
-                if new_match is None:
-                    self._not_found_matches.append('{0}-{1}'.format(racer_1_name, racer_2_name))
-                    continue
+        console.debug('get_matches: Creating {0} matches.'.format(len(match_kwargs)))
+        new_matches = await matchutil.upsert_matches(match_kwargs, register=register)
 
-                matches.append(new_match)
-                console.debug('get_matches: Created {0}-{1}'.format(
-                    new_match.racer_1.rtmp_name, new_match.racer_2.rtmp_name)
-                )
+        match_ids = []
+        for (racer_1_name, racer_2_name), new_match in zip(match_rows, new_matches):
+            if register_match_ids:
+                match_ids.append([new_match.match_id] if new_match is not None else [''])
+
+            if new_match is None:
+                self._not_found_matches.append('{0}-{1}'.format(racer_1_name, racer_2_name))
+                continue
+
+            matches.append(new_match)
+            console.debug('get_matches: Created {0}-{1}'.format(
+                new_match.racer_1.rtmp_name, new_match.racer_2.rtmp_name)
+            )
 
         if register_match_ids:
             ids_range = self.column_data.get_range_for_column(self.column_data.match_id)
@@ -0,0 +1,132 @@
+"""
+Debounces jobs that rewrite a GSheet worksheet.
+
+A job submitted for a worksheet waits until no other job has been submitted for that worksheet for
+Config.GSHEET_JOB_QUIET_PERIOD seconds (but no longer than Config.GSHEET_JOB_MAX_DELAY after the first of them), and
+then only the most recently submitted job runs. Jobs for the same worksheet never run at the same time, and at most
+Config.GSHEET_JOB_CONCURRENCY jobs run at once overall.
+"""
+
+import asyncio
+import datetime
+import functools
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from necrobot.config import Config
+from necrobot.util import console
+from necrobot.util.scheduler import JobHandle, Scheduler
+from necrobot.util.singleton import Singleton
+
+
+class _SheetJob(object):
+    def __init__(self, name: str):
+        self.name = name
+        self.callback = None        # type: Optional[Callable[[], Awaitable]]
+        self.first_submitted = datetime.datetime.utcnow()
+        self.num_submitted = 0
+        self.handle = None          # type: Optional[JobHandle]
+        self.due = False            # True if this job is waiting for a running job on the same worksheet to finish
+
+
+class SheetJobQueue(object, metaclass=Singleton):
+    def __init__(self):
+        self._pending = dict()      # type: Dict[Tuple[str, str], _SheetJob]
+        self._running = set()       # type: Set[Tuple[str, str]]
+        self._semaphore = None      # type: Optional[asyncio.Semaphore]
+        self.num_submitted = 0
+        self.num_runs = 0
+        self.num_failed = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """The number of worksheets with a job waiting to run."""
+        return len(self._pending)
+
+    @property
+    def num_running(self) -> int:
+        return len(self._running)
+
+    @property
+    def coalesce_ratio(self) -> float:
+        """The average number of submitted jobs per job run."""
+        return self.num_submitted / self.num_runs if self.num_runs else 0.0
+
+    def __str__(self):
+        return '{depth} worksheets queued, {running} jobs running; {submitted} jobs submitted, {runs} run ' \
+               '({ratio:.1f} per run), {failed} failed'.format(
+                    depth=self.queue_depth,
+                    running=self.num_running,
+                    submitted=self.num_submitted,
+                    runs=self.num_runs,
+                    ratio=self.coalesce_ratio,
+                    failed=self.num_failed
+                )
+
+    def submit(self, gsheet_id: str, wks_id, callback: Callable[[], Awaitable], name: str) -> None:
+        """Submit a job for the given worksheet, replacing any job for that worksheet that hasn't started yet.
+
+        Parameters
+        ----------
+        gsheet_id: str
+            The ID of the GSheet.
+        wks_id
+            The ID of the worksheet the job writes to.
+        callback: Callable[[], Awaitable]
+            The coroutine function to run.
+        name: str
+            A description of the job, for listing jobs.
+        """
+        key = (gsheet_id, str(wks_id),)
+        job = self._pending.get(key)
+        if job is None:
+            job = _SheetJob(name=name)
+            self._pending[key] = job
+        job.name = name
+        job.callback = callback
+        job.num_submitted += 1
+        self.num_submitted += 1
+
+        # A due job runs as soon as the running job for its worksheet finishes
+        if job.due:
+            return
+
+        if job.handle is not None:
+            job.handle.cancel()
+        when = min(
+            datetime.datetime.utcnow() + datetime.timedelta(seconds=Config.GSHEET_JOB_QUIET_PERIOD),
+            job.first_submitted + datetime.timedelta(seconds=Config.GSHEET_JOB_MAX_DELAY)
+        )
+        job.handle = Scheduler().schedule(when, functools.partial(self._run, key), name='GSheet: {0}'.format(name))
+
+    async def _run(self, key: Tuple[str, str]) -> None:
+        job = self._pending.get(key)
+        if job is None:
+            return
+        if key in self._running:
+            job.due = True
+            return
+
+        del self._pending[key]
+        self._running.add(key)
+        try:
+            async with self._get_semaphore():
+                self.num_runs += 1
+                await job.callback()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.num_failed += 1
+            console.warning('GSheet job {0} ({1} submissions) failed: {2}', job.name, job.num_submitted, e)
+        finally:
+            self._running.discard(key)
+            next_job = self._pending.get(key)
+            if next_job is not None and next_job.due:
+                next_job.due = False
+                next_job.handle = Scheduler().schedule_in(
+                    0, functools.partial(self._run, key), name='GSheet: {0}'.format(next_job.name)
+                )
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(Config.GSHEET_JOB_CONCURRENCY)
+        return self._semaphore
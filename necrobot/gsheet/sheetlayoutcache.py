@@ -0,0 +1,185 @@
+"""
+Cache of worksheet layouts (worksheet IDs, sheet sizes, and the header, footer, and column indicies found by scanning
+a worksheet), kept in memory and in the file Config.GSHEET_LAYOUT_CACHE_FILE so that it survives a restart.
+
+A cached layout stores a fingerprint of the worksheet's properties (its title and grid size). The cached layout is
+only used if the fingerprint still matches the worksheet's current properties, and the caller should further check
+that the header and footer are still where the layout says before trusting it. Call invalidate() to forget layouts
+after editing a sheet by hand.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from typing import Dict, Iterable, Optional
+
+from necrobot.config import Config
+from necrobot.util import console
+from necrobot.util.singleton import Singleton
+
+
+# Bump this whenever the format of a cached layout changes; files with a different version are ignored.
+CACHE_VERSION = 1
+
+
+def fingerprint(props: dict) -> list:
+    """Return the part of a worksheet's properties that must be unchanged for a cached layout to be valid.
+
+    Parameters
+    ----------
+    props: dict
+        The 'properties' of a sheet, as returned by spreadsheets.get.
+    """
+    return [
+        props['title'],
+        int(props['gridProperties']['rowCount']),
+        int(props['gridProperties']['columnCount']),
+    ]
+
+
+class SheetLayoutCache(object, metaclass=Singleton):
+    def __init__(self):
+        self._layouts = None        # type: Optional[Dict[str, dict]]
+        self.num_hits = 0
+        self.num_misses = 0
+
+    def get(self, gsheet_id: str, wks_id: int, columns: Iterable[str], props: dict) -> Optional[dict]:
+        """Get the cached layout of the worksheet, if it still matches the worksheet's properties.
+
+        Parameters
+        ----------
+        gsheet_id: str
+            The GSheet ID.
+        wks_id: int
+            The worksheet ID.
+        columns: Iterable[str]
+            The column names the layout was searched for.
+        props: dict
+            The current properties of the worksheet, as returned by spreadsheets.get.
+
+        Returns
+        -------
+        Optional[dict]
+            The layout, or None if there is no valid cached layout.
+        """
+        layout = self._get_layouts().get(self._key(gsheet_id, wks_id, columns))
+        if layout is None or layout['fingerprint'] != fingerprint(props):
+            self.num_misses += 1
+            return None
+
+        self.num_hits += 1
+        return layout
+
+    def put(self, gsheet_id: str, wks_id: int, columns: Iterable[str], props: dict, layout: dict) -> None:
+        """Store the layout of the worksheet, and write the cache to disk.
+
+        Parameters
+        ----------
+        gsheet_id: str
+            The GSheet ID.
+        wks_id: int
+            The worksheet ID.
+        columns: Iterable[str]
+            The column names the layout was searched for.
+        props: dict
+            The current properties of the worksheet, as returned by spreadsheets.get.
+        layout: dict
+            The layout to store; must be JSON-serializable.
+        """
+        layout = dict(layout)
+        layout['fingerprint'] = fingerprint(props)
+        self._get_layouts()[self._key(gsheet_id, wks_id, columns)] = layout
+        self._save()
+
+    def invalidate(self, gsheet_id: Optional[str] = None) -> int:
+        """Forget cached layouts.
+
+        Parameters
+        ----------
+        gsheet_id: Optional[str]
+            If not None, only forget layouts for worksheets on this GSheet.
+
+        Returns
+        -------
+        int
+            The number of layouts forgotten.
+        """
+        layouts = self._get_layouts()
+        if gsheet_id is None:
+            to_del = list(layouts.keys())
+        else:
+            to_del = [key for key in layouts.keys() if key.split('/', 1)[0] == gsheet_id]
+
+        for key in to_del:
+            del layouts[key]
+        self._save()
+        return len(to_del)
+
+    @staticmethod
+    def _key(gsheet_id: str, wks_id: int, columns: Iterable[str]) -> str:
+        return '{0}/{1}/{2}'.format(gsheet_id, wks_id, '|'.join(columns))
+
+    def _get_layouts(self) -> Dict[str, dict]:
+        if self._layouts is None:
+            self._layouts = self._load()
+        return self._layouts
+
+    @staticmethod
+    def _load() -> Dict[str, dict]:
+        try:
+            with open(Config.GSHEET_LAYOUT_CACHE_FILE, 'r') as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return dict()
+        except (OSError, ValueError) as e:
+            console.warning('Could not read GSheet layout cache {0}: {1}', Config.GSHEET_LAYOUT_CACHE_FILE, e)
+            return dict()
+
+        if not isinstance(data, dict) or data.get('version') != CACHE_VERSION:
+            console.info('Ignoring GSheet layout cache {0} from a different version.', Config.GSHEET_LAYOUT_CACHE_FILE)
+            return dict()
+        return data.get('layouts', dict())
+
+    def _save(self) -> None:
+        tmp_filename = Config.GSHEET_LAYOUT_CACHE_FILE + '.tmp'
+        try:
+            with open(tmp_filename, 'w') as file:
+                json.dump({'version': CACHE_VERSION, 'layouts': self._layouts}, file)
+            os.replace(tmp_filename, Config.GSHEET_LAYOUT_CACHE_FILE)
+        except OSError as e:
+            console.warning('Could not write GSheet layout cache {0}: {1}', Config.GSHEET_LAYOUT_CACHE_FILE, e)
+
+
+class TestSheetLayoutCache(unittest.TestCase):
+    props = {'sheetId': 1, 'title': 'Sheet1', 'gridProperties': {'rowCount': 100, 'columnCount': 10}}
+    layout = {'header_row': 2, 'footer_row': 9, 'min_column': 1, 'max_column': 4, 'col_indicies': {'Racer_1': 1}}
+
+    def setUp(self):
+        self._old_filename = Config.GSHEET_LAYOUT_CACHE_FILE
+        self._tmpdir = tempfile.TemporaryDirectory()
+        Config.GSHEET_LAYOUT_CACHE_FILE = os.path.join(self._tmpdir.name, 'layout.json')
+
+    def tearDown(self):
+        Config.GSHEET_LAYOUT_CACHE_FILE = self._old_filename
+        self._tmpdir.cleanup()
+
+    def test_survives_restart(self):
+        cache = object.__new__(SheetLayoutCache)
+        cache.__init__()
+        cache.put('gsheet', 1, ['Racer 1'], self.props, self.layout)
+
+        restarted = object.__new__(SheetLayoutCache)
+        restarted.__init__()
+        self.assertEqual(restarted.get('gsheet', 1, ['Racer 1'], self.props)['header_row'], 2)
+        self.assertIsNone(restarted.get('gsheet', 1, ['Racer 2'], self.props))
+
+    def test_fingerprint_mismatch(self):
+        cache = object.__new__(SheetLayoutCache)
+        cache.__init__()
+        cache.put('gsheet', 1, ['Racer 1'], self.props, self.layout)
+
+        resized = dict(self.props, gridProperties={'rowCount': 200, 'columnCount': 10})
+        self.assertIsNone(cache.get('gsheet', 1, ['Racer 1'], resized))
+        self.assertEqual(cache.invalidate(gsheet_id='gsheet'), 1)
+        self.assertIsNone(cache.get('gsheet', 1, ['Racer 1'], self.props))
@@ -85,3 +85,16 @@ async def get_sheet(
     _matchup_sheet_lib[(gsheet_id, wks_name)] = sheet
     _sheets_by_id_lib[(gsheet_id, sheet.wks_id)] = sheet
     return sheet
+
+
+def clear_cache(gsheet_id: Optional[str] = None) -> None:
+    """Forget loaded sheets, so that the next call to get_sheet for them reads them from the GSheet again.
+
+    Parameters
+    ----------
+    gsheet_id: Optional[str]
+        If not None, only forget sheets on this GSheet.
+    """
+    for lib in [_matchup_sheet_lib, _sheets_by_id_lib]:
+        for key in [key for key in lib.keys() if gsheet_id is None or key[0] == gsheet_id]:
+            del lib[key]
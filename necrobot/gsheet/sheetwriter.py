@@ -0,0 +1,91 @@
+"""
+Batches writes to GSheets.
+
+Cell updates to the same spreadsheet that arrive within Config.GSHEET_WRITE_DELAY seconds of the first one are sent
+together, as a single values.batchUpdate request. A later update to a range replaces any pending update to the same
+range.
+"""
+
+import asyncio
+from typing import Dict, List, Tuple
+
+from necrobot.config import Config
+from necrobot.gsheet.makerequest import make_request
+from necrobot.gsheet.spreadsheets import Spreadsheets
+from necrobot.util import console
+from necrobot.util.singleton import Singleton
+
+
+class SheetWriter(object, metaclass=Singleton):
+    def __init__(self):
+        # Map from (gsheet_id, value_input_option) to the pending batch for that sheet, which maps range strings to
+        # the values to write there and the futures waiting on that write
+        self._pending = dict()      # type: Dict[Tuple[str, str], Dict[str, Tuple[list, List[asyncio.Future]]]]
+        self.num_updates = 0
+        self.num_requests = 0
+
+    @property
+    def coalesce_ratio(self) -> float:
+        """The average number of updates sent per API request."""
+        return self.num_updates / self.num_requests if self.num_requests else 0.0
+
+    async def update(self, gsheet_id: str, range_str: str, values: list, raw_input: bool = True) -> bool:
+        """Write values to the range, as part of the next batch for this GSheet.
+
+        Parameters
+        ----------
+        gsheet_id: str
+            The GSheet ID.
+        range_str: str
+            The range to update, in A1 notation.
+        values: list[list[str]]
+            An array of values; values[i][j] is the ith row, jth column value.
+        raw_input: bool
+            If False, GSheets will auto-format the input.
+
+        Returns
+        -------
+        bool
+            True if the update was successful. Returns once the batch containing this update has been sent.
+        """
+        key = (gsheet_id, 'RAW' if raw_input else 'USER_ENTERED',)
+        if key not in self._pending:
+            self._pending[key] = dict()
+            asyncio.ensure_future(self._flush_after_delay(key))
+
+        future = asyncio.get_event_loop().create_future()
+        batch = self._pending[key]
+        _, futures = batch.pop(range_str, (None, []))     # Re-insert, so that the latest update is written last
+        futures.append(future)
+        batch[range_str] = (values, futures,)
+        self.num_updates += 1
+
+        return await future
+
+    async def _flush_after_delay(self, key: Tuple[str, str]) -> None:
+        await asyncio.sleep(Config.GSHEET_WRITE_DELAY)
+
+        batch = self._pending.pop(key)
+        gsheet_id, value_input_option = key
+        futures = [future for _, range_futures in batch.values() for future in range_futures]
+        body = {
+            'valueInputOption': value_input_option,
+            'data': [{'range': range_str, 'values': values} for range_str, (values, _) in batch.items()],
+        }
+
+        try:
+            async with Spreadsheets() as spreadsheets:
+                request = spreadsheets.values().batchUpdate(spreadsheetId=gsheet_id, body=body)
+                response = await make_request(request)
+            self.num_requests += 1
+            console.debug(
+                'Wrote {0} ranges to GSheet {1} ({2} updates per request overall).',
+                len(batch), gsheet_id, self.coalesce_ratio
+            )
+            for future in futures:
+                if not future.done():
+                    future.set_result(response is not None)
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
@@ -1,8 +1,10 @@
+import asyncio
 from typing import Optional, Union
-from collections import defaultdict
-from necrobot.league import leaguedb
+from necrobot.league import standings
+from necrobot.league.standings import StandingsMatrix
 from necrobot.gsheet.makerequest import make_request
 from necrobot.gsheet.sheetrange import SheetRange
+from necrobot.gsheet.sheetwriter import SheetWriter
 from necrobot.gsheet.spreadsheets import Spreadsheets
 
 
@@ -28,7 +30,10 @@ class StandingsSheet(object):
 
     async def initialize(self, wks_name: str = None, wks_id: str = None) -> None:
         async with Spreadsheets() as spreadsheets:
-            request = spreadsheets.get(spreadsheetId=self.gsheet_id)
+            request = spreadsheets.get(
+                spreadsheetId=self.gsheet_id,
+                fields='sheets.properties(sheetId,title,gridProperties(rowCount,columnCount))'
+            )
             sheet_data = await make_request(request)
             for sheet in sheet_data['sheets']:
                 props = sheet['properties']
@@ -49,42 +54,51 @@ class StandingsSheet(object):
                 self.wks_id = 0
 
     async def overwrite_gsheet(self, league_tag: str) -> None:
-        raw_data = await leaguedb.get_standings_data_raw(league_tag=league_tag)
-        racers = set()
-        record = defaultdict(lambda: [0, 0])
-        for row in raw_data:
-            if row[0] is not None and row[1] is not None:
-                r1_name = row[0].lower()
-                r2_name = row[1].lower()
-                racers.add(r1_name)
-                racers.add(r2_name)
-                record[(r1_name, r2_name)][0] += row[2]
-                record[(r1_name, r2_name)][1] += row[3]
-                record[(r2_name, r1_name)][0] += row[3]
-                record[(r2_name, r1_name)][1] += row[2]
-        racers = sorted(racers)
+        """Reload the league's standings from the database and rewrite the whole sheet."""
+        matrix = await standings.get_standings(league_tag=league_tag, reload=True)
+        matrix.take_changes()
+        await self._write_all(matrix)
 
-        values = [[''] + list(x for x in racers)]
-        for racer in racers:
-            values.append([racer] + ['' for _ in range(len(racers))])
+    async def update_gsheet(self, league_tag: str) -> None:
+        """Write the cells of the league's standings that have changed since they were last written."""
+        matrix = await standings.get_standings(league_tag=league_tag)
+        rewrite_all, cells = matrix.take_changes()
+        if rewrite_all:
+            await self._write_all(matrix)
+            return
 
-        for the_racers, the_record in record.items():
-            idx = racers.index(the_racers[0]) + 1
-            jdx = racers.index(the_racers[1]) + 1
-            values[idx][jdx] = '{wins}-{losses}'.format(wins=the_record[0], losses=the_record[1])
+        # The changes have already been taken, so if any write fails, the whole sheet must be rewritten next time
+        try:
+            results = await asyncio.gather(*[
+                self._update_cells(
+                    sheet_range=SheetRange(
+                        ul_cell=(row + 1, col + 1), lr_cell=(row + 1, col + 1), wks_name=self.wks_name
+                    ),
+                    values=[[text]],
+                    raw_input=True
+                )
+                for row, col, text in cells
+            ])
+        except Exception:
+            matrix.mark_stale()
+            raise
+        if not all(results):
+            matrix.mark_stale()
 
-        # Construct the SheetRange to update
+    async def _write_all(self, matrix: StandingsMatrix) -> None:
         range_to_update = SheetRange(
             ul_cell=(1, 1),
-            lr_cell=(len(racers) + 1, len(racers) + 1),
+            lr_cell=(matrix.num_racers + 1, matrix.num_racers + 1),
             wks_name=self.wks_name,
         )
 
-        await self._update_cells(
-            sheet_range=range_to_update,
-            values=values,
-            raw_input=True
-        )
+        try:
+            success = await self._update_cells(sheet_range=range_to_update, values=matrix.values(), raw_input=True)
+        except Exception:
+            matrix.mark_stale()
+            raise
+        if not success:
+            matrix.mark_stale()
 
     async def _update_cells(self, sheet_range: SheetRange, values: list, raw_input=True) -> bool:
         """Update all cells in a range.
@@ -103,15 +117,9 @@ class StandingsSheet(object):
         bool
             True if the update was successful.
         """
-        range_str = str(sheet_range)
-        value_input_option = 'RAW' if raw_input else 'USER_ENTERED'
-        value_range_body = {'values': values}
-        async with Spreadsheets() as spreadsheets:
-            request = spreadsheets.values().update(
-                spreadsheetId=self.gsheet_id,
-                range=range_str,
-                valueInputOption=value_input_option,
-                body=value_range_body
-            )
-            response = await make_request(request)
-            return response is not None
+        return await SheetWriter().update(
+            gsheet_id=self.gsheet_id,
+            range_str=str(sheet_range),
+            values=values,
+            raw_input=raw_input
+        )
@@ -2,10 +2,16 @@ import typing
 import necrobot.exception
 from necrobot.gsheet.makerequest import make_request
 from necrobot.gsheet.sheetcell import SheetCell
+from necrobot.gsheet.sheetlayoutcache import SheetLayoutCache
 from necrobot.gsheet.sheetrange import SheetRange
+from necrobot.gsheet.sheetwriter import SheetWriter
 from necrobot.gsheet.spreadsheets import Spreadsheets
 
 
+# Restrict spreadsheets.get to the worksheet properties we use, rather than the full spreadsheet metadata
+_SHEET_PROPERTIES_FIELDS = 'sheets.properties(sheetId,title,gridProperties(rowCount,columnCount))'
+
+
 class WorksheetIndexData(object):
     """
     Stores the index of various columns on a GSheet.
@@ -89,22 +95,9 @@ class WorksheetIndexData(object):
 
         async with Spreadsheets() as spreadsheets:
             # Find the size of the worksheet
-            request = spreadsheets.get(spreadsheetId=self.gsheet_id)
-            sheet_data = await make_request(request)
-            for sheet in sheet_data['sheets']:
-                props = sheet['properties']
-                if wks_name is not None and props['title'] == wks_name:
-                    self.wks_name = wks_name
-                    self.wks_id = props['sheetId']
-                    self._sheet_size = (int(props['gridProperties']['rowCount']),
-                                        int(props['gridProperties']['columnCount']),)
-                    break
-                elif wks_id is not None and props['sheetId'] == wks_id:
-                    self.wks_name = props['title']
-                    self.wks_id = wks_id
-                    self._sheet_size = (int(props['gridProperties']['rowCount']),
-                                        int(props['gridProperties']['columnCount']),)
-                    break
+            props = await self._get_sheet_properties(spreadsheets, wks_name=wks_name, wks_id=wks_id)
+            if props is not None:
+                self._set_sheet_properties(props)
 
             if self.wks_id is None:
                 self.wks_id = 0
@@ -116,7 +109,7 @@ class WorksheetIndexData(object):
                 #     )
                 # )
 
-            await self._refresh(spreadsheets)
+            await self._load_layout(spreadsheets, props)
 
     @property
     def valid(self):
@@ -161,21 +154,21 @@ class WorksheetIndexData(object):
         )
         return await make_request(request)
 
-    async def refresh_all(self):
-        """Refresh all data"""
+    async def refresh_all(self, force: bool = False):
+        """Refresh all data
+
+        Parameters
+        ----------
+        force: bool
+            If True, rescan the worksheet even if the cached layout still looks valid.
+        """
         async with Spreadsheets() as spreadsheets:
             # Find the size of the worksheet
-            request = spreadsheets.get(spreadsheetId=self.gsheet_id)
-            sheet_data = await make_request(request)
-            for sheet in sheet_data['sheets']:
-                props = sheet['properties']
-                if props['sheetId'] == self.wks_id:
-                    self.wks_name = props['title']
-                    self._sheet_size = (int(props['gridProperties']['rowCount']),
-                                        int(props['gridProperties']['columnCount']),)
-                    break
-
-            await self._refresh(spreadsheets)
+            props = await self._get_sheet_properties(spreadsheets, wks_id=self.wks_id)
+            if props is not None:
+                self._set_sheet_properties(props)
+
+            await self._load_layout(spreadsheets, props, force=force)
 
     async def refresh_footer(self):
         """Refresh the self.footer_row property from the GSheet"""
@@ -238,17 +231,12 @@ class WorksheetIndexData(object):
         row += self.header_row + 1
         col += self.min_column
         range_str = str(SheetCell(row, col, wks_name=self.wks_name))
-        value_input_option = 'RAW' if raw_input else 'USER_ENTERED'
-        value_range_body = {'values': [[value]]}
-        async with Spreadsheets() as spreadsheets:
-            request = spreadsheets.values().update(
-                spreadsheetId=self.gsheet_id,
-                range=range_str,
-                valueInputOption=value_input_option,
-                body=value_range_body
-            )
-            response = await make_request(request)
-            return response is not None
+        return await SheetWriter().update(
+            gsheet_id=self.gsheet_id,
+            range_str=range_str,
+            values=[[value]],
+            raw_input=raw_input
+        )
 
     async def update_cells(self, sheet_range: SheetRange, values: list, raw_input=True) -> bool:
         """Update all cells in a range.
@@ -267,18 +255,90 @@ class WorksheetIndexData(object):
         bool
             True if the update was successful.
         """
-        range_str = str(sheet_range)
-        value_input_option = 'RAW' if raw_input else 'USER_ENTERED'
-        value_range_body = {'values': values}
-        async with Spreadsheets() as spreadsheets:
-            request = spreadsheets.values().update(
-                spreadsheetId=self.gsheet_id,
-                range=range_str,
-                valueInputOption=value_input_option,
-                body=value_range_body
-            )
-            response = await make_request(request)
-            return response is not None
+        return await SheetWriter().update(
+            gsheet_id=self.gsheet_id,
+            range_str=str(sheet_range),
+            values=values,
+            raw_input=raw_input
+        )
+
+    async def _get_sheet_properties(self, spreadsheets, wks_name: str = None, wks_id: int = None) -> dict or None:
+        """Get the properties of the worksheet with the given name or ID, without fetching any other sheet data"""
+        request = spreadsheets.get(spreadsheetId=self.gsheet_id, fields=_SHEET_PROPERTIES_FIELDS)
+        sheet_data = await make_request(request)
+        for sheet in sheet_data['sheets']:
+            props = sheet['properties']
+            if wks_name is not None and props['title'] == wks_name:
+                return props
+            elif wks_id is not None and props['sheetId'] == wks_id:
+                return props
+        return None
+
+    def _set_sheet_properties(self, props: dict) -> None:
+        self.wks_name = props['title']
+        self.wks_id = props['sheetId']
+        self._sheet_size = (int(props['gridProperties']['rowCount']),
+                            int(props['gridProperties']['columnCount']),)
+
+    async def _load_layout(self, spreadsheets, props: dict or None, force: bool = False) -> None:
+        """Find the array bounds and column indicies, from the SheetLayoutCache if possible"""
+        cache = SheetLayoutCache()
+        if props is not None and not force:
+            layout = cache.get(self.gsheet_id, self.wks_id, self._col_names, props)
+            if layout is not None and await self._layout_matches_sheet(spreadsheets, layout):
+                self.header_row = layout['header_row']
+                self.footer_row = layout['footer_row']
+                self.min_column = layout['min_column']
+                self.max_column = layout['max_column']
+                self._col_indicies = dict(layout['col_indicies'])
+                return
+
+        self.min_column = None
+        self.max_column = None
+        self.header_row = None
+        self.footer_row = None
+        self._col_indicies = dict()
+        await self._refresh(spreadsheets)
+
+        if props is not None and self.valid and self.footer_row is not None:
+            cache.put(self.gsheet_id, self.wks_id, self._col_names, props, {
+                'header_row': self.header_row,
+                'footer_row': self.footer_row,
+                'min_column': self.min_column,
+                'max_column': self.max_column,
+                'col_indicies': self._col_indicies,
+            })
+
+    async def _layout_matches_sheet(self, spreadsheets, layout: dict) -> bool:
+        """Check that the header row still has the cached column names, and that the footer hasn't moved"""
+        header_row = layout['header_row']
+        footer_row = layout['footer_row']
+        rows_to_check = [header_row, footer_row - 1]
+        if footer_row <= self._sheet_size[0]:
+            rows_to_check.append(footer_row)
+
+        request = spreadsheets.values().batchGet(
+            spreadsheetId=self.gsheet_id,
+            ranges=[
+                str(SheetRange(ul_cell=(row, 1,), lr_cell=(row, self._sheet_size[1],), wks_name=self.wks_name))
+                for row in rows_to_check
+            ],
+            majorDimension='ROWS'
+        )
+        value_ranges = (await make_request(request))['valueRanges']
+        row_values = [value_range['values'][0] if 'values' in value_range else [] for value_range in value_ranges]
+
+        header_values = row_values[0]
+        for colname in self._col_names:
+            col = layout['col_indicies'].get(self._convert_colname(colname))
+            if col is None:
+                continue
+            if col > len(header_values) or colname.lower() not in header_values[col - 1].lower():
+                return False
+
+        last_row_filled = any(row_values[1])
+        footer_empty = len(row_values) < 3 or not any(row_values[2])
+        return last_row_filled and footer_empty
 
     async def _refresh(self, spreadsheets):
         """Find the array bounds and the column indicies"""
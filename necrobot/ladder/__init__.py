@@ -15,6 +15,7 @@ cmd_ladder
     botbase/
         commandtype
     ladder/
+        ratingreplay
         ratingsdb
     match/
         cmd_match
@@ -35,9 +36,17 @@ ladderadminchannel
     user/
         cmd_user
 rating
+ratingreplay
+    ladder/
+        rating
+        ratingsdb
+        ratingutil
+    util/
+        console
 ratingsdb
     database/
         dbconnect
+        dbutil
     ladder/
         rating
         ratingutil
@@ -1,4 +1,5 @@
 from necrobot.match import cmd_matchmake
+from necrobot.ladder import ratingreplay
 from necrobot.ladder import ratingsdb
 from necrobot.botbase.commandtype import CommandType
 from necrobot.match.matchinfo import MatchInfo
@@ -176,3 +177,34 @@ class ForceRanked(CommandType):
             racer_names=[cmd.args[0], cmd.args[1]],
             match_info=MatchInfo(ranked=True)
         )
+
+
+class RecomputeRatings(CommandType):
+    def __init__(self, bot_channel):
+        CommandType.__init__(self, bot_channel, 'recomputeratings')
+        self.help_text = 'Recompute all ladder ratings by replaying every ranked match race in order. Use ' \
+                         '`{0} preview` to see the result without saving it.'.format(self.mention)
+        self.admin_only = True
+
+    @property
+    def short_help_text(self):
+        return 'Recompute all ladder ratings.'
+
+    async def _do_execute(self, cmd):
+        preview = len(cmd.args) == 1 and cmd.args[0].lower() == 'preview'
+        if len(cmd.args) > 1 or (len(cmd.args) == 1 and not preview):
+            await cmd.channel.send(
+                'Error: Unrecognized arguments for `{}`.'.format(self.mention)
+            )
+            return
+
+        await cmd.channel.send('Recomputing ladder ratings...')
+        table, deltas = await ratingreplay.recompute_ratings(write=not preview)
+
+        biggest = sorted(deltas, key=lambda d: abs(d.winner_delta) + abs(d.loser_delta), reverse=True)[:5]
+        msg = '{0} ratings for {1} racers from {2} ranked races.'.format(
+            'Previewed' if preview else 'Recomputed', len(table), len(deltas)
+        )
+        if biggest:
+            msg += ' Largest rating swings:\n```\n{0}\n```'.format('\n'.join(str(d) for d in biggest))
+        await cmd.channel.send(msg)
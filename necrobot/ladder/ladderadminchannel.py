@@ -1,4 +1,5 @@
 from necrobot.condorbot import cmd_event
+from necrobot.botbase import cmd_admin
 from necrobot.botbase import cmd_seedgen
 from necrobot.botbase.botchannel import BotChannel
 from necrobot.ladder import cmd_ladder
@@ -11,10 +12,14 @@ class LadderAdminChannel(BotChannel):
     def __init__(self):
         BotChannel.__init__(self)
         self.channel_commands = [
+            cmd_admin.DBStats(self),
+            cmd_admin.ScheduledJobs(self),
+
             cmd_league.CloseAllMatches(self),
             cmd_league.CloseFinished(self),
             # cmd_league.GetCurrentEvent(self),
             # cmd_league.GetMatchRules(self),
+            cmd_event.RefreshCache(self),
             cmd_event.ScrubDatabase(self),
             cmd_event.SetCondorEvent(self),
             # cmd_league.SetEventName(self),
@@ -23,6 +28,7 @@ class LadderAdminChannel(BotChannel):
             # cmd_ladder.Automatch(self),
             # cmd_ladder.DropRacer(self),
             cmd_ladder.ForceRanked(self),
+            cmd_ladder.RecomputeRatings(self),
             # cmd_ladder.ForceUnranked(self),
 
             cmd_seedgen.RandomSeed(self),
@@ -0,0 +1,187 @@
+"""
+Recompute every ladder rating from scratch, by replaying the history of ranked match races in order.
+
+Ratings are kept in flat arrays indexed by a dense player number instead of as Rating objects, and each race is
+rated with the closed form of the two-player TrueSkill update (which gives the same result as trueskill.rate_1vs1,
+without building a factor graph). The final ratings are written back to the database in one bulk upsert.
+"""
+
+import unittest
+from array import array
+from math import sqrt
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import trueskill
+
+from necrobot.ladder import ratingsdb
+from necrobot.ladder import ratingutil
+from necrobot.ladder.rating import Rating
+from necrobot.util import console
+
+
+class RatingDelta(object):
+    """The change in both racers' ratings from a single race."""
+    def __init__(self, match_id: int, race_number: int, winner_id: int, loser_id: int,
+                 winner_delta: float, loser_delta: float):
+        self.match_id = match_id
+        self.race_number = race_number
+        self.winner_id = winner_id
+        self.loser_id = loser_id
+        self.winner_delta = winner_delta
+        self.loser_delta = loser_delta
+
+    def __str__(self):
+        return 'Match {0} race {1}: {2} {3:+.1f}, {4} {5:+.1f}'.format(
+            self.match_id, self.race_number, self.winner_id, self.winner_delta, self.loser_id, self.loser_delta
+        )
+
+
+class RatingTable(object):
+    """TrueSkill ratings for many players, stored as arrays of mu and sigma."""
+    def __init__(self, env: trueskill.TrueSkill = None):
+        self.env = env if env is not None else trueskill.global_env()
+        self._index = dict()            # type: Dict[int, int]
+        self._ids = list()              # type: List[int]
+        self._mu = array('d')
+        self._sigma = array('d')
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, discord_id: int):
+        return discord_id in self._index
+
+    def index_of(self, discord_id: int) -> int:
+        """Get the array index of the player, giving them the prior rating if they are new."""
+        idx = self._index.get(discord_id)
+        if idx is None:
+            idx = len(self._ids)
+            self._index[discord_id] = idx
+            self._ids.append(discord_id)
+            self._mu.append(self.env.mu)
+            self._sigma.append(self.env.sigma)
+        return idx
+
+    def get(self, discord_id: int) -> Rating:
+        idx = self.index_of(discord_id)
+        return Rating(self._mu[idx], self._sigma[idx])
+
+    def items(self) -> Iterator[Tuple[int, Rating]]:
+        for idx, discord_id in enumerate(self._ids):
+            yield discord_id, Rating(self._mu[idx], self._sigma[idx])
+
+    def rate_race(self, winner_id: int, loser_id: int) -> Tuple[float, float]:
+        """Update both players' ratings for a race between them.
+
+        Returns
+        -------
+        tuple[float, float]
+            The change in the winner's and the loser's displayed ratings.
+        """
+        wi = self.index_of(winner_id)
+        li = self.index_of(loser_id)
+        env = self.env
+        mu, sigma = self._mu, self._sigma
+        old_w = mu[wi] - 3*sigma[wi]
+        old_l = mu[li] - 3*sigma[li]
+
+        tau_sq = env.tau * env.tau
+        var_w = sigma[wi]*sigma[wi] + tau_sq
+        var_l = sigma[li]*sigma[li] + tau_sq
+        c = sqrt(2*env.beta*env.beta + var_w + var_l)
+        draw_margin = trueskill.calc_draw_margin(env.draw_probability, 2, env=env) / c
+
+        t = (mu[wi] - mu[li]) / c
+        try:
+            v = env.v_win(t, draw_margin)
+            w_factor = env.w_win(t, draw_margin)
+        except FloatingPointError:
+            console.warning('FloatingPointError in RatingTable.rate_race.')
+            return 0.0, 0.0
+
+        mu[wi] += var_w / c * v
+        mu[li] -= var_l / c * v
+        sigma[wi] = sqrt(var_w * (1 - var_w / (c*c) * w_factor))
+        sigma[li] = sqrt(var_l * (1 - var_l / (c*c) * w_factor))
+
+        return mu[wi] - 3*sigma[wi] - old_w, mu[li] - 3*sigma[li] - old_l
+
+
+def replay(history: Iterable[Tuple[int, int, int, int, int]], table: RatingTable) -> List[RatingDelta]:
+    """Rate every race in the history, in order.
+
+    Parameters
+    ----------
+    history: Iterable[tuple[int, int, int, int, int]]
+        Rows of (match_id, race_number, racer_1 ID, racer_2 ID, winner), where winner is 1 or 2.
+    table: RatingTable
+        The ratings to update.
+
+    Returns
+    -------
+    list[RatingDelta]
+        The change in ratings from each race.
+    """
+    deltas = []
+    for match_id, race_number, racer_1_id, racer_2_id, winner in history:
+        if winner == 1:
+            winner_id, loser_id = racer_1_id, racer_2_id
+        elif winner == 2:
+            winner_id, loser_id = racer_2_id, racer_1_id
+        else:
+            continue
+
+        winner_delta, loser_delta = table.rate_race(winner_id=winner_id, loser_id=loser_id)
+        deltas.append(RatingDelta(match_id, race_number, winner_id, loser_id, winner_delta, loser_delta))
+    return deltas
+
+
+async def recompute_ratings(write: bool = True) -> Tuple[RatingTable, List[RatingDelta]]:
+    """Recompute every ladder rating from the ranked match history in the database.
+
+    Parameters
+    ----------
+    write: bool
+        If True, write the recomputed ratings to the database.
+
+    Returns
+    -------
+    tuple[RatingTable, list[RatingDelta]]
+        The recomputed ratings, and the change in ratings from each race.
+    """
+    table = RatingTable()
+    deltas = []
+    async for rows in ratingsdb.get_ranked_race_history():
+        deltas.extend(replay(rows, table))
+
+    console.info('Replayed {0} ranked races for {1} racers.', len(deltas), len(table))
+    if write:
+        await ratingsdb.set_ratings(table.items())
+    return table, deltas
+
+
+class TestRatingTable(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        ratingutil.init()
+
+    def test_matches_trueskill(self):
+        history = [
+            (1, 1, 101, 102, 1),
+            (1, 2, 101, 102, 2),
+            (2, 1, 103, 101, 1),
+            (2, 2, 103, 102, 2),
+        ]
+        table = RatingTable()
+        deltas = replay(history, table)
+
+        expected = {discord_id: ratingutil.create_rating() for discord_id in [101, 102, 103]}
+        for _, _, r1, r2, winner in history:
+            expected[r1], expected[r2] = ratingutil.get_new_ratings(expected[r1], expected[r2], winner=winner)
+
+        self.assertEqual(len(deltas), 4)
+        for discord_id, rating in table.items():
+            self.assertAlmostEqual(rating.mu, expected[discord_id].mu, places=6)
+            self.assertAlmostEqual(rating.sigma, expected[discord_id].sigma, places=6)
+        self.assertGreater(deltas[0].winner_delta, 0)
+        self.assertLess(deltas[0].loser_delta, deltas[0].winner_delta)
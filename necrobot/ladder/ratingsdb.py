@@ -2,16 +2,19 @@
 Interaction with the necrobot.ratings table.
 """
 
+from typing import Iterable, Tuple
+
 from necrobot.ladder import ratingutil
 
 from necrobot.database.dbconnect import DBConnect
+from necrobot.database.dbutil import tn
 from necrobot.ladder.rating import Rating
 
 
 async def get_rating(discord_id: int) -> Rating:
     async with DBConnect(commit=False) as cursor:
         params = (discord_id,)
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT trueskill_mu, trueskill_sigma 
             FROM ratings 
@@ -28,7 +31,7 @@ async def get_rating(discord_id: int) -> Rating:
     async with DBConnect(commit=True) as cursor:
         rating = ratingutil.create_rating()
         params = (discord_id, rating.mu, rating.sigma,)
-        cursor.execute(
+        await cursor.execute_async(
             """
             INSERT INTO ratings 
             (discord_id, trueskill_mu, trueskill_sigma) 
@@ -42,7 +45,7 @@ async def get_rating(discord_id: int) -> Rating:
 async def set_rating(discord_id: int, rating: Rating):
     async with DBConnect(commit=True) as cursor:
         params = (discord_id, rating.mu, rating.sigma,)
-        cursor.execute(
+        await cursor.execute_async(
             """
             INSERT INTO ratings 
                 (discord_id, trueskill_mu, trueskill_sigma) 
@@ -52,3 +55,77 @@ async def set_rating(discord_id: int, rating: Rating):
                 trueskill_sigma=VALUES(trueskill_sigma)
             """,
             params)
+
+
+async def get_ranked_race_history(batch_size: int = 1000):
+    """Iterate over every decided race in a ranked match, oldest first. The whole result set is read into memory (the
+    cursor is buffered); it is handed out in batches of batch_size rows.
+
+    Yields
+    ------
+    list[tuple[int, int, int, int, int]]
+        Batches of (match_id, race_number, racer_1 discord ID, racer_2 discord ID, winner) rows, where winner is 1
+        or 2.
+    """
+    async with DBConnect(commit=False) as cursor:
+        await cursor.execute_async(
+            """
+            SELECT 
+                {match_races}.match_id, 
+                {match_races}.race_number, 
+                users_1.discord_id, 
+                users_2.discord_id, 
+                {match_races}.winner 
+            FROM 
+                {match_races} 
+                INNER JOIN {matches} 
+                    ON {matches}.match_id = {match_races}.match_id 
+                INNER JOIN {races} 
+                    ON {races}.race_id = {match_races}.race_id 
+                INNER JOIN users users_1 
+                    ON users_1.user_id = {matches}.racer_1_id 
+                INNER JOIN users users_2 
+                    ON users_2.user_id = {matches}.racer_2_id 
+            WHERE 
+                {matches}.ranked 
+                AND NOT {match_races}.canceled 
+                AND {match_races}.winner IN (1, 2) 
+            ORDER BY {races}.timestamp, {match_races}.match_id, {match_races}.race_number 
+            """.format(
+                match_races=tn('match_races'),
+                matches=tn('matches'),
+                races=tn('races')
+            )
+        )
+
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield rows
+
+
+async def set_ratings(ratings: Iterable[Tuple[int, Rating]]) -> None:
+    """Write many ratings at once, in a single transaction.
+
+    Parameters
+    ----------
+    ratings: Iterable[tuple[int, Rating]]
+        Pairs of (discord_id, rating).
+    """
+    params = [(discord_id, rating.mu, rating.sigma,) for discord_id, rating in ratings]
+    if not params:
+        return
+
+    async with DBConnect(commit=True) as cursor:
+        await cursor.executemany_async(
+            """
+            INSERT INTO ratings 
+                (discord_id, trueskill_mu, trueskill_sigma) 
+            VALUES (%s,%s,%s) 
+            ON DUPLICATE KEY UPDATE 
+                trueskill_mu=VALUES(trueskill_mu), 
+                trueskill_sigma=VALUES(trueskill_sigma)
+            """,
+            params
+        )
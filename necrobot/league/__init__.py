@@ -75,4 +75,24 @@ leaguemgr
     util/
         console
         singleton
+scheduleindex
+    botbase/
+        necroevent
+        necrobot
+    match/
+        match
+        matchdb
+        matchutil
+    user/
+        necrouser
+        userlib
+    util/
+        console
+        server
+        singleton
+standings
+    league/
+        leaguedb
+    match/
+        match
 """
\ No newline at end of file
@@ -2,6 +2,7 @@ import asyncio
 import datetime
 import os
 import pytz
+import time
 from typing import List, Tuple, Dict
 
 import necrobot.exception
@@ -19,6 +20,10 @@ from necrobot.util import console
 from necrobot.config import Config
 
 
+# Minimum number of seconds between progress edits to the status message in _makematches_from_pairs
+MAKEMATCHES_STATUS_INTERVAL = 5
+
+
 # Match-related main-channel commands
 class Cawmentate(CommandType):
     def __init__(self, bot_channel):
@@ -826,12 +831,10 @@ async def _makematches_from_pairs(cmd, league, desired_match_pairs):
             elif len(userlist) > 1:
                 doublename_racers.append(username)
 
-        # Create Match objects
-        matches = []
+        # Find the racers for each match
+        match_kwargs = []
         not_found_matches = []  # type: List[Tuple[str, str]]
-
-        async def make_single_match(racers):
-            console.debug('_makematches_from_pairs: Making match {0}-{1}'.format(racers[0], racers[1]))
+        for racers in desired_match_pairs:
             racer_1 = all_racers[racers[0]][0] if len(all_racers[racers[0]]) == 1 else None
             racer_2 = all_racers[racers[1]][0] if len(all_racers[racers[1]]) == 1 else None
             if racer_1 is None or racer_2 is None:
@@ -839,42 +842,53 @@ async def _makematches_from_pairs(cmd, league, desired_match_pairs):
                     racers[0], racers[1]
                 ))
                 not_found_matches.append((racers[0], racers[1]))
-                return
+                continue
 
-            new_match = await matchutil.make_match(
-                register=True,
-                racer_1_id=racer_1.user_id,
-                racer_2_id=racer_2.user_id,
-                match_info=match_info,
-                league_tag=league.tag,
-                autogenned=True
-            )
-            if new_match is None:
-                console.debug('_makematches_from_pairs: Match {0}-{1} not created.'.format(racers[0], racers[1]))
-                not_found_matches.append((racers[0], racers[1]))
-                return
-
-            matches.append(new_match)
-            console.debug('_makematches_from_pairs: Created {0}-{1}'.format(
-                new_match.racer_1.matchroom_name, new_match.racer_2.matchroom_name)
-            )
-
-        for racer_pair in desired_match_pairs:
-            await make_single_match(racer_pair)
-            await asyncio.sleep(0)
+            match_kwargs.append({
+                'racer_1_id': racer_1.user_id,
+                'racer_2_id': racer_2.user_id,
+                'match_info': match_info,
+                'league_tag': league.tag,
+                'autogenned': True,
+            })
 
+        # Create and register all the Match objects at once
+        await status_message.edit(
+            content='Creating matches... (Registering {0} matches)'.format(len(match_kwargs))
+        )
+        matches = await matchutil.make_matches(match_kwargs)
         matches = sorted(matches, key=lambda m: m.matchroom_name)
+        console.debug('_makematches_from_pairs: Matches to make: {0}'.format(matches))
+
+        # Create match channels, a few at a time
+        num_rooms_made = 0
+        roomless_matches = []   # type: List[str]
+        last_status_time = time.monotonic()
+        semaphore = asyncio.Semaphore(Config.MATCH_CREATION_CONCURRENCY)
+
+        async def make_single_room(match):
+            nonlocal num_rooms_made, last_status_time
+            async with semaphore:
+                console.info('MakeMatchesFromFile: Creating {0}...'.format(match.matchroom_name))
+                new_room = await matchchannelutil.make_match_room(match=match, register=False)
+                if new_room is None:
+                    roomless_matches.append(match.matchroom_name)
+                    return
+                await new_room.send_channel_start_text()
+
+                num_rooms_made += 1
+                if time.monotonic() - last_status_time >= MAKEMATCHES_STATUS_INTERVAL:
+                    last_status_time = time.monotonic()
+                    await status_message.edit(
+                        content='Creating matches... (Created {0} of {1} race rooms)'.format(
+                            num_rooms_made, len(matches)
+                        )
+                    )
 
         await status_message.edit(
             content='Creating matches... (Creating race rooms)'
         )
-        console.debug('_makematches_from_pairs: Matches to make: {0}'.format(matches))
-
-        # Create match channels
-        for match in matches:
-            console.info('MakeMatchesFromFile: Creating {0}...'.format(match.matchroom_name))
-            new_room = await matchchannelutil.make_match_room(match=match, register=False)
-            await new_room.send_channel_start_text()
+        await asyncio.gather(*[make_single_room(match) for match in matches])
 
         # Report on uncreated matches
         if not_found_matches:
@@ -897,6 +911,10 @@ async def _makematches_from_pairs(cmd, league, desired_match_pairs):
     if doubled_racers_str:
         report_str += \
             f'\n\nThe following names were associated to more than one Discord account: {doubled_racers_str}.'
+    if roomless_matches:
+        roomless_str = ', '.join(f'`{n}`' for n in roomless_matches)
+        report_str += \
+            f'\n\nThe following matches were made, but their race rooms could not be created: {roomless_str}.'
 
     await status_message.edit(
         content=f'Creating matches... done.\n\n{report_str}'
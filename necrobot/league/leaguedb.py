@@ -9,6 +9,8 @@ get_league(schema_name: str) -> League
     Get a registered league.
 get_entrant_ids() -> list[int]
     Get the NecroUser IDs of all entrants.
+get_standings_data(league_tag: str) -> list[tuple]
+    Get the racers and results of every completed match in the league, by user ID.
 register_user(user_id: int) -> None
     Register a user in the `entrants` table.
 write_league(League) -> None
@@ -40,7 +42,7 @@ async def get_entrant_ids() -> list:
     list[int]
     """
     async with DBConnect(commit=False) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT `user_id`
             FROM {entrants}
@@ -66,7 +68,7 @@ async def get_league(league_tag: str) -> League:
     """
     params = (league_tag,)
     async with DBConnect(commit=False) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT 
                {leagues}.`league_tag`, 
@@ -119,7 +121,7 @@ async def get_league(league_tag: str) -> League:
 
 async def get_all_leagues() -> List[League]:
     async with DBConnect(commit=False) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT 
                {leagues}.`league_tag`, 
@@ -177,7 +179,7 @@ async def register_user(user_id: int) -> None:
     """
     async with DBConnect(commit=True) as cursor:
         params = (user_id,)
-        cursor.execute(
+        await cursor.execute_async(
             """
             INSERT INTO {entrants}
                 (user_id)
@@ -211,7 +213,7 @@ async def write_league(league: League) -> None:
             race_type_id,
         )
 
-        cursor.execute(
+        await cursor.execute_async(
             """
             INSERT INTO {leagues}
             (
@@ -238,7 +240,7 @@ async def write_league(league: League) -> None:
 async def get_matchstats_raw(league_tag: str, user_id: int) -> list:
     params = (user_id, league_tag,)
     async with DBConnect(commit=False) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT
                 COUNT(*) AS wins,
@@ -253,7 +255,7 @@ async def get_matchstats_raw(league_tag: str, user_id: int) -> list:
         winner_data = cursor.fetchone()
         if winner_data is None:
             winner_data = [0, None, None]
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT COUNT(*) AS losses
             FROM {race_summary}
@@ -271,7 +273,7 @@ async def get_matchstats_raw(league_tag: str, user_id: int) -> list:
 async def get_fastest_wins_raw(league_tag: str, limit: int = None) -> list:
     params = (league_tag, limit,)
     async with DBConnect(commit=False) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT
                 {race_runs}.`time` AS `time`,
@@ -371,7 +373,7 @@ async def get_match_id(
         )
 
     async with DBConnect(commit=False) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT 
                 {matches}.match_id, 
@@ -391,21 +393,28 @@ async def get_match_id(
         return int(row[0]) if row is not None else None
 
 
-async def get_standings_data_raw(league_tag: str):
+async def get_standings_data(league_tag: str):
+    """Get every completed match in the league, as rows
+    (match_id, racer_1_id, racer_1_name, racer_2_id, racer_2_name, racer_1_wins, racer_2_wins).
+    """
     param_dict = {
         'league_tag': league_tag
     }
     async with DBConnect(commit=False) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT 
+                {match_info}.match_id,
+                {matches}.racer_1_id,
                 {match_info}.racer_1_name,
+                {matches}.racer_2_id,
                 {match_info}.racer_2_name,
                 {match_info}.racer_1_wins,
                 {match_info}.racer_2_wins
             FROM {match_info}
+            JOIN {matches} ON {matches}.match_id = {match_info}.match_id
             WHERE {match_info}.league_tag = %(league_tag)s AND {match_info}.completed
-            """.format(match_info=tn('match_info')),
+            """.format(match_info=tn('match_info'), matches=tn('matches')),
             param_dict
         )
 
@@ -7,17 +7,15 @@ import pytz
 
 import necrobot.exception
 from necrobot.config import Config
-from necrobot.botbase.necrobot import Necrobot
-from necrobot.match import matchdb
-from necrobot.match.matchutil import make_match_from_raw_db_data
 from necrobot.league.leaguemgr import LeagueMgr
 from necrobot.league import leaguedb
+from necrobot.league.scheduleindex import ScheduleIndex
 from necrobot.match import matchutil
 from necrobot.match.match import Match
 from necrobot.user import userlib
 from necrobot.util.necrodancer import emotes
 from necrobot.util.parse import dateparse
-from necrobot.util import server, console, timestr, rtmputil, strutil
+from necrobot.util import timestr, rtmputil, strutil
 
 
 async def find_match(
@@ -117,26 +115,7 @@ async def get_upcoming_and_current(league_tag: Optional[str] = None) -> list:
     list[Match]
         A list of all upcoming and ongoing matches, in order.
     """
-    matches = []
-    for row in await matchdb.get_channeled_matches_raw_data(must_be_scheduled=True, order_by_time=True):
-        channel_id = int(row[13]) if row[13] is not None else None
-        if channel_id is not None:
-            channel = server.find_channel(channel_id=channel_id)
-            if channel is not None:
-                match = await make_match_from_raw_db_data(row=row)
-                if league_tag is not None and match.league_tag != league_tag:
-                    continue
-                if match.suggested_time is None:
-                    console.warning('Found match object {} has no suggested time.'.format(repr(match)))
-                    continue
-                if match.suggested_time > pytz.utc.localize(datetime.datetime.utcnow()):
-                    matches.append(match)
-                else:
-                    match_room = Necrobot().get_bot_channel(channel)
-                    if match_room is not None and await match_room.during_races():
-                        matches.append(match)
-
-    return matches
+    return await ScheduleIndex().get_upcoming_and_current(league_tag=league_tag)
 
 
 async def get_nextrace_displaytext(match_list: list) -> str:
@@ -165,7 +144,7 @@ async def get_nextrace_displaytext(match_list: list) -> str:
             continue
 
         display_text += f': {timestr.discord_timestamp_for_match(match.suggested_time)} \n'
-        match_cawmentator = await match.get_cawmentator()
+        match_cawmentator = await ScheduleIndex().get_cawmentator(match)
         if match_cawmentator is not None:
             display_text += '    Cawmentary: <http://www.twitch.tv/{0}> \n'.format(match_cawmentator.twitch_name)
         elif match.racer_1.twitch_name is not None and match.racer_2.twitch_name is not None:
@@ -0,0 +1,160 @@
+"""
+An in-memory, time-ordered index of scheduled matches.
+
+The index is read from the database the first time it is used, and after that is kept up to date by match events
+(`create_match`, `schedule_match`, `unschedule_match`, `set_cawmentary`, `end_match` and `delete_match`), so that
+listing upcoming matches doesn't touch the database. Each match's cawmentator is looked up when the match is indexed.
+"""
+
+import asyncio
+import bisect
+import datetime
+from typing import Dict, List, Optional, Tuple
+
+import pytz
+
+from necrobot.botbase.necroevent import NEDispatch, NecroEvent
+from necrobot.botbase.necrobot import Necrobot
+from necrobot.match import matchdb
+from necrobot.match import matchutil
+from necrobot.match.match import Match
+from necrobot.user import userlib
+from necrobot.user.necrouser import NecroUser
+from necrobot.util import console, server
+from necrobot.util.singleton import Singleton
+
+
+class _Entry(object):
+    def __init__(self, match: Match, cawmentator: Optional[NecroUser]):
+        self.match = match
+        self.cawmentator = cawmentator
+        self.sortkey = _sortkey(match)
+
+
+class ScheduleIndex(object, metaclass=Singleton):
+    def __init__(self):
+        self._entries = dict()      # type: Dict[int, _Entry]
+        self._timeline = list()     # type: List[Tuple[datetime.datetime, int]]
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        NEDispatch().subscribe(
+            self,
+            event_types=[
+                'create_match',
+                'delete_match',
+                'end_match',
+                'schedule_match',
+                'set_cawmentary',
+                'unschedule_match',
+            ]
+        )
+
+    async def ne_process(self, ev: NecroEvent):
+        if not self._loaded:
+            return
+
+        if ev.event_type in ['create_match', 'schedule_match', 'set_cawmentary']:
+            await self.update(ev.match)
+        elif ev.event_type in ['delete_match', 'end_match', 'unschedule_match']:
+            self.remove(ev.match.match_id)
+
+    async def get_upcoming_and_current(self, league_tag: Optional[str] = None) -> List[Match]:
+        """
+        Parameters
+        ----------
+        league_tag: Optional[str]
+            If not None, only look for matches in the given league.
+
+        Returns
+        -------
+        list[Match]
+            A list of all upcoming and ongoing matches with a channel on the server, in order.
+        """
+        await self._load()
+        self._rekey_retimed()
+
+        utcnow = pytz.utc.localize(datetime.datetime.utcnow())
+        matches = []
+        for _, match_id in self._timeline:
+            match = self._entries[match_id].match
+            if not match.is_scheduled or match.channel_id is None:
+                continue
+            if league_tag is not None and match.league_tag != league_tag:
+                continue
+            channel = server.find_channel(channel_id=match.channel_id)
+            if channel is None:
+                continue
+
+            if match.suggested_time > utcnow:
+                matches.append(match)
+            else:
+                match_room = Necrobot().get_bot_channel(channel)
+                if match_room is not None and await match_room.during_races():
+                    matches.append(match)
+
+        return matches
+
+    async def get_cawmentator(self, match: Match) -> Optional[NecroUser]:
+        """The match's cawmentator, from the index if the match is indexed."""
+        entry = self._entries.get(match.match_id)
+        if entry is not None and entry.match is match:
+            return entry.cawmentator
+        return await match.get_cawmentator()
+
+    async def update(self, match: Match) -> None:
+        """Add the match to the index, or update it, or remove it if it is no longer scheduled."""
+        if not match.is_registered:
+            return
+        if not match.is_scheduled or match.finish_time is not None:
+            self.remove(match.match_id)
+            return
+
+        entry = _Entry(match=match, cawmentator=await match.get_cawmentator())
+        self.remove(match.match_id)
+        self._entries[match.match_id] = entry
+        bisect.insort(self._timeline, entry.sortkey)
+
+    def remove(self, match_id: int) -> None:
+        entry = self._entries.pop(match_id, None)
+        if entry is not None:
+            idx = bisect.bisect_left(self._timeline, entry.sortkey)
+            if idx < len(self._timeline) and self._timeline[idx] == entry.sortkey:
+                del self._timeline[idx]
+
+    def _rekey_retimed(self) -> None:
+        """Move any match whose suggested time has changed since it was indexed to its new place in the timeline."""
+        for entry in self._entries.values():
+            if not entry.match.is_scheduled or _sortkey(entry.match) == entry.sortkey:
+                continue
+            idx = bisect.bisect_left(self._timeline, entry.sortkey)
+            if idx < len(self._timeline) and self._timeline[idx] == entry.sortkey:
+                del self._timeline[idx]
+            entry.sortkey = _sortkey(entry.match)
+            bisect.insort(self._timeline, entry.sortkey)
+
+    def invalidate(self) -> None:
+        """Forget the index, so that it is read from the database again when next used."""
+        self._entries.clear()
+        self._timeline.clear()
+        self._loaded = False
+
+    async def _load(self) -> None:
+        async with self._load_lock:
+            if self._loaded:
+                return
+
+            rows = await matchdb.get_channeled_matches_raw_data(must_be_scheduled=True, order_by_time=True)
+            await userlib.prefetch_users(
+                int(user_id) for row in rows for user_id in [row[2], row[3], row[12]] if user_id is not None
+            )
+            for row in rows:
+                match = await matchutil.make_match_from_raw_db_data(row=row)
+                if match.suggested_time is None:
+                    console.warning('Found match object {} has no suggested time.'.format(repr(match)))
+                    continue
+                await self.update(match)
+            self._loaded = True
+
+
+def _sortkey(match: Match) -> Tuple[datetime.datetime, int]:
+    return match.suggested_time, match.match_id
@@ -0,0 +1,259 @@
+"""
+In-memory head-to-head standings for leagues.
+
+A StandingsMatrix holds, for one league, the number of races each racer has won against each other racer. Racers are
+keyed by user ID and given a dense index, so looking up or updating a cell is constant time. Each completed match's
+result is remembered, so recording the same match twice (or a corrected result) replaces its earlier contribution
+instead of adding to it.
+
+The matrix is loaded once per league from the database, then kept up to date by recording each match as it ends; when
+a match's results are corrected afterwards (e.g. by .changewinner or .cancelrace), it is reloaded. It remembers which
+cells have changed since they were last written to the standings sheet, so the sheet only rewrites those cells; when a
+new racer appears (or a racer's name changes), the racers' order changes, and the whole sheet is rewritten instead.
+"""
+
+import asyncio
+import unittest
+from typing import Dict, List, Optional, Set, Tuple
+
+from necrobot.league import leaguedb
+from necrobot.match.match import Match
+
+# Map from league tag to the loaded standings for that league
+_matrices = dict()      # type: Dict[str, StandingsMatrix]
+_load_lock = asyncio.Lock()
+
+
+class StandingsMatrix(object):
+    def __init__(self, league_tag: str):
+        self.league_tag = league_tag
+        self._index = dict()            # type: Dict[int, int]
+        self._user_ids = list()         # type: List[int]
+        self._names = list()            # type: List[str]
+        self._wins = list()             # type: List[List[int]]
+        self._num_matches = list()      # type: List[List[int]]
+        self._results = dict()          # type: Dict[int, Tuple[int, int, int, int]]
+
+        # Sheet order: _order[k] is the index of the racer in the kth row/column, and _position is its inverse
+        self._order = list()            # type: List[int]
+        self._position = list()         # type: List[int]
+
+        self._layout_changed = True
+        self._changed = set()           # type: Set[Tuple[int, int]]
+
+    @property
+    def num_racers(self) -> int:
+        return len(self._user_ids)
+
+    @property
+    def racers(self) -> List[str]:
+        """The racers' names, in the order they appear on the sheet."""
+        return [self._names[idx] for idx in self._order]
+
+    def record_match(
+            self,
+            match_id: int,
+            r1_id: int,
+            r1_name: str,
+            r2_id: int,
+            r2_name: str,
+            r1_wins: int,
+            r2_wins: int
+    ) -> None:
+        """Record the result of a completed match, replacing any result already recorded for it.
+
+        Parameters
+        ----------
+        match_id: int
+            The match's ID.
+        r1_id: int
+            The user ID of racer 1.
+        r1_name: str
+            The name of racer 1, as it should appear on the sheet.
+        r2_id: int
+            The user ID of racer 2.
+        r2_name: str
+            The name of racer 2, as it should appear on the sheet.
+        r1_wins: int
+            The number of races racer 1 won.
+        r2_wins: int
+            The number of races racer 2 won.
+        """
+        i = self._get_index(r1_id, r1_name)
+        j = self._get_index(r2_id, r2_name)
+        old_result = self._results.get(match_id)
+        if old_result == (i, j, r1_wins, r2_wins,):
+            return
+
+        if old_result is not None:
+            self._add_result(*old_result, sign=-1)
+        self._results[match_id] = (i, j, r1_wins, r2_wins,)
+        self._add_result(i, j, r1_wins, r2_wins, sign=1)
+
+    def cell(self, row: int, col: int) -> str:
+        """The text of the cell in the given row and column of the sheet, where row 0 and column 0 are headers."""
+        if row == 0 and col == 0:
+            return ''
+        elif row == 0:
+            return self._names[self._order[col - 1]]
+        elif col == 0:
+            return self._names[self._order[row - 1]]
+
+        i = self._order[row - 1]
+        j = self._order[col - 1]
+        if not self._num_matches[i][j]:
+            return ''
+        return '{wins}-{losses}'.format(wins=self._wins[i][j], losses=self._wins[j][i])
+
+    def values(self) -> List[List[str]]:
+        """The whole sheet, including the header row and column."""
+        size = self.num_racers + 1
+        return [[self.cell(row, col) for col in range(size)] for row in range(size)]
+
+    def take_changes(self) -> Tuple[bool, List[Tuple[int, int, str]]]:
+        """Get the changes since this was last called, and mark them as written.
+
+        Returns
+        -------
+        tuple[bool, list[tuple[int, int, str]]]
+            If the first element is True, the racers' order has changed, and the whole sheet should be rewritten.
+            Otherwise, the second element is a list of the changed cells, as (row, col, text), where row 0 and
+            column 0 are headers.
+        """
+        layout_changed = self._layout_changed
+        changed = self._changed
+        self._layout_changed = False
+        self._changed = set()
+
+        if layout_changed:
+            return True, []
+
+        cells = list()
+        for i, j in sorted(changed):
+            row = self._position[i] + 1
+            col = self._position[j] + 1
+            cells.append((row, col, self.cell(row, col),))
+        return False, cells
+
+    def mark_stale(self) -> None:
+        """Mark the whole sheet as needing to be rewritten (for instance, after a failed write)."""
+        self._layout_changed = True
+
+    def _get_index(self, user_id: int, name: str) -> int:
+        name = name.lower()
+        idx = self._index.get(user_id)
+        if idx is not None:
+            if self._names[idx] != name:
+                self._names[idx] = name
+                self._reorder()
+            return idx
+
+        idx = len(self._user_ids)
+        self._index[user_id] = idx
+        self._user_ids.append(user_id)
+        self._names.append(name)
+        for row in self._wins:
+            row.append(0)
+        for row in self._num_matches:
+            row.append(0)
+        self._wins.append([0] * (idx + 1))
+        self._num_matches.append([0] * (idx + 1))
+        self._reorder()
+        return idx
+
+    def _add_result(self, i: int, j: int, r1_wins: int, r2_wins: int, sign: int) -> None:
+        self._wins[i][j] += sign*r1_wins
+        self._wins[j][i] += sign*r2_wins
+        self._num_matches[i][j] += sign
+        self._num_matches[j][i] += sign
+        self._changed.add((i, j,))
+        self._changed.add((j, i,))
+
+    def _reorder(self) -> None:
+        self._order = sorted(range(len(self._user_ids)), key=lambda idx: (self._names[idx], self._user_ids[idx]))
+        self._position = [0] * len(self._order)
+        for pos, idx in enumerate(self._order):
+            self._position[idx] = pos
+        self._layout_changed = True
+
+
+def get_loaded(league_tag: str) -> Optional[StandingsMatrix]:
+    """Get the standings for the given league, if they have been loaded."""
+    return _matrices.get(league_tag)
+
+
+async def get_standings(league_tag: str, reload: bool = False) -> StandingsMatrix:
+    """Get the standings for the given league, loading them from the database if necessary.
+
+    Parameters
+    ----------
+    league_tag: str
+        The league's tag.
+    reload: bool
+        If True, read the standings from the database even if they are already loaded.
+    """
+    async with _load_lock:
+        matrix = _matrices.get(league_tag)
+        if matrix is not None and not reload:
+            return matrix
+
+        matrix = StandingsMatrix(league_tag)
+        for match_id, r1_id, r1_name, r2_id, r2_name, r1_wins, r2_wins \
+                in await leaguedb.get_standings_data(league_tag=league_tag):
+            if r1_name is not None and r2_name is not None:
+                matrix.record_match(
+                    match_id=int(match_id),
+                    r1_id=int(r1_id),
+                    r1_name=r1_name,
+                    r2_id=int(r2_id),
+                    r2_name=r2_name,
+                    r1_wins=int(r1_wins),
+                    r2_wins=int(r2_wins)
+                )
+        _matrices[league_tag] = matrix
+        return matrix
+
+
+async def record_match(match: Match, r1_wins: int, r2_wins: int) -> StandingsMatrix:
+    """Record a newly completed match in its league's standings, and return the standings."""
+    matrix = await get_standings(match.league_tag)
+    if match.racer_1.twitch_name is not None and match.racer_2.twitch_name is not None:
+        matrix.record_match(
+            match_id=match.match_id,
+            r1_id=match.racer_1.user_id,
+            r1_name=match.racer_1.twitch_name,
+            r2_id=match.racer_2.user_id,
+            r2_name=match.racer_2.twitch_name,
+            r1_wins=r1_wins,
+            r2_wins=r2_wins
+        )
+    return matrix
+
+
+class TestStandingsMatrix(unittest.TestCase):
+    def test_values(self):
+        matrix = StandingsMatrix('test')
+        matrix.record_match(1, r1_id=10, r1_name='Bob', r2_id=20, r2_name='alice', r1_wins=2, r2_wins=1)
+        matrix.record_match(2, r1_id=20, r1_name='alice', r2_id=30, r2_name='carol', r1_wins=0, r2_wins=2)
+        matrix.record_match(3, r1_id=20, r1_name='alice', r2_id=10, r2_name='Bob', r1_wins=2, r2_wins=0)
+        self.assertEqual(matrix.values(), [
+            ['', 'alice', 'bob', 'carol'],
+            ['alice', '', '3-2', '0-2'],
+            ['bob', '2-3', '', ''],
+            ['carol', '2-0', '', ''],
+        ])
+
+    def test_changes(self):
+        matrix = StandingsMatrix('test')
+        matrix.record_match(1, r1_id=10, r1_name='b', r2_id=20, r2_name='a', r1_wins=2, r2_wins=1)
+        self.assertEqual(matrix.take_changes(), (True, []))
+
+        # Re-recording a match replaces its result; only the affected cells change
+        matrix.record_match(1, r1_id=10, r1_name='b', r2_id=20, r2_name='a', r1_wins=2, r2_wins=0)
+        self.assertEqual(matrix.take_changes(), (False, [(2, 1, '2-0'), (1, 2, '0-2')]))
+        matrix.record_match(1, r1_id=10, r1_name='b', r2_id=20, r2_name='a', r1_wins=2, r2_wins=0)
+        self.assertEqual(matrix.take_changes(), (False, []))
+
+        # A new racer changes the order
+        matrix.record_match(2, r1_id=30, r1_name='c', r2_id=20, r2_name='a', r1_wins=0, r2_wins=2)
+        self.assertEqual(matrix.take_changes(), (True, []))
@@ -78,6 +78,7 @@ matchchannelutil
         console
         writechannel
 matchdb
+    exception
     database/
         dbconnect
         dbutil
@@ -94,6 +95,7 @@ matchinfo
         parse/
             matchparse
 matchmgr
+    config
     botbase/
         necroevent
         manager
@@ -102,6 +104,10 @@ matchmgr
         matchdb
         matchutil
         matchroom
+    race/
+        racedb
+    user/
+        userlib
     util/
         console
         server
@@ -129,6 +135,7 @@ matchroom
         server
         timestr
 matchutil
+    config
     botbase/
         necrobot
     match/
@@ -143,6 +150,7 @@ matchutil
         necrouser
     util/
         console
+        identitymap
         timestr
         writechanel
         strutil
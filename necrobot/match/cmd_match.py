@@ -372,6 +372,7 @@ class ChangeWinner(CommandType):
 
         success = await matchdb.change_winner(match=match, race_number=race_number, winner=winner)
         if success:
+            await NEDispatch().publish('change_match_results', match=match)
             await cmd.channel.send(
                 'Changed the winner of race {0} to `{1}`.'.format(race_number, winner_name)
             )
@@ -391,6 +392,7 @@ class ForceBegin(CommandType):
         match = self.bot_channel.match
         match.suggest_time(pytz.utc.localize(datetime.datetime.utcnow()))
         match.force_confirm()
+        await NEDispatch().publish('schedule_match', match=match)
         await self.bot_channel.update()
 
 
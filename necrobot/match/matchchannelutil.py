@@ -1,3 +1,4 @@
+import asyncio
 import discord
 from typing import List, Optional
 
@@ -7,11 +8,15 @@ from necrobot.match.match import Match
 from necrobot.match.matchglobals import MatchGlobals
 from necrobot.match.matchroom import MatchRoom
 from necrobot.match import matchutil
+from necrobot.race import racejournal
 from necrobot.user.necrouser import NecroUser
 from necrobot.util import server, console, writechannel
 from necrobot.config import Config
 
 
+_channel_creation_lock = asyncio.Lock()
+
+
 def get_matchroom_name(match: Match) -> str:
     """Get a new unique channel name corresponding to the match.
     
@@ -87,28 +92,34 @@ async def delete_all_match_channels(
     completed_only: bool
         If True, will only find completed matches.
     """
+    to_delete = []
     for row in await matchdb.get_channeled_matches_raw_data():
         match_id = int(row[0])
         channel_id = int(row[13])
         channel = server.find_channel(channel_id=channel_id)
-        delete_this = True
         if channel is not None:
             match_room = Necrobot().get_bot_channel(channel)
             completed = match_room is not None and match_room.played_all_races
-
             if completed_only and not completed:
-                delete_this = False
-
-            if delete_this:
-                if log:
-                    await writechannel.write_channel(
-                        channel=channel,
-                        outfile_name='{0}-{1}'.format(match_id, channel.name)
-                    )
-                await channel.delete()
+                continue
+        to_delete.append((match_id, channel,))
+
+    # Log all the channels first, several at a time, and keep any channel whose log couldn't be written
+    if log:
+        to_log = [(match_id, channel,) for match_id, channel in to_delete if channel is not None]
+        logged = await writechannel.write_channels(
+            (channel, '{0}-{1}'.format(match_id, channel.name),) for match_id, channel in to_log
+        )
+        not_logged = set(match_id for (match_id, _), success in zip(to_log, logged) if not success)
+        if not_logged:
+            console.warning('Not deleting match channels that could not be logged: {0}', sorted(not_logged))
+            to_delete = [(match_id, channel,) for match_id, channel in to_delete if match_id not in not_logged]
 
-        if delete_this:
-            await matchdb.register_match_channel(match_id, None)
+    for match_id, channel in to_delete:
+        if channel is not None:
+            racejournal.discard(channel.id)
+            await channel.delete()
+        await matchdb.register_match_channel(match_id, None)
 
 
 async def make_match_room(match: Match, register=False) -> MatchRoom or None:
@@ -138,57 +149,11 @@ async def make_match_room(match: Match, register=False) -> MatchRoom or None:
     channel_id = match.channel_id
     match_channel = server.find_channel(channel_id=channel_id) if channel_id is not None else None
 
-    # If we couldn't find the channel or it didn't exist, make a new one
+    # If we couldn't find the channel or it didn't exist, make a new one. Channels are made one at a time, so that
+    # concurrent calls pick distinct names and don't each make a new category when one fills up.
     if match_channel is None:
-        # Create permissions
-        deny_read = discord.PermissionOverwrite(read_messages=False)
-        permit_read = discord.PermissionOverwrite(read_messages=True)
-        racer_permissions = {server.guild.default_role: deny_read}
-        for racer in match.racers:
-            if racer.member is not None:
-                racer_permissions[racer.member] = permit_read
-        for ref_role in server.referee_roles:
-            racer_permissions[ref_role] = permit_read
-
-        # Find the matches category channel
-        channel_categories = MatchGlobals().channel_categories      # type: List[discord.CategoryChannel]
-        if channel_categories is None:
-            category_name = Config.MATCH_CHANNEL_CATEGORY_NAME
-            if len(category_name) > 0:
-                channel_category = await server.create_channel_category(category_name)
-                MatchGlobals().set_channel_categories([channel_category])
-
-        # Attempt to create the channel in each of the categories in reverse order
-        if channel_categories is not None:
-            success = False
-            for channel_category in reversed(channel_categories):
-                try:
-                    match_channel = await server.guild.create_text_channel(
-                        name=get_matchroom_name(match),
-                        overwrites=racer_permissions,
-                        category=channel_category
-                    )
-                    success = True
-                    break
-                except discord.HTTPException:
-                    pass
-
-            # If we still haven't made the channel, we're out of space, so register a new matches category
-            if not success:
-                new_channel_category = await server.create_channel_category(name=Config.MATCH_CHANNEL_CATEGORY_NAME)
-                MatchGlobals().add_channel_category(channel=new_channel_category)
-                match_channel = await server.guild.create_text_channel(
-                    name=get_matchroom_name(match),
-                    overwrites=racer_permissions,
-                    category=new_channel_category
-                )
-
-        # If we don't have or want a category channel, just make the match without a category
-        else:
-            match_channel = await server.guild.create_text_channel(
-                name=get_matchroom_name(match),
-                overwrites=racer_permissions
-            )
+        async with _channel_creation_lock:
+            match_channel = await _create_match_channel(match)
 
         if match_channel is None:
             console.warning('Failed to make a match channel.')
@@ -203,6 +168,61 @@ async def make_match_room(match: Match, register=False) -> MatchRoom or None:
     return new_room
 
 
+async def _create_match_channel(match: Match) -> Optional[discord.TextChannel]:
+    """Create a new discord.TextChannel for the match, in a match category if possible."""
+    # Create permissions
+    deny_read = discord.PermissionOverwrite(read_messages=False)
+    permit_read = discord.PermissionOverwrite(read_messages=True)
+    racer_permissions = {server.guild.default_role: deny_read}
+    for racer in match.racers:
+        if racer.member is not None:
+            racer_permissions[racer.member] = permit_read
+    for ref_role in server.referee_roles:
+        racer_permissions[ref_role] = permit_read
+
+    # Find the matches category channel
+    channel_categories = MatchGlobals().channel_categories      # type: List[discord.CategoryChannel]
+    if channel_categories is None:
+        category_name = Config.MATCH_CHANNEL_CATEGORY_NAME
+        if len(category_name) > 0:
+            channel_category = await server.create_channel_category(category_name)
+            MatchGlobals().set_channel_categories([channel_category])
+
+    # Attempt to create the channel in each of the categories in reverse order
+    if channel_categories is not None:
+        success = False
+        for channel_category in reversed(channel_categories):
+            try:
+                match_channel = await server.guild.create_text_channel(
+                    name=get_matchroom_name(match),
+                    overwrites=racer_permissions,
+                    category=channel_category
+                )
+                success = True
+                break
+            except discord.HTTPException:
+                pass
+
+        # If we still haven't made the channel, we're out of space, so register a new matches category
+        if not success:
+            new_channel_category = await server.create_channel_category(name=Config.MATCH_CHANNEL_CATEGORY_NAME)
+            MatchGlobals().add_channel_category(channel=new_channel_category)
+            match_channel = await server.guild.create_text_channel(
+                name=get_matchroom_name(match),
+                overwrites=racer_permissions,
+                category=new_channel_category
+            )
+
+    # If we don't have or want a category channel, just make the match without a category
+    else:
+        match_channel = await server.guild.create_text_channel(
+            name=get_matchroom_name(match),
+            overwrites=racer_permissions
+        )
+
+    return match_channel
+
+
 async def close_match_room(match: Match) -> None:
     """Close the discord.Channel corresponding to the Match, if any.
     
@@ -222,7 +242,8 @@ async def close_match_room(match: Match) -> None:
                         '(match_id={1}).'.format(channel_id, match.match_id))
         return
 
-    await Necrobot().unregister_bot_channel(channel)
+    racejournal.discard(channel.id)
+    Necrobot().unregister_bot_channel(channel)
     await channel.delete()
     match.set_channel_id(None)
 
@@ -1,6 +1,12 @@
 """
 Interaction with matches and match_races tables (in the necrobot schema, or a condor event schema).
 """
+import asyncio
+import itertools
+import unittest
+from typing import Iterable, List
+
+import necrobot.exception
 from necrobot.database.dbconnect import DBConnect
 from necrobot.database.dbutil import tn
 from necrobot.match.match import Match
@@ -29,7 +35,7 @@ async def record_match_race(
             contested
         )
 
-        cursor.execute(
+        await cursor.execute_async(
             """
             INSERT INTO {match_races} 
             (match_id, race_number, race_id, winner, canceled, contested) 
@@ -48,7 +54,7 @@ async def get_matches_between(user_1_id, user_2_id):
     params = (user_1_id, user_2_id, user_1_id, user_2_id,)
 
     async with DBConnect(commit=False) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT
                 match_id
@@ -67,7 +73,7 @@ async def add_vod(match: Match, vodlink: str):
     params = (vodlink, match.match_id,)
 
     async with DBConnect(commit=True) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             UPDATE {matches}
             SET `vod`=%s
@@ -89,7 +95,7 @@ async def set_match_race_contested(
             race_number,
         )
 
-        cursor.execute(
+        await cursor.execute_async(
             """
             UPDATE {match_races}
             SET `contested`=%s
@@ -111,7 +117,7 @@ async def change_winner(match: Match, race_number: int, winner: int) -> bool:
             race_to_change,
         )
 
-        cursor.execute(
+        await cursor.execute_async(
             """
             UPDATE {match_races}
             SET `winner` = %s
@@ -133,7 +139,7 @@ async def cancel_race(match: Match, race_number: int) -> bool:
             race_to_cancel,
         )
 
-        cursor.execute(
+        await cursor.execute_async(
             """
             UPDATE {match_races}
             SET `canceled` = TRUE
@@ -147,7 +153,7 @@ async def cancel_race(match: Match, race_number: int) -> bool:
 async def cancel_match(match: Match) -> bool:
     params = (match.match_id,)
     async with DBConnect(commit=True) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             DELETE
             FROM {match_races}
@@ -155,7 +161,7 @@ async def cancel_match(match: Match) -> bool:
             """.format(match_races=tn('match_races')),
             params
         )
-        cursor.execute(
+        await cursor.execute_async(
             """
             DELETE
             FROM {matches}
@@ -195,7 +201,7 @@ async def write_match(match: Match):
     )
 
     async with DBConnect(commit=True) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             UPDATE {matches}
             SET
@@ -226,7 +232,7 @@ async def write_match(match: Match):
 async def register_match_channel(match_id: int, channel_id: int or None) -> None:
     params = (channel_id, match_id,)
     async with DBConnect(commit=True) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             UPDATE {matches}
             SET channel_id=%s
@@ -239,7 +245,7 @@ async def register_match_channel(match_id: int, channel_id: int or None) -> None
 async def get_match_channel_id(match_id: int) -> int:
     params = (match_id,)
     async with DBConnect(commit=False) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT channel_id 
             FROM {matches} 
@@ -271,7 +277,7 @@ async def get_channeled_matches_raw_data(
         order_query = "ORDER BY `suggested_time` ASC"
 
     async with DBConnect(commit=False) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT 
                  match_id, 
@@ -301,7 +307,7 @@ async def get_channeled_matches_raw_data(
 
 async def get_matchview_raw_data():
     async with DBConnect(commit=False) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT 
                 match_id,
@@ -385,14 +391,14 @@ async def get_matchview_raw_data():
 async def delete_match(match_id: int):
     params = (match_id,)
     async with DBConnect(commit=True) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             DELETE FROM {match_races} 
             WHERE `match_id`=%s
             """.format(match_races=tn('match_races')),
             params
         )
-        cursor.execute(
+        await cursor.execute_async(
             """
             DELETE FROM {matches} 
             WHERE `match_id`=%s
@@ -404,7 +410,7 @@ async def delete_match(match_id: int):
 async def get_match_race_data(match_id: int) -> MatchRaceData:
     params = (match_id,)
     async with DBConnect(commit=False) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT canceled, winner 
             FROM {match_races} 
@@ -579,7 +585,7 @@ async def get_raw_match_data(match_id: int) -> list:
     params = (match_id,)
 
     async with DBConnect(commit=False) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT 
                  match_id, 
@@ -610,6 +616,42 @@ async def get_raw_match_data(match_id: int) -> list:
         return cursor.fetchone()
 
 
+async def get_raw_match_data_for_ids(match_ids: Iterable[int]) -> list:
+    match_ids = tuple(int(match_id) for match_id in match_ids)
+    if not match_ids:
+        return []
+
+    async with DBConnect(commit=False) as cursor:
+        await cursor.execute_async(
+            """
+            SELECT 
+                 match_id, 
+                 race_type_id, 
+                 racer_1_id, 
+                 racer_2_id, 
+                 suggested_time, 
+                 r1_confirmed, 
+                 r2_confirmed, 
+                 r1_unconfirmed, 
+                 r2_unconfirmed, 
+                 ranked, 
+                 is_best_of, 
+                 number_of_races, 
+                 cawmentator_id, 
+                 channel_id,
+                 sheet_id,
+                 sheet_row,
+                 finish_time,
+                 autogenned,
+                 league_tag
+            FROM {matches} 
+            WHERE match_id IN ({fm})
+            """.format(matches=tn('matches'), fm=','.join(['%s'] * len(match_ids))),
+            match_ids
+        )
+        return cursor.fetchall()
+
+
 async def get_match_gsheet_duplication_number(match: Match) -> int:
     """
     Parameters
@@ -624,7 +666,7 @@ async def get_match_gsheet_duplication_number(match: Match) -> int:
         the same racers that appear in rows ahead of this match; otherwise, 0.
     """
     async with DBConnect(commit=False) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT COUNT(*)
             FROM {matches}
@@ -646,7 +688,7 @@ async def get_match_gsheet_duplication_number(match: Match) -> int:
 
 async def scrub_unchanneled_unraced_matches() -> None:
     async with DBConnect(commit=True) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             DELETE {matches}
             FROM {matches}
@@ -687,7 +729,7 @@ async def _register_match(match: Match) -> None:
     )
 
     async with DBConnect(commit=True) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             INSERT INTO {matches} 
             (
@@ -711,11 +753,11 @@ async def _register_match(match: Match) -> None:
             """.format(matches=tn('matches')),
             params
         )
-        cursor.execute("SELECT LAST_INSERT_ID()")
+        await cursor.execute_async("SELECT LAST_INSERT_ID()")
         match.set_match_id(int(cursor.fetchone()[0]))
 
         params = (match.racer_1.user_id, match.racer_2.user_id,)
-        cursor.execute(
+        await cursor.execute_async(
             """
             INSERT IGNORE INTO {entrants} (user_id)
             VALUES (%s), (%s)
@@ -724,10 +766,196 @@ async def _register_match(match: Match) -> None:
         )
 
 
+async def register_matches(matches: List[Match]) -> None:
+    """Register many new matches at once, with a single multi-row INSERT, and set their match IDs.
+
+    Parameters
+    ----------
+    matches: list[Match]
+        The matches to register. None of these may be registered already.
+    """
+    await upsert_matches(new_matches=matches, updated_matches=[])
+
+
+async def upsert_matches(new_matches: List[Match], updated_matches: List[Match]) -> None:
+    """Register many new matches and write many already-registered matches, all in a single transaction.
+
+    Parameters
+    ----------
+    new_matches: list[Match]
+        The matches to register. None of these may be registered already. Their match IDs are set.
+    updated_matches: list[Match]
+        The matches to write. All of these must be registered already.
+    """
+    if not new_matches and not updated_matches:
+        return
+
+    # Look up each distinct race type only once
+    race_type_ids = dict()
+    for match in itertools.chain(new_matches, updated_matches):
+        if _race_type_key(match) not in race_type_ids:
+            race_type_ids[_race_type_key(match)] = \
+                await racedb.get_race_type_id(race_info=match.race_info, register=True)
+
+    async with DBConnect(commit=True) as cursor:
+        if new_matches:
+            await _insert_matches(cursor, new_matches, race_type_ids)
+        if updated_matches:
+            await cursor.executemany_async(
+                """
+                UPDATE {matches}
+                SET
+                   race_type_id=%s,
+                   racer_1_id=%s,
+                   racer_2_id=%s,
+                   suggested_time=%s,
+                   r1_confirmed=%s,
+                   r2_confirmed=%s,
+                   r1_unconfirmed=%s,
+                   r2_unconfirmed=%s,
+                   ranked=%s,
+                   is_best_of=%s,
+                   number_of_races=%s,
+                   cawmentator_id=%s,
+                   channel_id=%s,
+                   sheet_id=%s,
+                   sheet_row=%s,
+                   finish_time=%s,
+                   autogenned=%s,
+                   league_tag=%s
+                WHERE match_id=%s
+                """.format(matches=tn('matches')),
+                [
+                    (
+                        race_type_ids[_race_type_key(match)],
+                        match.racer_1.user_id,
+                        match.racer_2.user_id,
+                        match.suggested_time,
+                        match.confirmed_by_r1,
+                        match.confirmed_by_r2,
+                        match.r1_wishes_to_unconfirm,
+                        match.r2_wishes_to_unconfirm,
+                        match.ranked,
+                        match.is_best_of,
+                        match.number_of_races,
+                        match.cawmentator_id,
+                        match.channel_id,
+                        match.sheet_id,
+                        match.sheet_row,
+                        match.finish_time,
+                        match.autogenned,
+                        match.league_tag,
+                        match.match_id,
+                    )
+                    for match in updated_matches
+                ]
+            )
+
+
+async def _insert_matches(cursor, matches: List[Match], race_type_ids: dict) -> None:
+    params = [
+        (
+            race_type_ids[_race_type_key(match)],
+            match.racer_1.user_id,
+            match.racer_2.user_id,
+            match.suggested_time,
+            match.confirmed_by_r1,
+            match.confirmed_by_r2,
+            match.r1_wishes_to_unconfirm,
+            match.r2_wishes_to_unconfirm,
+            match.ranked,
+            match.is_best_of,
+            match.number_of_races,
+            match.cawmentator_id,
+            match.channel_id,
+            match.sheet_id,
+            match.sheet_row,
+            match.finish_time,
+            match.autogenned,
+            match.league_tag
+        )
+        for match in matches
+    ]
+
+    await cursor.executemany_async(
+        """
+        INSERT INTO {matches} 
+        (
+           race_type_id, 
+           racer_1_id, 
+           racer_2_id, 
+           suggested_time, 
+           r1_confirmed, 
+           r2_confirmed, 
+           r1_unconfirmed, 
+           r2_unconfirmed, 
+           ranked, 
+           is_best_of, 
+           number_of_races, 
+           cawmentator_id,
+           channel_id,
+           sheet_id,
+           sheet_row,
+           finish_time,
+           autogenned,
+           league_tag
+        )
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """.format(matches=tn('matches')),
+        params
+    )
+
+    # A multi-row insert is given one block of IDs, first_id, first_id + step, ..., so read back only that block
+    # (never rows another connection inserted) and hand the IDs out in insertion order to each racer pair
+    await cursor.execute_async("SELECT LAST_INSERT_ID(), @@auto_increment_increment")
+    first_id, step = (int(x) for x in cursor.fetchone())
+    last_id = first_id + step*(len(matches) - 1)
+    await cursor.execute_async(
+        """
+        SELECT match_id, racer_1_id, racer_2_id 
+        FROM {matches} 
+        WHERE match_id BETWEEN %s AND %s 
+        ORDER BY match_id ASC
+        """.format(matches=tn('matches')),
+        (first_id, last_id,)
+    )
+    rows = cursor.fetchall()
+    if len(rows) != len(matches):
+        raise necrobot.exception.DatabaseException(
+            'Inserted {0} matches but found {1} with IDs {2} to {3}.'.format(len(matches), len(rows), first_id, last_id)
+        )
+    ids_by_pair = dict()
+    for match_id, racer_1_id, racer_2_id in rows:
+        ids_by_pair.setdefault((int(racer_1_id), int(racer_2_id),), []).append(int(match_id))
+    for match in matches:
+        match_ids = ids_by_pair.get((match.racer_1.user_id, match.racer_2.user_id,))
+        if not match_ids:
+            raise necrobot.exception.DatabaseException(
+                'Couldn\'t find the ID of the inserted match between users {0} and {1}.'.format(
+                    match.racer_1.user_id, match.racer_2.user_id
+                )
+            )
+        match.set_match_id(match_ids.pop(0))
+
+    user_ids = set(user_id for match in matches for user_id in [match.racer_1.user_id, match.racer_2.user_id])
+    await cursor.executemany_async(
+        """
+        INSERT IGNORE INTO {entrants} (user_id)
+        VALUES (%s)
+        """.format(entrants=tn('entrants')),
+        [(user_id,) for user_id in user_ids]
+    )
+
+
+def _race_type_key(match: Match) -> tuple:
+    race_info = match.race_info
+    return race_info.character_str, race_info.descriptor, race_info.seeded, race_info.amplified, race_info.seed_fixed
+
+
 async def _get_uncanceled_race_number(match: Match, race_number: int) -> int or None:
     params = (match.match_id,)
     async with DBConnect(commit=False) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT `race_number` 
             FROM {0} 
@@ -746,7 +974,7 @@ async def _get_uncanceled_race_number(match: Match, race_number: int) -> int or
 async def _get_new_race_number(match: Match) -> int:
     params = (match.match_id,)
     async with DBConnect(commit=False) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT `race_number` 
             FROM {0} 
@@ -758,3 +986,33 @@ async def _get_new_race_number(match: Match) -> int:
         )
         row = cursor.fetchone()
         return int(row[0]) + 1 if row is not None else 1
+
+
+class TestMatchDB(unittest.TestCase):
+    from necrobot.test.asynctest import async_test
+
+    loop = asyncio.new_event_loop()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.loop.close()
+
+    @async_test(loop)
+    async def test_upsert_new_match_sheet_info(self):
+        from necrobot.match.matchgsheetinfo import MatchGSheetInfo
+        from necrobot.test import testmatch
+
+        match = await testmatch.get_match(
+            r1_name='incnone',
+            r2_name='incnone_testing',
+            time=None,
+            cawmentator_name=None
+        )
+        match.raw_update(gsheet_info=MatchGSheetInfo(wks_id=1234, row=56))
+        await upsert_matches(new_matches=[match], updated_matches=[])
+        try:
+            raw_data = await get_raw_match_data(match.match_id)
+            self.assertEqual(int(raw_data[14]), 1234)
+            self.assertEqual(int(raw_data[15]), 56)
+        finally:
+            await delete_match(match.match_id)
@@ -1,10 +1,13 @@
 import asyncio
+import time
 from necrobot.botbase.necroevent import NEDispatch, NecroEvent
 from necrobot.botbase.manager import Manager
 from necrobot.botbase.necrobot import Necrobot
 from necrobot.match import matchdb, matchutil
 from necrobot.match.matchroom import MatchRoom
 from necrobot.match.matchglobals import MatchGlobals
+from necrobot.race import racedb
+from necrobot.user import userlib
 from necrobot.util import console, server
 from necrobot.util.singleton import Singleton
 from necrobot.config import Config
@@ -12,9 +15,10 @@ from necrobot.config import Config
 
 class MatchMgr(Manager, metaclass=Singleton):
     def __init__(self):
-        NEDispatch().subscribe(self)
+        NEDispatch().subscribe(self, event_types=['rtmp_name_change'])
 
     async def initialize(self):
+        await racedb.preload_race_types()
         await self._recover_stored_match_rooms()
         category_channels = server.find_all_categories(channel_name=Config.MATCH_CHANNEL_CATEGORY_NAME)
         MatchGlobals().set_channel_categories(category_channels)
@@ -26,7 +30,13 @@ class MatchMgr(Manager, metaclass=Singleton):
         pass
 
     def on_botchannel_create(self, channel, bot_channel):
-        pass
+        # Keep the Match for every live MatchRoom in the match library
+        if isinstance(bot_channel, MatchRoom) and bot_channel.match.is_registered:
+            matchutil.match_library.pin(bot_channel.match.match_id)
+
+    def on_botchannel_delete(self, channel, bot_channel):
+        if isinstance(bot_channel, MatchRoom) and bot_channel.match.is_registered:
+            matchutil.match_library.unpin(bot_channel.match.match_id)
 
     # noinspection PyMethodMayBeStatic
     async def ne_process(self, ev: NecroEvent):
@@ -46,19 +56,60 @@ class MatchMgr(Manager, metaclass=Singleton):
         """Recover MatchRoom objects on bot init
         
         Creates MatchRoom objects for `Match`es in the database which are registered (via their `channel_id`) to
-        some discord.Channel on the server.
+        some discord.Channel on the server. Every racer in these matches is fetched from the database at once, and
+        then up to Config.MATCH_RECOVERY_CONCURRENCY rooms are built at a time; each room is registered with the
+        Necrobot as soon as it is ready.
         """
         console.info('Recovering stored match rooms------------')
-        for row in await matchdb.get_channeled_matches_raw_data():
+        start_time = time.monotonic()
+        rows = await matchdb.get_channeled_matches_raw_data()
+        query_time = time.monotonic() - start_time
+
+        rows_to_recover = []
+        for row in rows:
             channel_id = int(row[13])
             channel = server.find_channel(channel_id=channel_id)
             if channel is not None:
+                rows_to_recover.append((row, channel,))
+            else:
+                console.info('  Couldn\'t find channel with ID {0}.', channel_id)
+
+        prefetch_start_time = time.monotonic()
+        await userlib.prefetch_users(
+            int(row[idx]) for row, _ in rows_to_recover for idx in [2, 3]
+        )
+        prefetch_time = time.monotonic() - prefetch_start_time
+
+        rooms_start_time = time.monotonic()
+        semaphore = asyncio.Semaphore(Config.MATCH_RECOVERY_CONCURRENCY)
+        room_times = await asyncio.gather(
+            *[MatchMgr._recover_match_room(row, channel, semaphore) for row, channel in rows_to_recover]
+        )
+        rooms_time = time.monotonic() - rooms_start_time
+        room_times = [t for t in room_times if t is not None]
+
+        console.info(
+            'Recovered {0} of {1} match rooms in {2:.2f}s (query {3:.2f}s, users {4:.2f}s, rooms {5:.2f}s; '
+            'slowest room {6:.2f}s).',
+            len(room_times), len(rows), time.monotonic() - start_time, query_time, prefetch_time, rooms_time,
+            max(room_times, default=0.0)
+        )
+        console.info('-----------------------------------------')
+
+    @staticmethod
+    async def _recover_match_room(row: list, channel, semaphore: asyncio.Semaphore) -> float or None:
+        """Make and register the MatchRoom for one row of matchdb.get_channeled_matches_raw_data(). Returns the
+        time taken, or None if the room could not be made."""
+        async with semaphore:
+            start_time = time.monotonic()
+            try:
                 match = await matchutil.make_match_from_raw_db_data(row=row)
                 new_room = MatchRoom(match_discord_channel=channel, match=match)
-                Necrobot().register_bot_channel(channel, new_room)
                 await new_room.initialize()
-                console.info('  Channel ID: {0}  Match: {1}'.format(channel_id, match))
-            else:
-                console.info('  Couldn\'t find channel with ID {0}.'.format(channel_id))
-            await asyncio.sleep(0)  # Pass control back to the main event loop
-        console.info('-----------------------------------------')
+            except Exception as e:
+                console.error('  Failed to recover match room in channel {0}: {1}', channel.id, e)
+                return None
+
+            Necrobot().register_bot_channel(channel, new_room)
+            console.info('  Channel ID: {0}  Match: {1}', channel.id, match)
+            return time.monotonic() - start_time
@@ -2,7 +2,8 @@
 
 import asyncio
 import datetime
-from typing import Optional, Mapping, Union
+import functools
+from typing import List, Optional, Mapping, Union
 
 import discord
 import pytz
@@ -16,13 +17,14 @@ from necrobot.match.match import Match
 from necrobot.match.matchracedata import MatchRaceData
 from necrobot.race import cmd_race
 from necrobot.race import raceinfo
-from necrobot.race.race import Race, RaceEvent
+from necrobot.race import racejournal
+from necrobot.race.race import Race, RaceEvent, RaceStatus
 from necrobot.race.raceconfig import RaceConfig
 from necrobot.test import cmd_test
 from necrobot.user import cmd_user
-from necrobot.util import console
 from necrobot.util import ordinal
 from necrobot.util import timestr
+from necrobot.util.scheduler import JobHandle, Scheduler
 from necrobot.race import racedb
 
 
@@ -44,7 +46,7 @@ class MatchRoom(BotChannel):
         self._current_race = None               # type: Optional[Race]
         self._last_begun_race = None            # type: Optional[Race]
 
-        self._countdown_to_match_future = None  # type: Optional[asyncio.Future]
+        self._match_start_jobs = list()         # type: List[JobHandle]
 
         self._current_race_number = None        # type: Optional[int]
 
@@ -187,13 +189,12 @@ class MatchRoom(BotChannel):
         )
 
     async def initialize(self) -> None:
-        """Async initialization method"""
-        if self._countdown_to_match_future is not None:
-            self._countdown_to_match_future.cancel()
-        self._countdown_to_match_future = asyncio.ensure_future(self._countdown_to_match_start(warn=True))
+        """Async initialization method. If the room's race was journaled when the bot went down, it is restored."""
         self._match_race_data = await matchdb.get_match_race_data(self.match.match_id)
         self._current_race_number = self._match_race_data.num_finished + self._match_race_data.num_canceled
         self._last_begun_race_number = self._current_race_number
+        if not await self._recover_race():
+            self._schedule_match_start(warn=True)
         self._set_channel_commands()
 
     async def send_channel_start_text(self) -> None:
@@ -254,12 +255,9 @@ class MatchRoom(BotChannel):
 
     async def update(self) -> None:
         if self.match.is_scheduled and self.current_race is None:
-            if self._countdown_to_match_future is not None:
-                self._countdown_to_match_future.cancel()
-            self._countdown_to_match_future = asyncio.ensure_future(self._countdown_to_match_start())
+            self._schedule_match_start()
         elif not self.match.is_scheduled:
-            if self._countdown_to_match_future is not None:
-                self._countdown_to_match_future.cancel()
+            self._cancel_match_start()
             self._current_race = None
 
         self._set_channel_commands()
@@ -282,6 +280,9 @@ class MatchRoom(BotChannel):
 
     async def process(self, race_event: RaceEvent) -> None:
         """Process a RaceEvent"""
+        if race_event.race is self._current_race:
+            self._journal_race()
+
         if race_event.event == RaceEvent.EventType.RACE_BEGIN:
             self._last_begun_race = self._current_race
             self._last_begun_race_number = self._current_race_number
@@ -368,6 +369,7 @@ class MatchRoom(BotChannel):
         if success:
             self._match_race_data.num_finished -= 1
             self._match_race_data.num_canceled += 1
+            await NEDispatch().publish('change_match_results', match=self.match)
         return success
 
     async def force_record_race(self, winner: int) -> None:
@@ -377,6 +379,7 @@ class MatchRoom(BotChannel):
             winner=winner
         )
         self._update_race_data(race_winner=winner)
+        await NEDispatch().publish('change_match_results', match=self.match)
         await self.update()
 
     async def add_cawmentator_permissions(self) -> None:
@@ -399,52 +402,72 @@ class MatchRoom(BotChannel):
         if cawmentator is not None and not self.is_racer_id(cawmentator.member.id):
             await self.channel.set_permissions(cawmentator.member, overwrite=None)
 
-    async def _countdown_to_match_start(self, warn: bool = False) -> None:
-        """Does things at certain times before the match
+    def _schedule_match_start(self, warn: bool = False) -> None:
+        """Schedule the alerts to the racers before the match, and the beginning of the match.
         
-        Posts alerts to racers in this channel, and sends NecroEvents at alert times. Begins the match
-        at the appropriate time. This is stored as a future in this object, and is meant to be canceled
-        if this object closes.
+        The alerts are keyed by the match and its time, so an alert already sent before a restart isn't sent again.
+        Scheduling replaces any jobs previously scheduled by this method.
         """
-        try:
-            if not self.match.is_scheduled:
-                return
-
-            time_until_match = self.match.time_until_match
-
-            # Begin match now if appropriate
-            if time_until_match < datetime.timedelta(seconds=0):
-                if not self.played_all_races:
-                    if warn:
-                        await self.write(
-                            'I believe that I was just restarted; an error may have occurred. I am '
-                            'beginning a new race and attempting to pick up this match where we left '
-                            'off. If this is an error, or if there are unrecorded races, please contact '
-                            'an admin.')
-                    await self._begin_new_race()
-                return
-
-            # Wait until the first warning
-            if time_until_match > Config.MATCH_FIRST_WARNING:
-                await asyncio.sleep((time_until_match - Config.MATCH_FIRST_WARNING).total_seconds())
-                await self.alert_racers()
-                await NEDispatch().publish('match_alert', match=self.match, final=False)
-
-            # Wait until the final warning
-            time_until_match = self.match.time_until_match
-            if time_until_match > Config.MATCH_FINAL_WARNING:
-                await asyncio.sleep((time_until_match - Config.MATCH_FINAL_WARNING).total_seconds())
-
-            # At this time, we've either just passed the FINAL_MATCH_WARNING or the function was just called
-            # (happens if the call comes sometime after the FINAL_MATCH_WARNING but before the match).
-            await self.alert_racers()
-            await NEDispatch().publish('match_alert', match=self.match, final=True)
-
-            await asyncio.sleep(self.match.time_until_match.total_seconds())
-            await self._begin_new_race()
-        except asyncio.CancelledError:
-            console.info('MatchRoom._countdown_to_match_start() was cancelled.')
-            raise
+        self._cancel_match_start()
+        if not self.match.is_scheduled:
+            return
+
+        scheduler = Scheduler()
+        match_time = self.match.suggested_time
+        time_until_match = self.match.time_until_match
+
+        # Begin match now if appropriate
+        if time_until_match < datetime.timedelta(seconds=0):
+            if not self.played_all_races:
+                self._match_start_jobs.append(scheduler.schedule_in(
+                    0,
+                    functools.partial(self._begin_late_match, warn=warn),
+                    name='Begin {0}'.format(self.match.matchroom_name)
+                ))
+            return
+
+        key = 'match-{0}-{1}'.format(self.match.match_id, int(match_time.timestamp()))
+        if time_until_match > Config.MATCH_FIRST_WARNING:
+            self._match_start_jobs.append(scheduler.schedule(
+                match_time - Config.MATCH_FIRST_WARNING,
+                functools.partial(self._alert_for_match, final=False),
+                name='First alert for {0}'.format(self.match.matchroom_name),
+                key=key + '-alert'
+            ))
+
+        # If we're already past the final warning time, this happens right away
+        self._match_start_jobs.append(scheduler.schedule(
+            match_time - Config.MATCH_FINAL_WARNING,
+            functools.partial(self._alert_for_match, final=True),
+            name='Final alert for {0}'.format(self.match.matchroom_name),
+            key=key + '-final-alert'
+        ))
+        self._match_start_jobs.append(scheduler.schedule(
+            match_time,
+            self._begin_new_race,
+            name='Begin {0}'.format(self.match.matchroom_name)
+        ))
+
+    def _cancel_match_start(self) -> None:
+        """Cancel the jobs scheduled by _schedule_match_start."""
+        for job in self._match_start_jobs:
+            job.cancel()
+        self._match_start_jobs = list()
+
+    async def _alert_for_match(self, final: bool) -> None:
+        """Alert the racers that their match is coming up, and send a NecroEvent."""
+        await self.alert_racers()
+        await NEDispatch().publish('match_alert', match=self.match, final=final)
+
+    async def _begin_late_match(self, warn: bool) -> None:
+        """Begin a match whose start time has already passed."""
+        if warn:
+            await self.write(
+                'I believe that I was just restarted; an error may have occurred. I am '
+                'beginning a new race and attempting to pick up this match where we left '
+                'off. If this is an error, or if there are unrecorded races, please contact '
+                'an admin.')
+        await self._begin_new_race()
 
     async def _begin_new_race(self):
         """Begin a new race"""
@@ -462,6 +485,8 @@ class MatchRoom(BotChannel):
         for racer in self.match.racers:
             await self.current_race.enter_member(racer.member, mute=True)
 
+        self._journal_race(new_race=True)
+
         # Output text
         await self.write(
             'Please input the seed ({1}) and type `.ready` when you are ready for the {0} race. '
@@ -469,12 +494,12 @@ class MatchRoom(BotChannel):
                 ordinal.num_to_text(match_race_data.num_finished + 1),
                 self.current_race.race_info.seed))
 
-        if self._countdown_to_match_future is not None:
-            self._countdown_to_match_future.cancel()
+        self._cancel_match_start()
 
     async def _end_match(self):
         """End the match"""
         self._current_race = None
+        racejournal.discard(self.channel.id)
         self.channel_commands = self._postmatch_channel_commands
 
         # Send event
@@ -505,13 +530,46 @@ class MatchRoom(BotChannel):
 
         await self.write('Match complete.')
 
+    def _journal_race(self, new_race: bool = False) -> None:
+        """Append the current race's state to this room's journal"""
+        snapshot = self._current_race.snapshot()
+        snapshot.room_kind = racejournal.RoomKind.MATCH_ROOM
+        snapshot.race_number = self._current_race_number
+        snapshot.match_id = self.match.match_id
+        snapshot.contested = self._current_race_contested
+        racejournal.append(self.channel.id, snapshot, new_race=new_race)
+
+    async def _recover_race(self) -> bool:
+        """Restore the race this room was running when the bot went down, if it was journaled and hasn't been
+        recorded. Returns True if a race was restored."""
+        snapshot = await racejournal.load(self.channel.id)
+        if snapshot is None \
+                or snapshot.room_kind != racejournal.RoomKind.MATCH_ROOM \
+                or snapshot.match_id != self.match.match_id \
+                or snapshot.race_number != self._match_race_data.num_races + 1 \
+                or snapshot.status >= RaceStatus.finalized:
+            return False
+
+        self._current_race = Race(self, self.match.race_info, race_config=snapshot.race_config)
+        self._current_race_number = snapshot.race_number
+        self._current_race_contested = snapshot.contested
+        await self._current_race.restore(snapshot)
+        if not self._current_race.before_race:
+            self._last_begun_race = self._current_race
+            self._last_begun_race_number = self._current_race_number
+
+        await self.write(
+            'I was just restarted. The {0} race has been restored: {1}'.format(
+                ordinal.num_to_text(self._match_race_data.num_finished + 1), self._current_race.status_str))
+        return True
+
     async def _record_race(self, race: Race, race_winner: int) -> None:
         """Record the given race as part of this match"""
-        await racedb.record_race(race)
+        await racedb.queue_race(race)
         await matchdb.record_match_race(
             match=self.match,
             race_number=self._current_race_number,
-            race_id=self.current_race.race_id,
+            race_id=race.race_id,
             winner=race_winner,
             contested=self._current_race_contested,
             canceled=False
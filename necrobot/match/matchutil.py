@@ -1,19 +1,27 @@
 import datetime
-from typing import Optional
+from typing import Dict, Iterable, List, Optional
 
+from necrobot.config import Config
 from necrobot.match.matchgsheetinfo import MatchGSheetInfo
 from necrobot.match import matchdb
 from necrobot.match.match import Match
 from necrobot.match.matchinfo import MatchInfo
 from necrobot.race import racedb
 from necrobot.race.raceinfo import RaceInfo
+from necrobot.user import userlib
+from necrobot.util.identitymap import IdentityMap
 
-match_library = {}
+match_library = IdentityMap('Matches', capacity=Config.MATCH_LIBRARY_SIZE)
 
 
 def invalidate_cache():
-    global match_library
-    match_library = {}
+    """Forget every cached Match, except those pinned by a live MatchRoom."""
+    match_library.clear()
+
+
+def invalidate_match(match_id: int) -> None:
+    """Forget the cached Match with the given ID, so that it is read from the database next time."""
+    match_library.invalidate(match_id)
 
 
 async def make_match(register=False, update=False, **kwargs) -> Optional[Match]:
@@ -75,6 +83,105 @@ async def make_match(register=False, update=False, **kwargs) -> Optional[Match]:
     return match
 
 
+async def make_matches(match_kwargs: List[dict]) -> List[Match]:
+    """Create and register many new matches at once.
+
+    Parameters
+    ----------
+    match_kwargs: list[dict]
+        For each match, the keyword arguments to make it with, as for make_match. These should not include match_id.
+
+    Returns
+    -------
+    list[Match]
+        The created matches, in the same order.
+    """
+    matches = []
+    for kwargs in match_kwargs:
+        match = Match(commit_fn=matchdb.write_match, **kwargs)
+        await match.initialize()
+        matches.append(match)
+
+    await matchdb.register_matches(matches)
+    for match in matches:
+        match_library[match.match_id] = match
+    return matches
+
+
+async def upsert_matches(match_kwargs: List[dict], register: bool = False) -> List[Optional[Match]]:
+    """Create or update many matches at once, as make_match(update=True) does for one match, but reading the existing
+    matches with one query and writing every match in one transaction.
+
+    Parameters
+    ----------
+    match_kwargs: list[dict]
+        For each match, the keyword arguments to make it with, as for make_match. If these include a match_id, that
+        match is updated with the other arguments; otherwise, a new match is made.
+    register: bool
+        Whether to register the new matches in the database.
+
+    Returns
+    -------
+    list[Optional[Match]]
+        The matches, in the same order. An entry is None if a match_id was given but no such match exists.
+    """
+    existing_matches = await get_matches_from_ids(
+        kwargs['match_id'] for kwargs in match_kwargs if kwargs.get('match_id') is not None
+    )
+
+    matches = []
+    new_matches = []
+    updated_matches = []
+    for kwargs in match_kwargs:
+        if kwargs.get('match_id') is not None:
+            match = existing_matches.get(kwargs['match_id'])
+            if match is not None:
+                match.raw_update(**kwargs)
+                updated_matches.append(match)
+        else:
+            match = Match(commit_fn=matchdb.write_match, **kwargs)
+            await match.initialize()
+            if register:
+                new_matches.append(match)
+        matches.append(match)
+
+    await matchdb.upsert_matches(new_matches=new_matches, updated_matches=updated_matches)
+    for match in new_matches:
+        match_library[match.match_id] = match
+    return matches
+
+
+async def get_matches_from_ids(match_ids: Iterable[int]) -> Dict[int, Match]:
+    """Get the matches with the given DB unique IDs, reading all those not already cached in a single query.
+
+    Parameters
+    ----------
+    match_ids: Iterable[int]
+        The database IDs of the matches.
+
+    Returns
+    -------
+    dict[int, Match]
+        The matches found, by ID.
+    """
+    matches = dict()
+    to_fetch = set()
+    for match_id in match_ids:
+        cached_match = match_library.get(match_id)
+        if cached_match is not None:
+            matches[match_id] = cached_match
+        else:
+            to_fetch.add(match_id)
+
+    if to_fetch:
+        raw_data = await matchdb.get_raw_match_data_for_ids(to_fetch)
+        await userlib.prefetch_users(user_id for row in raw_data for user_id in [row[2], row[3]])
+        for row in raw_data:
+            match = await make_match_from_raw_db_data(row)
+            matches[match.match_id] = match
+    return matches
+
+
 async def get_match_from_id(match_id: int) -> Match or None:
     """Get a match object from its DB unique ID.
     
@@ -91,8 +198,9 @@ async def get_match_from_id(match_id: int) -> Match or None:
     if match_id is None:
         return None
 
-    if match_id in match_library:
-        return match_library[match_id]
+    cached_match = match_library.get(match_id)
+    if cached_match is not None:
+        return cached_match
 
     raw_data = await matchdb.get_raw_match_data(match_id)
     if raw_data is not None:
@@ -103,14 +211,14 @@ async def get_match_from_id(match_id: int) -> Match or None:
 
 async def delete_match(match_id: int) -> None:
     await matchdb.delete_match(match_id=match_id)
-    if match_id in match_library:
-        del match_library[match_id]
+    match_library.invalidate(match_id)
 
 
 async def make_match_from_raw_db_data(row: list) -> Match:
     match_id = int(row[0])
-    if match_id in match_library:
-        return match_library[match_id]
+    cached_match = match_library.get(match_id)
+    if cached_match is not None:
+        return cached_match
 
     match_info = MatchInfo(
         race_info=await racedb.get_race_info_from_type_id(int(row[1])) if row[1] is not None else RaceInfo(),
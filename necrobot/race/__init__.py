@@ -39,6 +39,9 @@ are stored in `races`, but whether a race is seeded is part of the "type" of a r
 `RaceConfig` stores information about the variables in the way races are run (countdown length, time between completion
 and recording, whether to auto-forfeit the last racer when all others have finished).
 
+`racejournal` saves a snapshot of a room's current race to disk on every `RaceEvent`, so that races which were running
+when the bot stopped can be restored when it restarts (see `raceutil.recover_race_rooms` and `MatchRoom.initialize`).
+
 `racetime` has functions for converting different time-data storage (ints as hundredths of a second and XX:XX.xx 
 format).
 
@@ -70,10 +73,12 @@ race
     race/
         raceconfig
         raceinfo
+        racejournal
         racer
     util/
         console
         racetime
+        server
         ordinal
         necrodancer/
             level
@@ -81,12 +86,24 @@ race
 raceconfig
     config
 racedb
+    config
     database/
         dbconnect
         dbutil
     race/
         race
         raceinfo
+    util/
+        console
+racejournal
+    config
+    race/
+        raceconfig
+        raceinfo
+    util/
+        console
+        necrodancer/
+            character
 raceinfo
     exception
     util/
@@ -97,6 +114,7 @@ raceinfo
             character
 racer
     race/
+        racejournal
         racerstatus
     user/
         userlib
@@ -111,6 +129,8 @@ raceutil
     botbase/
         necrobot
     race/
+        raceinfo
+        racejournal
         publicrace/
             raceroom
     user/
@@ -118,5 +138,6 @@ raceutil
         userprefs
     util/
         console
+        dmbroadcast
         server
 """
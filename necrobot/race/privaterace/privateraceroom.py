@@ -51,6 +51,9 @@ async def make_private_room(race_private_info, discord_member):
 
 
 class PrivateRaceRoom(RaceRoom):
+    # Private rooms aren't restored after a restart, since their permissions aren't journaled
+    journal_races = False
+
     def __init__(self, race_discord_channel, race_private_info, admin_as_member):
         RaceRoom.__init__(self, race_discord_channel, race_private_info.race_info)
         self._room_creator = admin_as_member
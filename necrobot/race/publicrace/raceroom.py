@@ -10,15 +10,23 @@ from necrobot.botbase.necrobot import Necrobot
 from necrobot.config import Config
 from necrobot.race import cmd_race
 from necrobot.race import raceinfo
+from necrobot.race import racejournal
 from necrobot.race.publicrace import cmd_publicrace
 from necrobot.race.race import Race, RaceEvent
 from necrobot.test import cmd_test
 from necrobot.util import server
 from necrobot.util import strutil
+from necrobot.util.scheduler import Scheduler
 from necrobot.race import racedb
 
+# Seconds between checks for whether the room should be cleaned up
+CLEANUP_CHECK_INTERVAL = 30
+
 
 class RaceRoom(BotChannel):
+    # Whether to journal this room's races, so that they are restored after a restart
+    journal_races = True
+
     def __init__(self, race_discord_channel, race_info):
         BotChannel.__init__(self)
         self._channel = race_discord_channel    # The necrobot in which this race is taking place
@@ -31,6 +39,7 @@ class RaceRoom(BotChannel):
         self._mention_on_new_race = []          # A list of users that should be @mentioned when a rematch is created
         self._mentioned_users = []              # A list of users that were @mentioned when this race was created
         self._nopoke = False                    # When True, the .poke command fails
+        self._cleanup_job = None                # The scheduled job for the next cleanup check
 
         self.channel_commands = [
             cmd_race.Enter(self),
@@ -139,7 +148,7 @@ class RaceRoom(BotChannel):
 # Coroutine methods ---------------------------------------------------
     # Set up the leaderboard etc. Should be called after creation; code not put into __init__ b/c coroutine
     async def initialize(self):
-        asyncio.ensure_future(self._monitor_for_cleanup())
+        self._schedule_cleanup_check()
         await self._make_new_race()
         await self.write('Enter the race with `.enter`, and type `.ready` when ready. '
                          'Finish the race with `.done` or `.forfeit`. Use `.help` for a command list.')
@@ -148,8 +157,22 @@ class RaceRoom(BotChannel):
     async def write(self, text: str):
         await self._channel.send(text)
 
+    # Restore this room from the given snapshot of its last race, instead of calling initialize()
+    async def recover(self, snapshot: racejournal.RaceSnapshot):
+        self._schedule_cleanup_check()
+        self._race_number = snapshot.race_number
+        self._current_race = Race(self, self.race_info)
+        await self._current_race.restore(snapshot)
+        await self.update()
+        await self.write(
+            'I was just restarted. Race number {0} has been restored: {1}'.format(
+                self._race_number, self._current_race.status_str))
+
     # Processes a race event
     async def process(self, race_event: RaceEvent):
+        if race_event.race is self._current_race:
+            self._journal_race()
+
         if race_event.event == RaceEvent.EventType.RACE_END:
             await asyncio.sleep(1)  # Waiting for a short time feels good UI-wise
             await self.write(
@@ -157,7 +180,7 @@ class RaceRoom(BotChannel):
                 '`.comment` or add an in-game-time with `.igt`.'.format(
                     self.current_race.race_config.finalize_time_sec))
         elif race_event.event == RaceEvent.EventType.RACE_FINALIZE:
-            await racedb.record_race(race_event.race)
+            await racedb.queue_race(race_event.race)
             if race_event.race.race_info.post_results:
                 await self.post_result(race_event.race)
         elif race_event.event == RaceEvent.EventType.RACE_CANCEL:
@@ -207,6 +230,9 @@ class RaceRoom(BotChannel):
 
     # Close the channel.
     async def close(self):
+        if self._cleanup_job is not None:
+            self._cleanup_job.cancel()
+        racejournal.discard(self._channel.id)
         Necrobot().unregister_bot_channel(self._channel)
         await self._channel.delete()
 
@@ -237,7 +263,9 @@ class RaceRoom(BotChannel):
             for racer in unready_racers:
                 alert_string += racer.member.mention + ', '
             await self.write('Poking {0}.'.format(alert_string[:-2]))
-            asyncio.ensure_future(self._run_nopoke_delay())
+            Scheduler().schedule_in(
+                Config.RACE_POKE_DELAY, self._end_nopoke_delay, name='End poke delay in #{0}'.format(self._channel.name)
+            )
 
 # Private -----------------------------------------------------------------
     # Makes a new Race (and stores the previous one in self._previous race)
@@ -247,6 +275,7 @@ class RaceRoom(BotChannel):
         self._previous_race = self._current_race
         self._current_race = Race(self, self.race_info)
         await self._current_race.initialize()
+        self._journal_race(new_race=True)
         await self.update()
 
         # Send @mention message
@@ -266,33 +295,46 @@ class RaceRoom(BotChannel):
             await self._channel.send(
                 '{0}\nRace number {1} is open for entry.'.format(mention_text, self._race_number))
 
+    # Appends the current race's state to this room's journal
+    def _journal_race(self, new_race=False):
+        if not self.journal_races:
+            return
+        snapshot = self._current_race.snapshot()
+        snapshot.room_kind = racejournal.RoomKind.RACE_ROOM
+        snapshot.race_number = self._race_number
+        racejournal.append(self._channel.id, snapshot, new_race=new_race)
+
+    # Schedules the next check for whether the room should be cleaned.
+    def _schedule_cleanup_check(self):
+        self._cleanup_job = Scheduler().schedule_in(
+            CLEANUP_CHECK_INTERVAL, self._check_for_cleanup, name='Cleanup check for #{0}'.format(self._channel.name)
+        )
+
     # Checks to see whether the room should be cleaned.
-    async def _monitor_for_cleanup(self):
-        while True:
-            await asyncio.sleep(30)  # Wait between check times
-
-            # No race object
-            if self._current_race is None:
-                await self.close()
-                return
-
-            # Pre-race
-            elif self._current_race.before_race:
-                if not self._current_race.any_entrants:
-                    if self._current_race.passed_no_entrants_cleanup_time:
-                        await self.close()
-                        return
-                    elif self._current_race.passed_no_entrants_warning_time:
-                        await self.write('Warning: Race has had zero entrants for some time and will be closed soon.')
-
-            # Post-race
-            elif self._current_race.complete:
-                async for msg in self._channel.history(limit=1):
-                    if (datetime.datetime.utcnow() - msg.created_at) > Config.CLEANUP_TIME:
-                        await self.close()
-                        return
-
-    # Implements a delay before pokes can happen again
-    async def _run_nopoke_delay(self):
-        await asyncio.sleep(Config.RACE_POKE_DELAY)
+    async def _check_for_cleanup(self):
+        # No race object
+        if self._current_race is None:
+            await self.close()
+            return
+
+        # Pre-race
+        elif self._current_race.before_race:
+            if not self._current_race.any_entrants:
+                if self._current_race.passed_no_entrants_cleanup_time:
+                    await self.close()
+                    return
+                elif self._current_race.passed_no_entrants_warning_time:
+                    await self.write('Warning: Race has had zero entrants for some time and will be closed soon.')
+
+        # Post-race
+        elif self._current_race.complete:
+            async for msg in self._channel.history(limit=1):
+                if (datetime.datetime.utcnow() - msg.created_at) > Config.CLEANUP_TIME:
+                    await self.close()
+                    return
+
+        self._schedule_cleanup_check()
+
+    # Ends the delay before pokes can happen again
+    async def _end_nopoke_delay(self):
         self._nopoke = False
@@ -14,10 +14,12 @@ from necrobot.util.necrodancer import level as necrolevel
 from necrobot.config import Config
 from necrobot.race.raceconfig import RaceConfig
 from necrobot.race.raceinfo import RaceInfo
+from necrobot.race.racejournal import RaceSnapshot
 from necrobot.race.racer import Racer
-from necrobot.util import console, racetime
+from necrobot.util import console, racetime, server
 from necrobot.util.ordinal import ordinal
 from necrobot.util.necrodancer import seedgen
+from necrobot.util.scheduler import Scheduler
 
 
 # from necrobot.util import ratelimit
@@ -128,7 +130,7 @@ class Race(object):
 
         self._delay_record = False                # If true, delay an extra config.FINALIZE_TIME_SEC before recording
         self._countdown_future = None             # The Future object for the race countdown
-        self._finalize_future = None              # The Future object for the finalization countdown
+        self._finalize_job = None                 # The scheduled JobHandle for finalizing the race
 
 # Race data
     # Returns the status string
@@ -589,6 +591,60 @@ class Race(object):
             await self._write(mute=mute, text='Changed seed to {0}.'.format(self.race_info.seed))
             await self._process(RaceEvent.EventType.CHANGE_RULES)
 
+    # Returns a snapshot of the race's state, for the race journal
+    def snapshot(self) -> RaceSnapshot:
+        if self._status == RaceStatus.paused:
+            elapsed = self._last_pause_time - self._adj_start_time
+        elif self._status == RaceStatus.racing or self._status == RaceStatus.completed:
+            elapsed = time.monotonic() - self._adj_start_time
+        else:
+            elapsed = 0.0
+
+        return RaceSnapshot(
+            status=int(self._status),
+            race_info=self.race_info,
+            race_config=self._config,
+            racers=[racer.snapshot() for racer in self.racers],
+            elapsed=elapsed,
+            start_datetime=self._start_datetime
+        )
+
+    # Restores the race from a snapshot. The race timer counts the time since the snapshot was taken (the racers
+    # kept racing while the bot was down); a paused race stays paused. A countdown is restarted, and a completed race
+    # waits the full finalization time again.
+    async def restore(self, snapshot: RaceSnapshot):
+        self.race_info = snapshot.race_info
+        self._config = snapshot.race_config
+        self.racers = []
+        for racer_snapshot in snapshot.racers:
+            racer_member = server.find_member(discord_id=racer_snapshot.discord_id)
+            if racer_member is None:
+                console.warning('Couldn\'t find the member with ID {0} to restore to a race.',
+                                racer_snapshot.discord_id)
+                continue
+            racer = Racer(racer_member)
+            await racer.initialize()
+            racer.restore(racer_snapshot)
+            self.racers.append(racer)
+
+        now = time.monotonic()
+        status = RaceStatus(snapshot.status)
+        self._start_datetime = snapshot.start_datetime
+        self._last_no_entrants_time = now
+        if status == RaceStatus.paused:
+            self._last_pause_time = now
+            self._adj_start_time = now - snapshot.elapsed
+        elif status == RaceStatus.racing or status == RaceStatus.completed:
+            self._adj_start_time = now - snapshot.elapsed - max(0.0, time.time() - snapshot.wall_time)
+
+        if status == RaceStatus.counting_down:
+            self._status = RaceStatus.entry_open
+            await self.begin_if_ready()
+        else:
+            self._status = status
+            if status == RaceStatus.completed:
+                self._schedule_finalization()
+
 # Private methods
     # Sort racer list
     def _sort_racers(self):
@@ -641,7 +697,8 @@ class Race(object):
     async def _end_race(self):
         if self._status == RaceStatus.racing:
             self._status = RaceStatus.completed
-            self._finalize_future = asyncio.ensure_future(self._finalization_countdown())
+            self.delay_record = False
+            self._schedule_finalization()
             await self._process(RaceEvent.EventType.RACE_END)
 
     # Countdown coroutine to be wrapped in self._countdown_future.
@@ -706,13 +763,21 @@ class Race(object):
             return True
         return False
 
-    # Countdown coroutine to be wrapped in self._finalize_future.
+    # Schedule _finalize to happen once the finalization time has passed.
+    def _schedule_finalization(self):
+        self._finalize_job = Scheduler().schedule_in(
+            self._config.finalize_time_sec,
+            self._finalize,
+            name='Finalize {0} race'.format(self.race_info.descriptor)
+        )
+
+    # Job scheduled by _schedule_finalization. If the record has been delayed, waits another finalization time.
     # Warning: Do not call this -- use end_race instead.
-    async def _finalization_countdown(self):
-        self.delay_record = True
-        while self.delay_record:
+    async def _finalize(self):
+        if self.delay_record:
             self.delay_record = False
-            await asyncio.sleep(self._config.finalize_time_sec)
+            self._schedule_finalization()
+            return
 
         # Perform the finalization and record the race. At this point, the finalization cannot be canceled.
         self._status = RaceStatus.finalized
@@ -739,9 +804,9 @@ class Race(object):
     # Returns False only if race IS completed, AND we failed to restart it
     async def _cancel_finalization(self, mute=False):
         if self._status == RaceStatus.completed:
-            if self._finalize_future:
-                if self._finalize_future.cancel():
-                    self._finalize_future = None
+            if self._finalize_job:
+                if self._finalize_job.cancel():
+                    self._finalize_job = None
                     self._status = RaceStatus.racing
                     await self._process(RaceEvent.EventType.RACE_CANCEL_FINALIZE)
                     await self._write(mute=mute, text='Race end canceled -- unfinished racers may continue!')
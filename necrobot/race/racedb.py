@@ -2,172 +2,297 @@
 Interaction with the races, race_types, and race_runs databases (necrobot or condor event schema).
 """
 
+import asyncio
+from typing import Dict, List, Tuple
+
+from necrobot.config import Config
 from necrobot.database.dbconnect import DBConnect
 from necrobot.database.dbutil import tn
 from necrobot.race.race import Race
 from necrobot.race.raceinfo import RaceInfo
+from necrobot.util import console
 
 
 # Record a race-------------------------------------------------------------------
+# Races queued with queue_race are written together: every race queued within Config.RACE_RECORD_DELAY seconds of the
+# first is recorded in a single transaction, so that many rooms finalizing at once don't each take a connection.
+_race_queue = list()            # type: List[Tuple[Race, asyncio.Future]]
+
+
 async def record_race(race: Race) -> None:
-    type_id = await get_race_type_id(race.race_info, register=True)
+    """Record the race and its runs in a single transaction, and set race.race_id."""
+    await _record_races([race])
+
+
+async def queue_race(race: Race) -> None:
+    """Record the race as part of the next group of races, and set race.race_id. Returns once the group is committed.
+
+    Raises
+    ------
+    Any exception raised while recording this race.
+    """
+    future = asyncio.get_event_loop().create_future()
+    _race_queue.append((race, future,))
+    if len(_race_queue) == 1:
+        asyncio.ensure_future(_record_queued_races())
+    await future
+
+
+async def _record_queued_races() -> None:
+    await asyncio.sleep(Config.RACE_RECORD_DELAY)
+    queued = list(_race_queue)
+    _race_queue.clear()
+
+    try:
+        await _record_races([race for race, _ in queued])
+    except Exception as e:
+        # The group was rolled back, so record each race on its own, so that only the bad races fail
+        console.warning('Failed to record {0} queued races together; recording them one at a time: {1}', len(queued), e)
+        for race, _ in queued:
+            race.race_id = None
+        for race, future in queued:
+            try:
+                await _record_races([race])
+            except Exception as race_e:
+                race.race_id = None
+                console.warning('Failed to record a race: {0}', race_e)
+                if not future.done():
+                    future.set_exception(race_e)
+            else:
+                if not future.done():
+                    future.set_result(None)
+    else:
+        for _, future in queued:
+            if not future.done():
+                future.set_result(None)
+
+
+async def _record_races(races: List[Race]) -> None:
+    type_ids = [await get_race_type_id(race.race_info, register=True) for race in races]
 
     async with DBConnect(commit=True) as cursor:
-        # Record the race
-        race_params = (
-            race.start_datetime.strftime('%Y-%m-%d %H:%M:%S'),
-            type_id,
-            race.race_info.seed,
-            race.race_info.condor_race,
-            race.race_info.private_race,
-        )
-
-        cursor.execute(
-            """
-            INSERT INTO {0} 
-                (timestamp, type_id, seed, condor, private) 
-            VALUES (%s,%s,%s,%s,%s)
-            """.format(tn('races')),
-            race_params
-        )
-
-        # Store the new race ID in the Race object
-        cursor.execute("SELECT LAST_INSERT_ID()")
-        race.race_id = int(cursor.fetchone()[0])
-
-        # Record each racer in race_runs
-        rank = 1
-        for racer in race.racers:
-            racer_params = (race.race_id, racer.user_id, racer.time, rank, racer.igt, racer.comment, racer.level)
-            cursor.execute(
+        # Each race's ID is needed for its runs, so races are inserted one at a time
+        for race, type_id in zip(races, type_ids):
+            race_params = (
+                race.start_datetime.strftime('%Y-%m-%d %H:%M:%S'),
+                type_id,
+                race.race_info.seed,
+                race.race_info.condor_race,
+                race.race_info.private_race,
+            )
+            await cursor.execute_async(
+                """
+                INSERT INTO {0} 
+                    (timestamp, type_id, seed, condor, private) 
+                VALUES (%s,%s,%s,%s,%s)
+                """.format(tn('races')),
+                race_params
+            )
+            race.race_id = int(cursor.lastrowid)
+
+        # Record every racer in race_runs
+        run_params = []
+        for race in races:
+            rank = 1
+            for racer in race.racers:
+                run_params.append(
+                    (race.race_id, racer.user_id, racer.time, rank, racer.igt, racer.comment, racer.level,)
+                )
+                if racer.is_finished:
+                    rank += 1
+
+        if run_params:
+            await cursor.executemany_async(
                 """
                 INSERT INTO {0} 
                     (race_id, user_id, time, rank, igt, comment, level) 
                 VALUES (%s,%s,%s,%s,%s,%s,%s)
                 """.format(tn('race_runs')),
-                racer_params
+                run_params
             )
-            if racer.is_finished:
-                rank += 1
 
 
 # Race type functions-------------------------------------------------------------------
+# The race_types table is small and rarely changes, so it is read into memory once and kept in both directions. New
+# race types are written through to the table and the cache.
+_race_type_ids = dict()         # type: Dict[tuple, int]
+_race_type_params = dict()      # type: Dict[int, tuple]
+_race_types_loaded = False
+_race_type_lock = asyncio.Lock()
+
+
+def invalidate_race_type_cache() -> None:
+    """Forget the cached race types; they will be read from the database again on next use."""
+    global _race_types_loaded
+    _race_type_ids.clear()
+    _race_type_params.clear()
+    _race_types_loaded = False
+
+
+async def preload_race_types() -> None:
+    """Read every race type into the cache, if this hasn't already been done."""
+    global _race_types_loaded
+    # Checked before taking the lock, so that cached lookups never wait behind a cache miss
+    if _race_types_loaded:
+        return
+
+    async with _race_type_lock:
+        if _race_types_loaded:
+            return
+
+        async with DBConnect(commit=False) as cursor:
+            await cursor.execute_async(
+                """
+                SELECT `type_id`, `character`, `descriptor`, `seeded`, `amplified`, `seed_fixed` 
+                FROM `race_types`
+                """
+            )
+            for row in cursor.fetchall():
+                _cache_race_type(int(row[0]), (row[1], row[2], bool(row[3]), bool(row[4]), bool(row[5]),))
+        _race_types_loaded = True
+
+
 async def get_race_type_id(race_info: RaceInfo, register: bool = False) -> int or None:
-    params = (
-        race_info.character_str,
-        race_info.descriptor,
-        race_info.seeded,
-        race_info.amplified,
-        race_info.seed_fixed,
-    )
+    params = _race_type_params_of(race_info)
 
-    async with DBConnect(commit=False) as cursor:
-        cursor.execute(
-            """
-            SELECT `type_id` 
-            FROM `race_types` 
-            WHERE `character`=%s 
-               AND `descriptor`=%s 
-               AND `seeded`=%s 
-               AND `amplified`=%s 
-               AND `seed_fixed`=%s 
-            LIMIT 1
-            """,
-            params
-        )
+    await preload_race_types()
+    type_id = _race_type_ids.get(_race_type_key(params))
+    if type_id is not None:
+        return type_id
 
-        row = cursor.fetchone()
-        if row is not None:
-            return int(row[0])
+    # If here, the race type is not cached; another process may have created it since the cache was loaded, so check
+    # the table before creating it
+    async with _race_type_lock:
+        # Another task may have cached this type while we waited
+        type_id = _race_type_ids.get(_race_type_key(params))
+        if type_id is not None:
+            return type_id
 
-    # If here, the race type was not found
-    if not register:
-        return None
+        async with DBConnect(commit=True) as cursor:
+            await cursor.execute_async(
+                """
+                SELECT `type_id` 
+                FROM `race_types` 
+                WHERE `character`=%s 
+                   AND `descriptor`=%s 
+                   AND `seeded`=%s 
+                   AND `amplified`=%s 
+                   AND `seed_fixed`=%s 
+                ORDER BY `type_id` ASC 
+                LIMIT 1
+                """,
+                params
+            )
+            row = cursor.fetchone()
+            if row is not None:
+                type_id = int(row[0])
+            elif register:
+                await cursor.execute_async(
+                    """
+                    INSERT INTO race_types 
+                    (`character`, descriptor, seeded, amplified, seed_fixed) 
+                    VALUES (%s, %s, %s, %s, %s)
+                    """,
+                    params
+                )
+                await cursor.execute_async("SELECT LAST_INSERT_ID()")
+                type_id = int(cursor.fetchone()[0])
+            else:
+                return None
 
-    # Create the new race type
-    async with DBConnect(commit=True) as cursor:
-        cursor.execute(
-            """
-            INSERT INTO race_types 
-            (`character`, descriptor, seeded, amplified, seed_fixed) 
-            VALUES (%s, %s, %s, %s, %s)
-            """,
-            params
-        )
-        cursor.execute("SELECT LAST_INSERT_ID()")
-        return int(cursor.fetchone()[0])
+        _cache_race_type(type_id, params)
+        return type_id
 
 
 async def get_race_info_from_type_id(race_type: int) -> RaceInfo or None:
-    params = (race_type,)
-    async with DBConnect(commit=False) as cursor:
-        cursor.execute(
-            """
-            SELECT `character`, `descriptor`, `seeded`, `amplified`, `seed_fixed` 
-            FROM `race_types` 
-            WHERE `type_id`=%s
-            """,
-            params
-        )
-
-        row = cursor.fetchone()
-        if row is not None:
-            race_info = RaceInfo()
-            race_info.set_char(row[0])
-            race_info.descriptor = row[1]
-            race_info.seeded = bool(row[2])
-            race_info.amplified = bool(row[3])
-            race_info.seed_fixed = bool(row[4])
-            return race_info
-        else:
+    await preload_race_types()
+    params = _race_type_params.get(int(race_type))
+    if params is None:
+        # Not cached; another process may have created this type since the cache was loaded
+        async with DBConnect(commit=False) as cursor:
+            await cursor.execute_async(
+                """
+                SELECT `character`, `descriptor`, `seeded`, `amplified`, `seed_fixed` 
+                FROM `race_types` 
+                WHERE `type_id`=%s 
+                LIMIT 1
+                """,
+                (int(race_type),)
+            )
+            row = cursor.fetchone()
+        if row is None:
             return None
+        params = (row[0], row[1], bool(row[2]), bool(row[3]), bool(row[4]),)
+        _cache_race_type(int(race_type), params)
+
+    race_info = RaceInfo()
+    race_info.set_char(params[0])
+    race_info.descriptor = params[1]
+    race_info.seeded = params[2]
+    race_info.amplified = params[3]
+    race_info.seed_fixed = params[4]
+    return race_info
+
+
+def _race_type_params_of(race_info: RaceInfo) -> tuple:
+    return (
+        race_info.character_str,
+        race_info.descriptor,
+        bool(race_info.seeded),
+        bool(race_info.amplified),
+        bool(race_info.seed_fixed),
+    )
+
+
+def _race_type_key(params: tuple) -> tuple:
+    # The race_types columns compare case-insensitively
+    return tuple(p.lower() if isinstance(p, str) else p for p in params)
+
+
+def _cache_race_type(type_id: int, params: tuple) -> None:
+    _race_type_ids.setdefault(_race_type_key(params), type_id)
+    _race_type_params[type_id] = params
 
 
 # Stat functions-------------------------------------------------------------------
-async def get_allzones_race_numbers(user_id: int, amplified: bool) -> list:
+async def get_allzones_race_sums(user_id: int, after_race_id: int = 0) -> list:
+    """Per-character totals of the user's public seeded all-zones races with race_id > after_race_id.
+
+    Returns
+    -------
+    list
+        One row per (character, amplified) pair, of the form (character, amplified, number_of_races,
+        number_of_finishes, total_finish_time, total_squared_finish_time, largest_race_id).
+    """
     async with DBConnect(commit=False) as cursor:
-        params = (user_id,)
-        cursor.execute(
+        params = (user_id, after_race_id,)
+        await cursor.execute_async(
             """
-            SELECT `race_types`.`character`, COUNT(*) as num 
+            SELECT 
+                `race_types`.`character`, 
+                `race_types`.`amplified`, 
+                COUNT(*), 
+                SUM(IF({1}.`level` = -2, 1, 0)), 
+                SUM(IF({1}.`level` = -2, {1}.`time`, 0)), 
+                SUM(IF({1}.`level` = -2, {1}.`time` * {1}.`time`, 0)), 
+                MAX({1}.`race_id`) 
             FROM {1} 
                 INNER JOIN {0} ON {0}.`race_id` = {1}.`race_id` 
                 INNER JOIN race_types ON {0}.`type_id` = `race_types`.`type_id` 
             WHERE {1}.`user_id` = %s 
+                AND {1}.`race_id` > %s 
                 AND `race_types`.`descriptor` = 'All-zones' 
-                AND {2}`race_types`.`amplified` 
                 AND `race_types`.`seeded` AND NOT {0}.`private` 
-            GROUP BY `race_types`.`character` 
-            ORDER BY num DESC
-            """.format(tn('races'), tn('race_runs'), 'NOT ' if not amplified else ''),
+            GROUP BY `race_types`.`character`, `race_types`.`amplified`
+            """.format(tn('races'), tn('race_runs')),
             params)
         return cursor.fetchall()
 
 
-async def get_all_racedata(user_id: int, char_name: str, amplified: bool) -> list:
-    async with DBConnect(commit=False) as cursor:
-        params = (user_id, char_name)
-        cursor.execute(
-            """
-            SELECT {1}.`time`, {1}.`level` 
-            FROM {1} 
-                INNER JOIN {0} ON {0}.`race_id` = {1}.`race_id` 
-                INNER JOIN `race_types` ON {0}.`type_id` = `race_types`.`type_id` 
-            WHERE {1}.`user_id` = %s 
-                AND `race_types`.`character` = %s 
-                AND `race_types`.`descriptor` = 'All-zones' 
-                AND {2}`race_types`.`amplified` 
-                AND race_types.seeded AND NOT {0}.`private`
-            """.format(tn('races'), tn('race_runs'), 'NOT ' if not amplified else ''),
-            params
-        )
-        return cursor.fetchall()
-
-
 async def get_fastest_times_leaderboard(character_name: str, amplified: bool, limit: int) -> list:
     async with DBConnect(commit=False) as cursor:
         params = {'character': character_name, 'limit': limit, }
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT
                 users.`discord_name`,
@@ -215,7 +340,7 @@ async def get_fastest_times_leaderboard(character_name: str, amplified: bool, li
 async def get_most_races_leaderboard(character_name: str, limit: int) -> list:
     async with DBConnect(commit=False) as cursor:
         params = (character_name, character_name, limit,)
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT 
                 user_name, 
@@ -260,7 +385,7 @@ async def get_most_races_leaderboard(character_name: str, limit: int) -> list:
 async def get_largest_race_number(user_id: int) -> int:
     async with DBConnect(commit=False) as cursor:
         params = (user_id,)
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT race_id 
             FROM {0} 
@@ -0,0 +1,330 @@
+"""
+Append-only journals of race state, so that races in progress survive a restart.
+
+Each room running a race keeps a journal, <Config.LOG_DIRECTORY>/<Config.RACE_JOURNAL_DIRECTORY>/<channel ID>.journal.
+When the room's race changes, a RaceSnapshot of the whole race is appended to the journal; when the room starts a new
+race, the journal is started over. Snapshots are packed with struct, and each is prefixed with its length and a CRC32,
+so a snapshot that was only partly written when the bot went down is ignored on replay.
+
+Journal files are written on a single worker thread, so writes never block the event loop and happen in order. On
+startup, replaying a journal gives its last complete snapshot, which the room restores its race from.
+"""
+
+import asyncio
+import concurrent.futures
+import datetime
+import os
+import struct
+import tempfile
+import time
+import unittest
+import zlib
+from typing import List, Optional
+
+from necrobot.config import Config
+from necrobot.race.raceconfig import RaceConfig
+from necrobot.race.raceinfo import RaceInfo
+from necrobot.util import console
+from necrobot.util.necrodancer.character import NDChar
+
+# Journal files are small and written often; they share one worker thread, so each journal is written in order
+_journal_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='necrobot-racejournal')
+
+_FORMAT_VERSION = 1
+_RECORD_HEADER = struct.Struct('<II')               # payload length, payload CRC32
+_SNAPSHOT = struct.Struct('<BBBBHQddd')             # version, room kind, status, contested, race number,
+                                                    # match ID, wall time, elapsed seconds, start timestamp
+_RACE_INFO = struct.Struct('<qB')                   # seed, flags
+_RACE_CONFIG = struct.Struct('<HHhHH')              # countdown, unpause countdown, incremental start, finalize time,
+                                                    # auto-forfeit
+_RACER = struct.Struct('<QBbii')                    # discord ID, status, level, time, IGT
+_COUNT = struct.Struct('<H')
+
+_RACE_INFO_FLAGS = ['seeded', 'seed_fixed', 'amplified', 'can_be_solo', 'post_results', 'condor_race', 'private_race']
+
+
+class RoomKind(object):
+    RACE_ROOM = 1
+    MATCH_ROOM = 2
+
+
+class RacerSnapshot(object):
+    def __init__(self, discord_id: int, status: int, level: int, time: int, igt: int, comment: str):
+        self.discord_id = discord_id
+        self.status = status
+        self.level = level
+        self.time = time
+        self.igt = igt
+        self.comment = comment
+
+
+class RaceSnapshot(object):
+    """The state of a race, and of the room running it, at one moment.
+
+    Times are stored against the wall clock (time.time()), since the system clock used while racing (time.monotonic())
+    doesn't carry over a restart. `elapsed` is the race time, in seconds, when the snapshot was taken.
+    """
+    def __init__(
+            self,
+            status: int,
+            race_info: RaceInfo,
+            race_config: RaceConfig,
+            racers: List[RacerSnapshot],
+            elapsed: float = 0.0,
+            start_datetime: Optional[datetime.datetime] = None,
+            wall_time: float = None
+    ):
+        self.status = status
+        self.race_info = race_info
+        self.race_config = race_config
+        self.racers = racers
+        self.elapsed = elapsed
+        self.start_datetime = start_datetime
+        self.wall_time = wall_time if wall_time is not None else time.time()
+
+        # Set by the room
+        self.room_kind = RoomKind.RACE_ROOM
+        self.race_number = 0
+        self.match_id = None        # type: Optional[int]
+        self.contested = False
+
+    def pack(self) -> bytes:
+        start_timestamp = self.start_datetime.replace(tzinfo=datetime.timezone.utc).timestamp() \
+            if self.start_datetime is not None else 0.0
+        parts = [
+            _SNAPSHOT.pack(
+                _FORMAT_VERSION, self.room_kind, self.status, self.contested, self.race_number,
+                self.match_id if self.match_id is not None else 0, self.wall_time, self.elapsed, start_timestamp
+            ),
+            _RACE_INFO.pack(
+                self.race_info.seed,
+                sum(1 << idx for idx, flag in enumerate(_RACE_INFO_FLAGS) if getattr(self.race_info, flag))
+            ),
+            _pack_str(self.race_info.character.name if self.race_info.character is not None else ''),
+            _pack_str(self.race_info.descriptor),
+            _RACE_CONFIG.pack(
+                self.race_config.countdown_length,
+                self.race_config.unpause_countdown_length,
+                self.race_config.incremental_countdown_start
+                if self.race_config.incremental_countdown_start is not None else -1,
+                self.race_config.finalize_time_sec,
+                self.race_config.auto_forfeit
+            ),
+            _COUNT.pack(len(self.racers)),
+        ]
+        for racer in self.racers:
+            parts.append(_RACER.pack(racer.discord_id, racer.status, racer.level, racer.time, racer.igt))
+            parts.append(_pack_str(racer.comment))
+        return b''.join(parts)
+
+    @staticmethod
+    def unpack(data: bytes) -> 'RaceSnapshot':
+        version, room_kind, status, contested, race_number, match_id, wall_time, elapsed, start_timestamp = \
+            _SNAPSHOT.unpack_from(data, 0)
+        if version != _FORMAT_VERSION:
+            raise ValueError('Unknown race snapshot version {0}.'.format(version))
+        offset = _SNAPSHOT.size
+
+        race_info = RaceInfo()
+        race_info.seed, flags = _RACE_INFO.unpack_from(data, offset)
+        offset += _RACE_INFO.size
+        for idx, flag in enumerate(_RACE_INFO_FLAGS):
+            setattr(race_info, flag, bool(flags & (1 << idx)))
+        character, offset = _unpack_str(data, offset)
+        race_info.character = NDChar[character] if character else None
+        race_info.descriptor, offset = _unpack_str(data, offset)
+
+        countdown, unpause_countdown, incremental_start, finalize_time, auto_forfeit = \
+            _RACE_CONFIG.unpack_from(data, offset)
+        offset += _RACE_CONFIG.size
+        race_config = RaceConfig(
+            countdown_length=countdown,
+            unpause_countdown_length=unpause_countdown,
+            incremental_countdown_start=incremental_start if incremental_start >= 0 else None,
+            finalize_time_sec=finalize_time,
+            auto_forfeit=auto_forfeit
+        )
+
+        num_racers, = _COUNT.unpack_from(data, offset)
+        offset += _COUNT.size
+        racers = []
+        for _ in range(num_racers):
+            discord_id, racer_status, level, racer_time, igt = _RACER.unpack_from(data, offset)
+            offset += _RACER.size
+            comment, offset = _unpack_str(data, offset)
+            racers.append(RacerSnapshot(
+                discord_id=discord_id, status=racer_status, level=level, time=racer_time, igt=igt, comment=comment
+            ))
+
+        snapshot = RaceSnapshot(
+            status=status,
+            race_info=race_info,
+            race_config=race_config,
+            racers=racers,
+            elapsed=elapsed,
+            start_datetime=datetime.datetime.utcfromtimestamp(start_timestamp) if start_timestamp else None,
+            wall_time=wall_time
+        )
+        snapshot.room_kind = room_kind
+        snapshot.race_number = race_number
+        snapshot.match_id = match_id if match_id else None
+        snapshot.contested = bool(contested)
+        return snapshot
+
+
+def append(channel_id: int, snapshot: RaceSnapshot, new_race: bool = False) -> None:
+    """Append the snapshot to the channel's journal, without waiting for it to be written. If new_race is True, the
+    journal is started over."""
+    data = snapshot.pack()
+    record = _RECORD_HEADER.pack(len(data), zlib.crc32(data)) + data
+    future = _journal_executor.submit(_write, _journal_path(channel_id), record, 'wb' if new_race else 'ab')
+    future.add_done_callback(_log_failure)
+
+
+def discard(channel_id: int) -> None:
+    """Delete the channel's journal, if it has one."""
+    future = _journal_executor.submit(_remove, _journal_path(channel_id))
+    future.add_done_callback(_log_failure)
+
+
+async def load(channel_id: int) -> Optional[RaceSnapshot]:
+    """The last complete snapshot in the channel's journal, or None if it has none."""
+    return await asyncio.get_event_loop().run_in_executor(_journal_executor, replay, _journal_path(channel_id))
+
+
+async def journaled_channel_ids() -> List[int]:
+    """The IDs of the channels that have a journal."""
+    return await asyncio.get_event_loop().run_in_executor(_journal_executor, _list_channel_ids)
+
+
+def replay(path: str) -> Optional[RaceSnapshot]:
+    """Read the journal at the given path, and return its last complete snapshot."""
+    try:
+        with open(path, 'rb') as journal:
+            contents = journal.read()
+    except FileNotFoundError:
+        return None
+
+    last_record = None
+    offset = 0
+    while offset + _RECORD_HEADER.size <= len(contents):
+        length, crc = _RECORD_HEADER.unpack_from(contents, offset)
+        start = offset + _RECORD_HEADER.size
+        record = contents[start:start + length]
+        if len(record) < length or zlib.crc32(record) != crc:
+            console.warning('Race journal {0} has an incomplete snapshot at byte {1}; ignoring the rest.', path, offset)
+            break
+        last_record = record
+        offset = start + length
+
+    if last_record is None:
+        return None
+    try:
+        return RaceSnapshot.unpack(last_record)
+    except (struct.error, ValueError, KeyError) as e:
+        console.warning('Couldn\'t read the last snapshot in race journal {0}: {1}', path, e)
+        return None
+
+
+def _journal_directory() -> str:
+    return os.path.join(Config.LOG_DIRECTORY, Config.RACE_JOURNAL_DIRECTORY)
+
+
+def _journal_path(channel_id: int) -> str:
+    return os.path.join(_journal_directory(), '{0}.journal'.format(channel_id))
+
+
+def _list_channel_ids() -> List[int]:
+    try:
+        filenames = os.listdir(_journal_directory())
+    except FileNotFoundError:
+        return []
+    return [int(filename[:-len('.journal')]) for filename in filenames
+            if filename.endswith('.journal') and filename[:-len('.journal')].isdigit()]
+
+
+def _write(path: str, record: bytes, mode: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, mode) as journal:
+        journal.write(record)
+        journal.flush()
+        os.fsync(journal.fileno())
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _log_failure(future: concurrent.futures.Future) -> None:
+    if future.exception() is not None:
+        console.warning('Failed to write a race journal: {0}', future.exception())
+
+
+def _pack_str(s: str) -> bytes:
+    encoded = s.encode('utf-8')[:0xFFFF]
+    return _COUNT.pack(len(encoded)) + encoded
+
+
+def _unpack_str(data: bytes, offset: int):
+    length, = _COUNT.unpack_from(data, offset)
+    offset += _COUNT.size
+    return data[offset:offset + length].decode('utf-8', errors='replace'), offset + length
+
+
+def _make_test_snapshot(num_racers: int) -> RaceSnapshot:
+    race_info = RaceInfo()
+    race_info.seed = 12345
+    race_info.descriptor = 'Story mode'
+    snapshot = RaceSnapshot(
+        status=3,
+        race_info=race_info,
+        race_config=RaceConfig(finalize_time_sec=15, auto_forfeit=1),
+        racers=[
+            RacerSnapshot(discord_id=10**17 + idx, status=3 + idx % 3, level=-2, time=idx*1000, igt=-1,
+                          comment='comment {0}'.format(idx))
+            for idx in range(num_racers)
+        ],
+        elapsed=123.45,
+        start_datetime=datetime.datetime(2020, 1, 1, 12, 30)
+    )
+    snapshot.room_kind = RoomKind.MATCH_ROOM
+    snapshot.race_number = 3
+    snapshot.match_id = 77
+    return snapshot
+
+
+class TestRaceJournal(unittest.TestCase):
+    def test_pack(self):
+        snapshot = RaceSnapshot.unpack(_make_test_snapshot(num_racers=3).pack())
+        self.assertEqual(snapshot.status, 3)
+        self.assertEqual(snapshot.match_id, 77)
+        self.assertEqual(snapshot.race_number, 3)
+        self.assertEqual(snapshot.race_info.seed, 12345)
+        self.assertEqual(snapshot.race_info.character, NDChar.Cadence)
+        self.assertEqual(snapshot.race_info.descriptor, 'Story mode')
+        self.assertTrue(snapshot.race_info.seeded)
+        self.assertFalse(snapshot.race_info.seed_fixed)
+        self.assertEqual(snapshot.race_config.finalize_time_sec, 15)
+        self.assertEqual(snapshot.start_datetime, datetime.datetime(2020, 1, 1, 12, 30))
+        self.assertAlmostEqual(snapshot.elapsed, 123.45)
+        self.assertEqual([r.time for r in snapshot.racers], [0, 1000, 2000])
+        self.assertEqual(snapshot.racers[2].comment, 'comment 2')
+
+    def test_replay_ignores_partial_record(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, '1.journal')
+            first = _make_test_snapshot(num_racers=1)
+            second = _make_test_snapshot(num_racers=2)
+            for snapshot in [first, second]:
+                data = snapshot.pack()
+                _write(path, _RECORD_HEADER.pack(len(data), zlib.crc32(data)) + data, 'ab')
+            self.assertEqual(len(replay(path).racers), 2)
+
+            # A snapshot cut short by a crash
+            data = _make_test_snapshot(num_racers=3).pack()
+            _write(path, _RECORD_HEADER.pack(len(data), zlib.crc32(data)) + data[:-5], 'ab')
+            self.assertEqual(len(replay(path).racers), 2)
+            self.assertIsNone(replay(os.path.join(directory, '2.journal')))
@@ -1,5 +1,6 @@
 import discord
 
+from necrobot.race.racejournal import RacerSnapshot
 from necrobot.race.racerstatus import RacerStatus
 from necrobot.user import userlib
 from necrobot.user.necrouser import NecroUser
@@ -150,3 +151,20 @@ class Racer(object):
 
     def add_comment(self, comment: str):
         self.comment = comment
+
+    def snapshot(self) -> RacerSnapshot:
+        return RacerSnapshot(
+            discord_id=self._discord_id,
+            status=int(self._state),
+            level=self.level,
+            time=self.time,
+            igt=self.igt,
+            comment=self.comment
+        )
+
+    def restore(self, snapshot: RacerSnapshot):
+        self._state = RacerStatus(snapshot.status)
+        self.level = snapshot.level
+        self.time = snapshot.time
+        self.igt = snapshot.igt
+        self.comment = snapshot.comment
@@ -1,5 +1,9 @@
+import asyncio
 import math
+import time
+import unittest
 
+from necrobot.config import Config
 from necrobot.race import racedb
 from necrobot.util import console, racetime
 from necrobot.util.necrodancer.character import NDChar
@@ -76,74 +80,114 @@ class GeneralStats(object):
         return CharacterStats(char)
 
 
+class RunningSums(object):
+    """Running totals for one user's races with one character, from which CharacterStats can be computed."""
+    def __init__(self):
+        self.number_of_races = 0
+        self.number_of_wins = 0
+        self.total_time = 0
+        self.total_squared_time = 0
+
+    def fold(self, number_of_races: int, number_of_wins: int, total_time: int, total_squared_time: int) -> None:
+        self.number_of_races += number_of_races
+        self.number_of_wins += number_of_wins
+        self.total_time += total_time
+        self.total_squared_time += total_squared_time
+
+    def make_charstats(self, ndchar: NDChar) -> CharacterStats:
+        charstats = CharacterStats(ndchar)
+        charstats.number_of_races = self.number_of_races
+        number_of_wins = self.number_of_wins
+
+        if number_of_wins > 0:
+            charstats.mean = self.total_time / number_of_wins
+
+        if number_of_wins > 1:
+            charstats.has_wins = True
+            charstats.var = \
+                (self.total_squared_time / (number_of_wins-1)) - charstats.mean * self.total_time/(number_of_wins-1)
+
+        if self.number_of_races > 0:
+            charstats.winrate = number_of_wins / self.number_of_races
+
+        return charstats
+
+
 class StatCache(object, metaclass=Singleton):
     class CachedStats(object):
         def __init__(self):
-            self.last_race_number_amplified = 0      # The number of the last race when amplified was cached
-            self.last_race_number_base = 0           # The number of the last race when base was cached
-            self.amplified_stats = GeneralStats()
-            self.base_stats = GeneralStats()
+            self.last_race_number = 0       # The largest race ID folded into the sums
+            self.sums = {}                  # Map from (NDChar, amplified) to RunningSums
+            self.general_stats = {}         # Map from amplified to GeneralStats, built from sums on demand
+            self.computed_at = time.monotonic()
+            self.lock = asyncio.Lock()
+
+        @property
+        def expired(self) -> bool:
+            return time.monotonic() - self.computed_at > Config.RACE_STATS_RECOMPUTE_TIME.total_seconds()
+
+        def reset(self) -> None:
+            self.last_race_number = 0
+            self.sums.clear()
+            self.general_stats.clear()
+            self.computed_at = time.monotonic()
+
+        def fold_row(self, row) -> None:
+            ndchar = NDChar.fromstr(row[0])
+            if ndchar is not None:
+                key = (ndchar, bool(row[1]),)
+                if key not in self.sums:
+                    self.sums[key] = RunningSums()
+                self.sums[key].fold(
+                    number_of_races=int(row[2]),
+                    number_of_wins=int(row[3]),
+                    total_time=int(row[4]),
+                    total_squared_time=int(row[5])
+                )
+            self.last_race_number = max(self.last_race_number, int(row[6]))
+
+        def make_general_stats(self, amplified: bool) -> GeneralStats:
+            general_stats = GeneralStats()
+            for (ndchar, amp), sums in self.sums.items():
+                if amp == amplified:
+                    general_stats.insert_charstats(sums.make_charstats(ndchar))
+            return general_stats
 
     def __init__(self):
-        self._cache = {}  # Map from discord ID's to UserStats
-
-    async def get_general_stats(self, user_id, amplified) -> GeneralStats:
-        last_race_number = await racedb.get_largest_race_number(user_id=user_id)
-
-        # Check whether we have an up-to-date cached version, and if so, return it
-        cached_data = self.CachedStats()
-        if user_id in self._cache:
-            cached_data = self._cache[user_id]
-            if amplified:
-                if cached_data.last_race_number_amplified == last_race_number:
-                    return cached_data.amplified_stats
-            else:
-                if cached_data.last_race_number_base == last_race_number:
-                    return cached_data.base_stats
-
-        # If here, the cache is out-of-date
-        general_stats = GeneralStats()
-        for row in await racedb.get_allzones_race_numbers(user_id=user_id, amplified=amplified):
-            char = NDChar.fromstr(row[0])
-            charstats = CharacterStats(char)
-            charstats.number_of_races = int(row[1])
-            total_time = 0
-            total_squared_time = 0
-            number_of_wins = 0
-            number_of_forfeits = 0
-            for stat_row in await racedb.get_all_racedata(user_id=user_id, char_name=char.name, amplified=amplified):
-                if int(stat_row[1]) == -2:  # finish
-                    time = int(stat_row[0])
-                    total_time += time
-                    total_squared_time += time * time
-                    number_of_wins += 1
-                else:
-                    number_of_forfeits += 1
-
-            if number_of_wins > 0:
-                charstats.mean = total_time / number_of_wins
-
-            if number_of_wins > 1:
-                charstats.has_wins = True
-                charstats.var = \
-                    (total_squared_time / (number_of_wins-1)) - charstats.mean * total_time/(number_of_wins-1)
-
-            if number_of_wins + number_of_forfeits > 0:
-                charstats.winrate = number_of_wins / (number_of_wins + number_of_forfeits)
-
-            general_stats.insert_charstats(charstats)
-
-        # Update the cache
-        if amplified:
-            cached_data.last_race_number_amplified = last_race_number
-            cached_data.amplified_stats = general_stats
+        self._cache = {}  # Map from user ID's to CachedStats
+
+    def invalidate(self, user_id: int = None) -> None:
+        """Forget the cached stats for the given user, or for everyone if user_id is None. Needed only if race
+        data is changed or deleted; new races are picked up automatically (those committed out of race ID order, within
+        Config.RACE_STATS_RECOMPUTE_TIME)."""
+        if user_id is None:
+            self._cache.clear()
         else:
-            cached_data.last_race_number_base = last_race_number
-            cached_data.base_stats = general_stats
-        self._cache[user_id] = cached_data
+            self._cache.pop(user_id, None)
 
-        # Return
-        return general_stats
+    async def get_general_stats(self, user_id, amplified) -> GeneralStats:
+        if user_id not in self._cache:
+            self._cache[user_id] = self.CachedStats()
+        cached_data = self._cache[user_id]
+
+        # Fold in any races newer than the ones we've already seen; the lock prevents two concurrent calls from
+        # folding in the same races twice. Race IDs needn't be committed in order (another process may commit a race
+        # after one with a larger ID has been folded in), so every so often the sums are recomputed from scratch.
+        async with cached_data.lock:
+            if cached_data.expired:
+                cached_data.reset()
+            new_rows = await racedb.get_allzones_race_sums(
+                user_id=user_id,
+                after_race_id=cached_data.last_race_number
+            )
+            if new_rows:
+                for row in new_rows:
+                    cached_data.fold_row(row)
+                cached_data.general_stats.clear()
+
+            if amplified not in cached_data.general_stats:
+                cached_data.general_stats[amplified] = cached_data.make_general_stats(amplified)
+            return cached_data.general_stats[amplified]
 
 
 async def get_general_stats(user_id: int, amplified: bool) -> GeneralStats:
@@ -194,3 +238,33 @@ async def get_fastest_times_infotext(ndchar: NDChar, amplified: bool, limit: int
             row[2],
             row[3].strftime("%b %d, %Y"))
     return infotext
+
+
+class TestRunningSums(unittest.TestCase):
+    def test_fold(self):
+        times = [1000, 1200, 1100]
+        folded = RunningSums()
+        folded.fold(2, 2, times[0] + times[1], times[0]**2 + times[1]**2)
+        folded.fold(2, 1, times[2], times[2]**2)
+
+        stats = folded.make_charstats(NDChar.Cadence)
+        self.assertEqual(stats.number_of_races, 4)
+        self.assertAlmostEqual(stats.mean, 1100)
+        self.assertAlmostEqual(stats.var, 10000)
+        self.assertAlmostEqual(stats.winrate, 0.75)
+        self.assertTrue(stats.has_wins)
+
+
+class TestCachedStats(unittest.TestCase):
+    def test_reset(self):
+        cached_stats = StatCache.CachedStats()
+        cached_stats.fold_row(('Cadence', 0, 2, 1, 1000, 1000**2, 17,))
+        self.assertEqual(cached_stats.last_race_number, 17)
+        self.assertFalse(cached_stats.expired)
+
+        cached_stats.computed_at -= Config.RACE_STATS_RECOMPUTE_TIME.total_seconds() + 1
+        self.assertTrue(cached_stats.expired)
+        cached_stats.reset()
+        self.assertEqual(cached_stats.last_race_number, 0)
+        self.assertEqual(cached_stats.sums, {})
+        self.assertFalse(cached_stats.expired)
@@ -1,10 +1,14 @@
-import discord
+import asyncio
+import time
 
 from necrobot.botbase.necrobot import Necrobot
 from necrobot.config import Config
+from necrobot.race import racejournal
 from necrobot.race.publicrace.raceroom import RaceRoom
+from necrobot.race.raceinfo import RaceInfo
 from necrobot.user.userprefs import UserPrefs
 from necrobot.util import console
+from necrobot.util.dmbroadcast import DMBroadcaster
 from necrobot.util import server
 from necrobot.user import userdb
 
@@ -30,20 +34,48 @@ async def make_room(race_info):
 
     Necrobot().register_bot_channel(race_channel, new_room)
 
-    # Send PM alerts
-    alert_pref = UserPrefs(daily_alert=None, race_alert=True)
+    # Send PM alerts, without waiting for them to be delivered
+    asyncio.ensure_future(_send_race_alerts(race_channel, race_info))
+
+    return race_channel
+
+
+async def recover_race_rooms():
+    """Remake the race rooms that had a race journal when the bot went down, restoring their races. Race room
+    journals for channels that no longer exist are deleted."""
+    start_time = time.monotonic()
+    num_recovered = 0
+    for channel_id in await racejournal.journaled_channel_ids():
+        snapshot = await racejournal.load(channel_id)
+        if snapshot is None or snapshot.room_kind != racejournal.RoomKind.RACE_ROOM:
+            continue
+
+        race_channel = server.find_channel(channel_id=channel_id)
+        if race_channel is None:
+            racejournal.discard(channel_id)
+            continue
+
+        new_room = RaceRoom(race_discord_channel=race_channel, race_info=RaceInfo.copy(snapshot.race_info))
+        try:
+            await new_room.recover(snapshot)
+        except Exception as e:
+            console.error('Failed to recover the race room in channel {0}: {1}', channel_id, e)
+            continue
+        Necrobot().register_bot_channel(race_channel, new_room)
+        num_recovered += 1
 
+    console.info('Recovered {0} race rooms in {1:.2f}s.', num_recovered, time.monotonic() - start_time)
+
+
+async def _send_race_alerts(race_channel, race_info):
+    alert_pref = UserPrefs(daily_alert=None, race_alert=True)
     alert_string = 'A new race has been started:\nFormat: {1}\nChannel: {0}'.format(
         race_channel.mention, race_info.format_str)
-    for member_id in await userdb.get_all_discord_ids_matching_prefs(alert_pref):
-        member = server.find_member(discord_id=member_id)
-        if member is not None:
-            try:
-                await member.send(alert_string)
-            except discord.errors.Forbidden:
-                continue
-
-    return race_channel
+    await DMBroadcaster().broadcast(
+        name='Race alert for #{0}'.format(race_channel.name),
+        discord_ids=await userdb.get_all_discord_ids_matching_prefs(alert_pref),
+        content=alert_string
+    )
 
 
 # Return a new (unique) race room name from the race info
@@ -16,6 +16,9 @@ class MainBotChannel(BotChannel):
         self.channel_commands = [
             cmd_admin.Die(self),
             # cmd_admin.Reboot(self),
+            cmd_admin.Broadcasts(self),
+            cmd_admin.DBStats(self),
+            cmd_admin.ScheduledJobs(self),
 
             cmd_color.ColorMe(self),
 
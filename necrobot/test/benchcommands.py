@@ -0,0 +1,75 @@
+"""
+Benchmark for command dispatch: the time from a message's content to the list of CommandTypes that will handle it,
+for every kind of BotChannel.
+
+"old" is the previous path (shlex-split every message, then ask every CommandType in the channel whether it is
+called by the name); "new" reads only the command name and looks it up in the channel's command index.
+
+Run with `python -m necrobot.test.benchcommands`.
+"""
+
+import shlex
+import timeit
+
+from necrobot.botbase.command import parse_command_name
+from necrobot.config import Config
+from necrobot.condorbot.condoradminchannel import CondorAdminChannel
+from necrobot.condorbot.condormainchannel import CondorMainChannel
+from necrobot.condorbot.condorpmchannel import CondorPMChannel
+from necrobot.ladder.ladderadminchannel import LadderAdminChannel
+from necrobot.ladder.laddermainchannel import LadderMainChannel
+from necrobot.match.matchroom import MatchRoom
+from necrobot.race.publicrace.raceroom import RaceRoom
+from necrobot.racebot.mainchannel import MainBotChannel
+from necrobot.racebot.pmbotchannel import PMBotChannel
+
+
+def _old_dispatch(bot_channel, content: str) -> list:
+    args = shlex.split(content)
+    command = args.pop(0)[len(Config.BOT_COMMAND_PREFIX):].lower()
+    return [c for c in bot_channel.all_commands if command in c.command_name_list]
+
+
+def _new_dispatch(bot_channel, content: str) -> list:
+    # noinspection PyProtectedMember
+    return bot_channel._get_command_index().get(parse_command_name(content), ())
+
+
+def _time_per_message(dispatch, bot_channel, messages: list, number: int) -> float:
+    """Return the best-of-5 time to dispatch one message, in microseconds."""
+    def run():
+        for msg in messages:
+            dispatch(bot_channel, msg)
+    return min(timeit.repeat(run, number=number, repeat=5)) / (number * len(messages)) * 1e6
+
+
+def main():
+    bot_channels = [
+        MainBotChannel(),
+        PMBotChannel(),
+        CondorMainChannel(ladder=True),
+        CondorAdminChannel(),
+        CondorPMChannel(),
+        LadderMainChannel(),
+        LadderAdminChannel(),
+        RaceRoom(race_discord_channel=None, race_info=None),
+        MatchRoom(match_discord_channel=None, match=None),
+    ]
+
+    print('{0:<20} {1:>9} {2:>12} {3:>12}'.format('BotChannel', 'Commands', 'old us/msg', 'new us/msg'))
+    for bot_channel in bot_channels:
+        messages = [
+            '{0}{1} "some racer" cadence 4-2'.format(Config.BOT_COMMAND_PREFIX, name)
+            for cmd_type in bot_channel.all_commands for name in cmd_type.command_name_list
+        ]
+        messages.append('{0}notacommand with some args'.format(Config.BOT_COMMAND_PREFIX))
+
+        old_time = _time_per_message(_old_dispatch, bot_channel, messages, number=200)
+        new_time = _time_per_message(_new_dispatch, bot_channel, messages, number=200)
+        print('{0:<20} {1:>9} {2:>12.2f} {3:>12.2f}'.format(
+            type(bot_channel).__name__, len(bot_channel.all_commands), old_time, new_time
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Microbenchmark for necrobot.util.console, comparing the per-call cost of the current implementation against the
+old inspect.stack()-based caller lookup.
+
+Run with `python -m necrobot.test.benchconsole`.
+"""
+
+import inspect
+import logging
+import timeit
+
+from necrobot.util import console
+
+
+def _old_info(info_str: str):
+    caller_mod_name = inspect.getmodule(inspect.stack()[1][0]).__name__
+    logging.getLogger('necrobot').info('[{0}] {1}'.format(caller_mod_name, info_str))
+
+
+def _old_debug(info_str: str):
+    caller_mod_name = inspect.getmodule(inspect.stack()[1][0]).__name__
+    logging.getLogger('necrobot').debug('[{0}] {1}'.format(caller_mod_name, info_str))
+
+
+def _time_per_call(stmt, number: int) -> float:
+    """Return the best-of-5 time per call of stmt, in microseconds."""
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    logger = logging.getLogger('necrobot')
+    logger.propagate = False
+    logger.addHandler(logging.NullHandler())
+    logger.setLevel(logging.INFO)
+
+    row = ('race', 12345, 'Cadence', True)
+    cases = [
+        ('info (enabled), old', lambda: _old_info('Processing event of type {0}.'.format(row)), 200),
+        ('info (enabled), new', lambda: console.info('Processing event of type {0}.', row), 20000),
+        ('debug (disabled), old', lambda: _old_debug('Execute SQL: <{0}>'.format(row)), 200),
+        ('debug (disabled), new', lambda: console.debug('Execute SQL: <{0}>', row), 20000),
+    ]
+
+    print('{0:<24} {1:>12}'.format('Call', 'us/call'))
+    for name, stmt, number in cases:
+        print('{0:<24} {1:>12.2f}'.format(name, _time_per_call(stmt, number)))
+
+
+if __name__ == '__main__':
+    main()
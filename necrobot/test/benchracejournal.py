@@ -0,0 +1,42 @@
+"""
+Benchmark for race journals: the size of a race snapshot, the time to pack one into a journal record, and the time
+to replay a journal.
+
+Run with `python -m necrobot.test.benchracejournal`.
+"""
+
+import os
+import tempfile
+import timeit
+import zlib
+
+# noinspection PyProtectedMember
+from necrobot.race.racejournal import _RECORD_HEADER, _make_test_snapshot, replay
+
+
+def _pack_record(snapshot) -> bytes:
+    data = snapshot.pack()
+    return _RECORD_HEADER.pack(len(data), zlib.crc32(data)) + data
+
+
+def main():
+    # A 20-racer race, and a journal of the 100 snapshots such a race might write
+    snapshot = _make_test_snapshot(num_racers=20)
+    num_snapshots = 100
+    record = _pack_record(snapshot)
+
+    pack_time = min(timeit.repeat(lambda: _pack_record(snapshot), number=1000, repeat=5)) / 1000
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, '1.journal')
+        with open(path, 'wb') as journal:
+            journal.write(record * num_snapshots)
+        replay_time = min(timeit.repeat(lambda: replay(path), number=20, repeat=5)) / 20
+
+    print('{0:<32} {1:>12}'.format('Snapshot size (bytes)', len(record)))
+    print('{0:<32} {1:>12.1f}'.format('Pack (us/snapshot)', pack_time * 1e6))
+    print('{0:<32} {1:>12.2f}'.format('Replay {0} snapshots (ms)'.format(num_snapshots), replay_time * 1e3))
+
+
+if __name__ == '__main__':
+    main()
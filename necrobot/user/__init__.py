@@ -15,6 +15,9 @@ Description
 cmd_user
     CommandType classes for manipulating user data.
     
+nameindex
+    NameIndex: In-memory index from users' names to their user IDs.
+    
 necrouser
     NecroUser: Class representing a RaceBot user.
     
@@ -38,6 +41,8 @@ cmd_user
         userlib
         userprefs
     
+nameindex
+
 necrouser
     user/
         userprefs
@@ -56,14 +61,17 @@ userdb
         console    
        
 userlib
+    config
     exception
     database/
         userdb
     user/
+        nameindex
         necrouser
         userprefs
     util/
         console
+        identitymap
         server
 
 userprefs
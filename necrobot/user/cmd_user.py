@@ -231,7 +231,14 @@ class UserInfo(CommandType):
         else:
             racer = await userlib.get_user(any_name=cmd.args[0])
             if racer is None:
-                await cmd.channel.send('Couldn\'t find a user by the name `{0}`.'.format(cmd.args[0]))
+                suggestions = await userlib.suggest_names(cmd.args[0])
+                await cmd.channel.send(
+                    'Couldn\'t find a user by the name `{0}`.{1}'.format(
+                        cmd.args[0],
+                        ' Did you mean: {0}?'.format(', '.join('`{0}`'.format(n) for n in suggestions))
+                        if suggestions else ''
+                    )
+                )
                 return
 
         await cmd.channel.send(racer.infobox)
@@ -0,0 +1,126 @@
+"""
+An in-memory index from users' names to their user IDs.
+
+Every discord, twitch and RTMP name is indexed under its lowercase form, so resolving a name (as
+userlib.get_user(any_name=...) does) is a dict lookup. The lowercase names are also kept sorted, so that all names
+beginning with a given prefix can be listed, for suggesting names.
+"""
+
+import bisect
+import unittest
+from typing import Dict, List, Optional, Set, Tuple
+
+
+class NameIndex(object):
+    def __init__(self):
+        self._names = dict()        # type: Dict[int, Tuple[Optional[str], Optional[str], Optional[str]]]
+        self._user_ids = dict()     # type: Dict[str, Set[int]]
+        self._sorted_keys = list()  # type: List[str]
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, user_id: int):
+        return user_id in self._names
+
+    def clear(self) -> None:
+        self._names.clear()
+        self._user_ids.clear()
+        self._sorted_keys.clear()
+
+    def set_user(
+            self,
+            user_id: int,
+            discord_name: Optional[str],
+            twitch_name: Optional[str],
+            rtmp_name: Optional[str]
+    ) -> None:
+        """Index the user's names, replacing any names already indexed for them."""
+        names = (discord_name, twitch_name, rtmp_name,)
+        if self._names.get(user_id) == names:
+            return
+
+        self.remove_user(user_id)
+        self._names[user_id] = names
+        for key in _keys(names):
+            user_ids = self._user_ids.get(key)
+            if user_ids is None:
+                user_ids = set()
+                self._user_ids[key] = user_ids
+                bisect.insort(self._sorted_keys, key)
+            user_ids.add(user_id)
+
+    def remove_user(self, user_id: int) -> None:
+        names = self._names.pop(user_id, None)
+        if names is None:
+            return
+
+        for key in _keys(names):
+            user_ids = self._user_ids[key]
+            user_ids.discard(user_id)
+            if not user_ids:
+                del self._user_ids[key]
+                idx = bisect.bisect_left(self._sorted_keys, key)
+                del self._sorted_keys[idx]
+
+    def lookup(self, name: str) -> List[int]:
+        """The IDs of the users with a name equal to the given name, case-insensitive.
+
+        Users are ordered as get_user(any_name=...) prefers them: by the type of name that matched (RTMP, then discord,
+        then twitch), with exact-case matches first, and then by user ID.
+        """
+        user_ids = self._user_ids.get(name.lower())
+        if not user_ids:
+            return []
+        return sorted(user_ids, key=lambda user_id: (-_match_score(self._names[user_id], name), user_id))
+
+    def prefix_search(self, prefix: str, limit: int = 10) -> List[str]:
+        """Up to limit indexed names beginning with the given prefix, in alphabetical order. Names are lowercase."""
+        prefix = prefix.lower()
+        names = list()
+        idx = bisect.bisect_left(self._sorted_keys, prefix)
+        while idx < len(self._sorted_keys) and len(names) < limit and self._sorted_keys[idx].startswith(prefix):
+            names.append(self._sorted_keys[idx])
+            idx += 1
+        return names
+
+
+def _keys(names: Tuple[Optional[str], Optional[str], Optional[str]]) -> Set[str]:
+    return set(name.lower() for name in names if name is not None)
+
+
+def _match_score(names: Tuple[Optional[str], Optional[str], Optional[str]], name: str) -> int:
+    discord_name, twitch_name, rtmp_name = names
+    score = 0
+    for weight, user_name in [(16, rtmp_name), (4, discord_name), (1, twitch_name)]:
+        if user_name is not None and user_name.lower() == name.lower():
+            score += weight
+            if user_name == name:
+                score += 2*weight
+    return score
+
+
+class TestNameIndex(unittest.TestCase):
+    def test_lookup(self):
+        index = NameIndex()
+        index.set_user(1, discord_name='Alice', twitch_name='alice', rtmp_name=None)
+        index.set_user(2, discord_name=None, twitch_name=None, rtmp_name='ALICE')
+        index.set_user(3, discord_name='bob', twitch_name='alicetv', rtmp_name=None)
+        self.assertEqual(index.lookup('alice'), [2, 1])
+        self.assertEqual(index.lookup('BOB'), [3])
+        self.assertEqual(index.lookup('carol'), [])
+
+        index.set_user(2, discord_name=None, twitch_name=None, rtmp_name='carol')
+        self.assertEqual(index.lookup('Alice'), [1])
+        self.assertEqual(index.lookup('carol'), [2])
+
+    def test_prefix_search(self):
+        index = NameIndex()
+        index.set_user(1, discord_name='Alice', twitch_name='alice', rtmp_name=None)
+        index.set_user(3, discord_name='bob', twitch_name='AliceTV', rtmp_name=None)
+        self.assertEqual(index.prefix_search('ALI'), ['alice', 'alicetv'])
+        self.assertEqual(index.prefix_search('ali', limit=1), ['alice'])
+
+        index.remove_user(1)
+        self.assertEqual(index.prefix_search('ali'), ['alicetv'])
+        self.assertEqual(index.prefix_search('z'), [])
@@ -5,9 +5,13 @@ Methods
 -------
 write_user
 get_users_with_any
+get_all_users_with_any
+get_all_user_names
 get_users_with_all
 get_all_discord_ids_matching_prefs
+get_all_ids_matching_prefs
 register_discord_user
+register_users
 """
 import discord
 import mysql.connector
@@ -73,7 +77,7 @@ async def write_user(necro_user: NecroUser) -> None:
     async with DBConnect(commit=True) as cursor:
         if rtmp_clash_user_id is not None:
             rtmp_clash_params = (rtmp_clash_user_id,)
-            cursor.execute(
+            await cursor.execute_async(
                 """
                 DELETE FROM users 
                 WHERE user_id=%s
@@ -81,7 +85,7 @@ async def write_user(necro_user: NecroUser) -> None:
                 rtmp_clash_params
             )
 
-        cursor.execute(
+        await cursor.execute_async(
             """
             UPDATE users 
             SET 
@@ -132,9 +136,8 @@ async def get_all_users_with_any(names: Iterable[str]):
         format_strings = ','.join(['%s'] * len(params))
 
         params = params + params + params
-        print(params)
 
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT 
                discord_id, 
@@ -148,15 +151,54 @@ async def get_all_users_with_any(names: Iterable[str]):
                user_id,
                pronouns 
             FROM users 
-            WHERE LOWER(discord_name) IN ({fm})
-            OR LOWER(twitch_name) IN ({fm})
-            OR LOWER(rtmp_name) IN ({fm})
+            WHERE discord_name_lc IN ({fm})
+            OR twitch_name_lc IN ({fm})
+            OR rtmp_name_lc IN ({fm})
             """.format(fm=format_strings),
             params
         )
         return cursor.fetchall()
 
 
+async def get_all_user_names() -> list:
+    """Get the names of every user, as (user_id, discord_name, twitch_name, rtmp_name) tuples."""
+    async with DBConnect(commit=False) as cursor:
+        await cursor.execute_async(
+            """
+            SELECT user_id, discord_name, twitch_name, rtmp_name 
+            FROM users 
+            """
+        )
+        return [(int(row[0]), row[1], row[2], row[3],) for row in cursor.fetchall()]
+
+
+async def get_users_with_ids(user_ids: Iterable[int]):
+    user_ids = tuple(int(user_id) for user_id in user_ids)
+    if not user_ids:
+        return []
+
+    async with DBConnect(commit=False) as cursor:
+        await cursor.execute_async(
+            """
+            SELECT 
+               discord_id, 
+               discord_name, 
+               twitch_name, 
+               rtmp_name, 
+               timezone, 
+               user_info, 
+               daily_alert, 
+               race_alert, 
+               user_id,
+               pronouns 
+            FROM users 
+            WHERE user_id IN ({fm})
+            """.format(fm=','.join(['%s'] * len(user_ids))),
+            user_ids
+        )
+        return cursor.fetchall()
+
+
 async def get_users_with_all(
         discord_id: int = None,
         discord_name: str = None,
@@ -190,7 +232,7 @@ async def get_all_discord_ids_matching_prefs(user_prefs: UserPrefs) -> list:
     where_query = where_query[5:]
 
     async with DBConnect(commit=False) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT discord_id 
             FROM users 
@@ -202,10 +244,32 @@ async def get_all_discord_ids_matching_prefs(user_prefs: UserPrefs) -> list:
         return to_return
 
 
+async def get_all_ids_matching_prefs(user_prefs: UserPrefs) -> list:
+    """Like get_all_discord_ids_matching_prefs, but returns (user_id, discord_id) pairs."""
+    if user_prefs.is_empty:
+        return []
+
+    where_query = ''
+    if user_prefs.daily_alert is not None:
+        where_query += ' AND daily_alert={0}'.format('TRUE' if user_prefs.daily_alert else 'FALSE')
+    if user_prefs.race_alert is not None:
+        where_query += ' AND race_alert={0}'.format('TRUE' if user_prefs.race_alert else 'FALSE')
+    where_query = where_query[5:]
+
+    async with DBConnect(commit=False) as cursor:
+        await cursor.execute_async(
+            """
+            SELECT user_id, discord_id 
+            FROM users 
+            WHERE discord_id IS NOT NULL AND {0}
+            """.format(where_query))
+        return [(int(row[0]), int(row[1]),) for row in cursor.fetchall()]
+
+
 async def register_discord_user(user: discord.User):
     params = (user.id, user.display_name,)
     async with DBConnect(commit=True) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             INSERT INTO users 
                 (discord_id, discord_name) 
@@ -217,6 +281,61 @@ async def register_discord_user(user: discord.User):
         )
 
 
+async def register_users(necro_users: Iterable[NecroUser]) -> None:
+    """Register many new users at once, with a single multi-row INSERT, and set their user IDs.
+
+    Parameters
+    ----------
+    necro_users: Iterable[NecroUser]
+        The users to register. Each must have an RTMP name, and no user with that RTMP name may exist already.
+    """
+    necro_users = list(necro_users)
+    if not necro_users:
+        return
+
+    params = [
+        (
+            necro_user.discord_id,
+            necro_user.discord_name,
+            necro_user.twitch_name,
+            necro_user.timezone_str,
+            necro_user.user_info,
+            necro_user.user_prefs.daily_alert,
+            necro_user.user_prefs.race_alert,
+            necro_user.rtmp_name,
+        )
+        for necro_user in necro_users
+    ]
+    rtmp_names = tuple(necro_user.rtmp_name.lower() for necro_user in necro_users)
+
+    async with DBConnect(commit=True) as cursor:
+        try:
+            await cursor.executemany_async(
+                """
+                INSERT INTO users 
+                (discord_id, discord_name, twitch_name, timezone, user_info, daily_alert, race_alert, rtmp_name) 
+                VALUES (%s,%s,%s,%s,%s,%s,%s,%s) 
+                """,
+                params
+            )
+        except mysql.connector.IntegrityError:
+            console.warning('Tried to insert duplicate racer entries. RTMP names: {0}', rtmp_names)
+            raise
+
+        await cursor.execute_async(
+            """
+            SELECT user_id, rtmp_name 
+            FROM users 
+            WHERE rtmp_name_lc IN ({fm})
+            """.format(fm=','.join(['%s'] * len(rtmp_names))),
+            rtmp_names
+        )
+        user_ids = {rtmp_name.lower(): int(user_id) for user_id, rtmp_name in cursor.fetchall()}
+
+    for necro_user in necro_users:
+        necro_user._user_id = user_ids[necro_user.rtmp_name.lower()]
+
+
 async def _get_users_helpfn(
         discord_id,
         discord_name,
@@ -248,20 +367,20 @@ async def _get_users_helpfn(
             where_query += ' {0} discord_id=%s'.format(connector)
         if discord_name is not None:
             where_query += ' {0} discord_name=%s'.format(connector) if case_sensitive \
-                else ' {0} LOWER(discord_name)=%s'.format(connector)
+                else ' {0} discord_name_lc=%s'.format(connector)
         if twitch_name is not None:
             where_query += ' {0} twitch_name=%s'.format(connector) if case_sensitive \
-                else ' {0} LOWER(twitch_name)=%s'.format(connector)
+                else ' {0} twitch_name_lc=%s'.format(connector)
         if rtmp_name is not None:
             where_query += ' {0} rtmp_name=%s'.format(connector) if case_sensitive \
-                else ' {0} LOWER(rtmp_name)=%s'.format(connector)
+                else ' {0} rtmp_name_lc=%s'.format(connector)
         if timezone is not None:
             where_query += ' {0} timezone=%s'.format(connector)
         if user_id is not None:
             where_query += ' {0} user_id=%s'.format(connector)
         where_query = where_query[len(connector):] if where_query else 'TRUE'
 
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT 
                discord_id, 
@@ -298,7 +417,7 @@ async def _register_user(necro_user: NecroUser):
     async with DBConnect(commit=True) as cursor:
         if rtmp_clash_user_id is None:
             try:
-                cursor.execute(
+                await cursor.execute_async(
                     """
                     INSERT INTO users 
                     (discord_id, discord_name, twitch_name, timezone, user_info, daily_alert, race_alert, rtmp_name) 
@@ -306,14 +425,14 @@ async def _register_user(necro_user: NecroUser):
                     """,
                     params
                 )
-                cursor.execute("SELECT LAST_INSERT_ID()")
+                await cursor.execute_async("SELECT LAST_INSERT_ID()")
                 uid = int(cursor.fetchone()[0])
                 necro_user._user_id = uid
             except mysql.connector.IntegrityError:
                 console.warning('Tried to insert a duplicate racer entry. Params: {0}'.format(params))
                 raise
         else:
-            cursor.execute(
+            await cursor.execute_async(
                 """
                 UPDATE users 
                 SET 
@@ -351,7 +470,7 @@ async def _get_resolvable_rtmp_clash_user_id(necro_user: NecroUser) -> int or No
     rtmp_params = (necro_user.rtmp_name,)
 
     async with DBConnect(commit=False) as cursor:
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT `user_id`, `discord_id` 
             FROM `users` 
@@ -398,7 +517,7 @@ async def _transfer_user_id(from_user_id: int, to_user_id: int):
 
     async with DBConnect(commit=True) as cursor:
         # Update main-database matches
-        cursor.execute(
+        await cursor.execute_async(
             """
             UPDATE matches 
             SET racer_1_id=%(to_uid)s 
@@ -406,7 +525,7 @@ async def _transfer_user_id(from_user_id: int, to_user_id: int):
             """,
             params
         )
-        cursor.execute(
+        await cursor.execute_async(
             """
             UPDATE matches 
             SET racer_2_id=%(to_uid)s 
@@ -416,7 +535,7 @@ async def _transfer_user_id(from_user_id: int, to_user_id: int):
         )
 
         # Update leagues
-        cursor.execute(
+        await cursor.execute_async(
             """
             SELECT `schema_name` 
             FROM leagues 
@@ -428,7 +547,7 @@ async def _transfer_user_id(from_user_id: int, to_user_id: int):
             schema_names.append(row[0])
 
         for schema_name in schema_names:
-            cursor.execute(
+            await cursor.execute_async(
                 """
                 UPDATE `{schema_name}`.entrants 
                 SET user_id=%(to_uid)s 
@@ -436,7 +555,7 @@ async def _transfer_user_id(from_user_id: int, to_user_id: int):
                 """.format(schema_name=schema_name),
                 params
             )
-            cursor.execute(
+            await cursor.execute_async(
                 """
                 UPDATE `{schema_name}`.matches 
                 SET racer_1_id=%(to_uid)s 
@@ -444,7 +563,7 @@ async def _transfer_user_id(from_user_id: int, to_user_id: int):
                 """.format(schema_name=schema_name),
                 params
             )
-            cursor.execute(
+            await cursor.execute_async(
                 """
                 UPDATE `{schema_name}`.matches 
                 SET racer_2_id=%(to_uid)s 
@@ -4,18 +4,51 @@ Module for the NecroUser library.
 NecroUser represents a bot user, and is in correspondence with data stored in a row of the `users` table of
 the database. This module is responsible for checking out users from the database and storing a library, indexed
 by user ID, of checked out users.
+
+Users are found by name through a NameIndex of every user's names, which is read from the database the first time a
+user is looked up by name. Since another bot may write to the same database, a user found in the index is checked to
+still have the name, and names not in the index are looked up in the database.
 """
 
+import asyncio
+from typing import Dict, Iterable, List, Optional
+
 import necrobot.exception
+from necrobot.config import Config
+from necrobot.user.nameindex import NameIndex
 from necrobot.user.necrouser import NecroUser
 from necrobot.user.userprefs import UserPrefs
 from necrobot.util import console
 from necrobot.util import server
 from necrobot.user import userdb
+from necrobot.util.identitymap import IdentityMap
 
 # Libraries of checked out users
-user_library_by_uid = {}
-user_library_by_did = {}
+user_library_by_uid = IdentityMap('Users by user ID', capacity=Config.USER_LIBRARY_SIZE)
+user_library_by_did = IdentityMap('Users by discord ID', capacity=Config.USER_LIBRARY_SIZE)
+
+# Index of every user's names
+_name_index = NameIndex()
+_name_index_loaded = False
+_name_index_lock = asyncio.Lock()
+
+
+def invalidate_cache() -> int:
+    """Forget every checked out user. Returns the number of users forgotten."""
+    global _name_index_loaded
+    num_users = user_library_by_uid.clear()
+    user_library_by_did.clear()
+    _name_index.clear()
+    _name_index_loaded = False
+    return num_users
+
+
+def invalidate_user(user_id: int) -> None:
+    """Forget the checked out user with the given user ID, so that it is read from the database next time."""
+    user = user_library_by_uid.get(user_id)
+    user_library_by_uid.invalidate(user_id)
+    if user is not None and user.discord_id is not None:
+        user_library_by_did.invalidate(user.discord_id)
 
 
 async def fill_user_dict(user_dict: dict):
@@ -102,7 +135,7 @@ async def get_user(
         if not register:
             return None
         elif rtmp_name is not None:
-            user = NecroUser(commit_fn=userdb.write_user)
+            user = NecroUser(commit_fn=_write_user)
             user.set(rtmp_name=rtmp_name, commit=False)
             await user.commit()
             _cache_user(user)
@@ -110,7 +143,7 @@ async def get_user(
         elif discord_id is not None:
             discord_member = server.find_member(discord_id=discord_id)
             if discord_member is not None:
-                user = NecroUser(commit_fn=userdb.write_user)
+                user = NecroUser(commit_fn=_write_user)
                 user.set(discord_member=discord_member, commit=False)
                 await user.commit()
                 _cache_user(user)
@@ -132,6 +165,86 @@ async def get_user(
     return None
 
 
+async def get_users_with_any_names(names: Iterable[str], register: bool = False) -> Dict[str, NecroUser]:
+    """Find users for many names at once, as get_user(any_name=...) does for one name, without a query per name.
+
+    Parameters
+    ----------
+    names: Iterable[str]
+        The names to search for. Case-insensitive.
+    register: bool
+        If True, register a new user, with the name as their RTMP name, for every name no user is found for. These are
+        registered together, with a single INSERT.
+
+    Returns
+    -------
+    dict[str, NecroUser]
+        The user found for each name, keyed by the lowercased name. Names no user was found for are missing.
+    """
+    names_by_key = dict()
+    for name in names:
+        names_by_key.setdefault(name.lower(), name)
+    if not names_by_key:
+        return dict()
+
+    # Look the names up in the index first, and only query the database for the names that weren't found there
+    await _load_name_index()
+    await prefetch_users(user_id for key in names_by_key for user_id in _name_index.lookup(key))
+    users = dict()
+    for key, name in names_by_key.items():
+        user = await _get_user_from_index(name)
+        if user is not None:
+            users[key] = user
+
+    missing_keys = [key for key in names_by_key if key not in users]
+    rows_by_key = dict()
+    for row in (await userdb.get_all_users_with_any(missing_keys) if missing_keys else []):
+        _index_db_row(row)
+        for user_name in row[1:4]:
+            if user_name is not None and user_name.lower() in names_by_key:
+                rows_by_key.setdefault(user_name.lower(), []).append(row)
+
+    for key, rows in rows_by_key.items():
+        if key in users:
+            continue
+        name = names_by_key[key]
+        # A row can be listed twice if it matches the name in more than one way; this doesn't affect the best row
+        best_row = max(rows, key=lambda x: _raw_db_sort_fn(x, name, name, name))
+        users[key] = _get_user_from_db_row(best_row)
+
+    if register:
+        new_users = []
+        for key, name in names_by_key.items():
+            if key not in users:
+                user = NecroUser(commit_fn=_write_user)
+                user.set(rtmp_name=name, commit=False)
+                new_users.append(user)
+                users[key] = user
+
+        await userdb.register_users(new_users)
+        for user in new_users:
+            _cache_user(user)
+
+    return users
+
+
+async def suggest_names(prefix: str, limit: int = 5) -> List[str]:
+    """Up to limit users' names beginning with the given prefix, case-insensitive, in alphabetical order. The names
+    are lowercase."""
+    await _load_name_index()
+    return _name_index.prefix_search(prefix, limit=limit)
+
+
+async def prefetch_users(user_ids: Iterable[int]) -> None:
+    """Check out all of the users with the given user IDs that are not already checked out, in a single query."""
+    to_fetch = set(int(user_id) for user_id in user_ids if int(user_id) not in user_library_by_uid)
+    if not to_fetch:
+        return
+
+    for row in await userdb.get_users_with_ids(to_fetch):
+        _get_user_from_db_row(row)
+
+
 async def commit_all_checked_out_users():
     for user in user_library_by_uid.values():
         await user.commit()
@@ -142,8 +255,8 @@ def _get_user_from_db_row(user_row):
     if cached_user is not None:
         return cached_user
 
-    user = NecroUser(commit_fn=userdb.write_user)
-    console.debug('Getting user from data: {}'.format(user_row))
+    user = NecroUser(commit_fn=_write_user)
+    console.debug('Getting user from data: {}', user_row)
     user.set(
         discord_id=user_row[0],
         discord_name=user_row[1],
@@ -161,17 +274,24 @@ def _get_user_from_db_row(user_row):
 
 
 async def _get_user_any_name(name: str, register: bool) -> NecroUser or None:
+    await _load_name_index()
+    user = await _get_user_from_index(name)
+    if user is not None:
+        return user
+
     raw_db_data = await userdb.get_users_with_any(
         discord_name=name,
         twitch_name=name,
         rtmp_name=name,
     )
+    for row in raw_db_data:
+        _index_db_row(row)
 
     if not raw_db_data:
         if not register:
             return None
         else:
-            user = NecroUser(commit_fn=userdb.write_user)
+            user = NecroUser(commit_fn=_write_user)
             user.set(rtmp_name=name, commit=False)
             await user.commit()
             _cache_user(user)
@@ -190,18 +310,58 @@ def _cache_user(user: NecroUser):
     user_library_by_uid[user.user_id] = user
     if user.discord_id is not None:
         user_library_by_did[user.discord_id] = user
+    _name_index.set_user(user.user_id, user.discord_name, user.twitch_name, user.rtmp_name)
+
+
+async def _write_user(user: NecroUser) -> None:
+    await userdb.write_user(user)
+    if user.user_id is not None:
+        _name_index.set_user(user.user_id, user.discord_name, user.twitch_name, user.rtmp_name)
+
+
+async def _load_name_index() -> None:
+    global _name_index_loaded
+    if _name_index_loaded:
+        return
+
+    async with _name_index_lock:
+        if _name_index_loaded:
+            return
+        for user_id, discord_name, twitch_name, rtmp_name in await userdb.get_all_user_names():
+            _name_index.set_user(user_id, discord_name, twitch_name, rtmp_name)
+        _name_index_loaded = True
+        console.info('Indexed the names of {0} users.', len(_name_index))
+
+
+def _index_db_row(user_row) -> None:
+    # Users already checked out are indexed by the names they have now, which may be newer than the row's
+    if int(user_row[8]) not in user_library_by_uid:
+        _name_index.set_user(int(user_row[8]), user_row[1], user_row[2], user_row[3])
+
+
+async def _get_user_from_index(name: str) -> Optional[NecroUser]:
+    """The user the index finds for the given name, if they still have that name."""
+    for user_id in _name_index.lookup(name):
+        user = await get_user(user_id=user_id)
+        if user is None:
+            _name_index.remove_user(user_id)
+            continue
+
+        user_names = [user.rtmp_name, user.discord_name, user.twitch_name]
+        if name.lower() in [user_name.lower() for user_name in user_names if user_name is not None]:
+            return user
+        _name_index.set_user(user.user_id, user.discord_name, user.twitch_name, user.rtmp_name)
+    return None
 
 
 def _get_cached_user(
         user_id: int = None,
         discord_id: int = None,
 ) -> NecroUser or None:
-    if user_id is not None and user_id in user_library_by_uid:
-        return user_library_by_uid[user_id]
-    elif discord_id is not None and discord_id in user_library_by_did:
-        return user_library_by_did[discord_id]
-    else:
-        return None
+    cached_user = user_library_by_uid.get(user_id) if user_id is not None else None
+    if cached_user is None and discord_id is not None:
+        cached_user = user_library_by_did.get(discord_id)
+    return cached_user
 
 
 def _raw_db_sort_fn(row, discord_name, twitch_name, rtmp_name):
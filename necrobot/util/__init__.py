@@ -16,6 +16,11 @@ Dependencies
     
     decorators
     
+    dmbroadcast
+        config, console, server, singleton
+    
+    identitymap
+    
     level
     
     ordinal
@@ -26,6 +31,9 @@ Dependencies
     
     rtmputil
     
+    scheduler
+        config, console, singleton
+    
     seedgen
     
     server
@@ -38,4 +46,5 @@ Dependencies
     timestr
     
     writechannel
+        config, console
 """
\ No newline at end of file
@@ -1,27 +1,44 @@
-import inspect
+"""
+Logging functions for the bot. Each message is logged to the 'necrobot' logger, prefixed with the name of the
+calling module.
+
+Messages may be given as a format string with arguments, e.g. `console.debug('Got row {0}', row)`. In that case
+the string is only formatted if the message will actually be logged, so debug calls on hot paths are nearly free
+when debug logging is off.
+"""
+
 import logging
+import sys
+
+_logger = logging.getLogger('necrobot')
+
+
+def _make_message(frame, msg: str, args: tuple) -> str:
+    if args:
+        msg = msg.format(*args)
+    return '[{0}] {1}'.format(frame.f_globals.get('__name__', '<unknown>'), msg)
 
 
-def debug(info_str: str):
-    caller_mod_name = inspect.getmodule(inspect.stack()[1][0]).__name__
-    logging.getLogger('necrobot').debug('[{0}] {1}'.format(caller_mod_name, info_str))
+def debug(info_str: str, *args):
+    if _logger.isEnabledFor(logging.DEBUG):
+        _logger.debug(_make_message(sys._getframe(1), info_str, args))
 
 
-def info(info_str: str):
-    caller_mod_name = inspect.getmodule(inspect.stack()[1][0]).__name__
-    logging.getLogger('necrobot').info('[{0}] {1}'.format(caller_mod_name, info_str))
+def info(info_str: str, *args):
+    if _logger.isEnabledFor(logging.INFO):
+        _logger.info(_make_message(sys._getframe(1), info_str, args))
 
 
-def warning(error_str: str):
-    caller_mod_name = inspect.getmodule(inspect.stack()[1][0]).__name__
-    logging.getLogger('necrobot').warning('[{0}] {1}'.format(caller_mod_name, error_str))
+def warning(error_str: str, *args):
+    if _logger.isEnabledFor(logging.WARNING):
+        _logger.warning(_make_message(sys._getframe(1), error_str, args))
 
 
-def error(error_str: str):
-    caller_mod_name = inspect.getmodule(inspect.stack()[1][0]).__name__
-    logging.getLogger('necrobot').error('[{0}] {1}'.format(caller_mod_name, error_str), exc_info=True)
+def error(error_str: str, *args):
+    if _logger.isEnabledFor(logging.ERROR):
+        _logger.error(_make_message(sys._getframe(1), error_str, args), exc_info=True)
 
 
-def critical(error_str: str):
-    caller_mod_name = inspect.getmodule(inspect.stack()[1][0]).__name__
-    logging.getLogger('necrobot').critical('[{0}] {1}'.format(caller_mod_name, error_str), exc_info=True)
+def critical(error_str: str, *args):
+    if _logger.isEnabledFor(logging.CRITICAL):
+        _logger.critical(_make_message(sys._getframe(1), error_str, args), exc_info=True)
@@ -0,0 +1,169 @@
+"""
+Send the same direct message to many server members at once.
+
+A broadcast is sent by a pool of Config.DM_BROADCAST_CONCURRENCY workers. All broadcasts share one limit of
+Config.DM_BROADCAST_RATE messages per second, and when Discord rate-limits a message, every worker waits out the
+retry-after time before sending again. Each member's DM channel is kept once it has been opened, so later broadcasts
+don't have to open it again.
+
+Every broadcast makes a BroadcastReport, with how long each message took to be delivered and why any message
+couldn't be; the most recent Config.DM_BROADCAST_HISTORY_SIZE reports are kept.
+"""
+
+import asyncio
+import time
+import unittest
+from collections import Counter, deque
+from typing import Deque, Dict, Iterable, List, Optional
+
+import discord
+
+from necrobot.config import Config
+from necrobot.util import console, server
+from necrobot.util.singleton import Singleton
+
+
+class BroadcastReport(object):
+    """Delivery statistics for one broadcast. Times are in seconds."""
+    def __init__(self, name: str, num_recipients: int):
+        self.name = name
+        self.num_recipients = num_recipients
+        self.latencies = list()     # type: List[float]
+        self.failures = Counter()   # type: Counter
+        self.duration = None        # type: Optional[float]
+
+    @property
+    def num_sent(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def num_failed(self) -> int:
+        return sum(self.failures.values())
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """The delivery time that pct percent of sent messages were delivered within, or None if none were sent."""
+        if not self.latencies:
+            return None
+        latencies = sorted(self.latencies)
+        idx = min(len(latencies) - 1, max(0, int(round(pct/100*len(latencies))) - 1))
+        return latencies[idx]
+
+    def __str__(self):
+        text = '{name}: {sent}/{total} sent'.format(name=self.name, sent=self.num_sent, total=self.num_recipients)
+        if self.latencies:
+            text += ' (p50 {p50:.2f}s, p90 {p90:.2f}s, p99 {p99:.2f}s)'.format(
+                p50=self.percentile(50), p90=self.percentile(90), p99=self.percentile(99)
+            )
+        if self.failures:
+            text += '; failed: ' + ', '.join(
+                '{0} {1}'.format(num, reason) for reason, num in self.failures.most_common()
+            )
+        return text
+
+
+class DMBroadcaster(object, metaclass=Singleton):
+    def __init__(self):
+        self._dm_channels = dict()  # type: Dict[int, discord.DMChannel]
+        self._next_send = 0.0       # monotonic time before which no message should be sent
+        self._reports = deque(maxlen=Config.DM_BROADCAST_HISTORY_SIZE)     # type: Deque[BroadcastReport]
+
+    def recent_reports(self) -> List[BroadcastReport]:
+        """The most recent broadcast reports, most recent last."""
+        return list(self._reports)
+
+    async def broadcast(self, name: str, discord_ids: Iterable[int], content: str) -> BroadcastReport:
+        """Send a message to each of the given server members.
+
+        Parameters
+        ----------
+        name: str
+            A description of the broadcast, for its report.
+        discord_ids: Iterable[int]
+            The discord IDs of the members to send to. Those not on the server are skipped.
+        content: str
+            The message.
+
+        Returns
+        -------
+        BroadcastReport
+            The delivery statistics. Returns when every message has been sent or has failed.
+        """
+        discord_ids = list(discord_ids)
+        report = BroadcastReport(name=name, num_recipients=len(discord_ids))
+        self._reports.append(report)
+        start_time = time.monotonic()
+
+        # The workers share one iterator, so each member is sent to once
+        to_send = iter(discord_ids)
+
+        async def worker():
+            for discord_id in to_send:
+                reason = await self._send(discord_id, content)
+                if reason is None:
+                    report.latencies.append(time.monotonic() - start_time)
+                else:
+                    report.failures[reason] += 1
+
+        await asyncio.gather(*[worker() for _ in range(min(Config.DM_BROADCAST_CONCURRENCY, len(discord_ids)))])
+        report.duration = time.monotonic() - start_time
+        console.info('DM broadcast {0}', report)
+        return report
+
+    async def _send(self, discord_id: int, content: str) -> Optional[str]:
+        """Send the message. Returns None on success, or the reason it couldn't be sent."""
+        member = server.find_member(discord_id=discord_id)
+        if member is None:
+            return 'not on server'
+
+        for _ in range(Config.DM_BROADCAST_RETRIES + 1):
+            await self._wait_for_rate_limit()
+            try:
+                channel = await self._get_dm_channel(member)
+                await channel.send(content)
+                return None
+            except discord.Forbidden:
+                return 'forbidden'
+            except discord.NotFound:
+                self._dm_channels.pop(member.id, None)
+                return 'not found'
+            except discord.HTTPException as e:
+                if e.status == 429 or e.status >= 500:
+                    retry_after = _get_retry_after(e)
+                    self._next_send = max(self._next_send, time.monotonic() + retry_after)
+                    continue
+                return 'HTTP {0}'.format(e.status)
+        return 'rate limited'
+
+    async def _get_dm_channel(self, member: discord.Member) -> discord.DMChannel:
+        channel = self._dm_channels.get(member.id)
+        if channel is None:
+            channel = member.dm_channel if member.dm_channel is not None else await member.create_dm()
+            self._dm_channels[member.id] = channel
+        return channel
+
+    async def _wait_for_rate_limit(self) -> None:
+        now = time.monotonic()
+        send_at = max(now, self._next_send)
+        self._next_send = send_at + 1/Config.DM_BROADCAST_RATE
+        if send_at > now:
+            await asyncio.sleep(send_at - now)
+
+
+def _get_retry_after(e: discord.HTTPException) -> float:
+    try:
+        return float(e.response.headers.get('Retry-After', 1.0))
+    except (AttributeError, TypeError, ValueError):
+        return 1.0
+
+
+class TestBroadcastReport(unittest.TestCase):
+    def test_percentiles(self):
+        report = BroadcastReport('test', num_recipients=12)
+        report.latencies = [float(x) for x in range(10, 0, -1)]
+        report.failures['forbidden'] += 2
+        self.assertEqual(report.percentile(50), 5.0)
+        self.assertEqual(report.percentile(90), 9.0)
+        self.assertEqual(report.percentile(100), 10.0)
+        self.assertEqual(report.num_failed, 2)
+        self.assertIn('10/12 sent', str(report))
+        self.assertIsNone(BroadcastReport('empty', 0).percentile(50))
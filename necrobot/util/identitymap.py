@@ -0,0 +1,157 @@
+"""
+A bounded cache that maps IDs to the unique in-memory object for that ID.
+
+The most recently used objects are held strongly, up to a fixed capacity; beyond that, objects are only held weakly,
+so an evicted object stays in the map for as long as something else (for instance, a live MatchRoom) still refers to
+it, and two objects with the same ID never coexist. Pinned objects are never evicted.
+"""
+
+import unittest
+import weakref
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterator, Optional
+
+
+class IdentityMap(object):
+    def __init__(self, name: str, capacity: int):
+        """
+        Parameters
+        ----------
+        name: str
+            A name for this map, used when reporting statistics.
+        capacity: int
+            The number of most recently used objects to keep even if nothing else refers to them.
+        """
+        self.name = name
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._recent = OrderedDict()                # type: OrderedDict
+        self._pinned = dict()                       # type: Dict[Hashable, object]
+        self._all = weakref.WeakValueDictionary()   # type: weakref.WeakValueDictionary
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._all
+
+    def __getitem__(self, key: Hashable):
+        obj = self.get(key)
+        if obj is None:
+            raise KeyError(key)
+        return obj
+
+    def __setitem__(self, key: Hashable, obj) -> None:
+        self._all[key] = obj
+        if key in self._pinned:
+            self._pinned[key] = obj
+        self._touch(key, obj)
+
+    def __delitem__(self, key: Hashable) -> None:
+        if not self.invalidate(key):
+            raise KeyError(key)
+
+    def __len__(self) -> int:
+        return len(self._all)
+
+    def get(self, key: Hashable) -> Optional[object]:
+        """Get the object with the given key, if it is in the map, and mark it as recently used."""
+        obj = self._all.get(key)
+        if obj is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._touch(key, obj)
+        return obj
+
+    def values(self) -> Iterator:
+        return iter(list(self._all.values()))
+
+    def pin(self, key: Hashable) -> None:
+        """Never evict the object with the given key (until it is unpinned)."""
+        obj = self._all.get(key)
+        if obj is not None:
+            self._pinned[key] = obj
+
+    def unpin(self, key: Hashable) -> None:
+        self._pinned.pop(key, None)
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Remove the object with the given key. Returns False if there was no such object."""
+        self._recent.pop(key, None)
+        self._pinned.pop(key, None)
+        return self._all.pop(key, None) is not None
+
+    def clear(self) -> int:
+        """Remove every object that isn't pinned. Returns the number of objects removed."""
+        to_remove = [key for key in list(self._all.keys()) if key not in self._pinned]
+        for key in to_remove:
+            self.invalidate(key)
+        return len(to_remove)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __str__(self):
+        return '{name}: {size} objects ({recent} recent, {pinned} pinned), {hits} hits, {misses} misses ' \
+               '({rate:.0%} hit rate)'.format(
+                    name=self.name,
+                    size=len(self),
+                    recent=len(self._recent),
+                    pinned=len(self._pinned),
+                    hits=self.hits,
+                    misses=self.misses,
+                    rate=self.hit_rate
+                )
+
+    def _touch(self, key: Hashable, obj) -> None:
+        self._recent[key] = obj
+        self._recent.move_to_end(key)
+        while len(self._recent) > self.capacity:
+            self._recent.popitem(last=False)
+
+
+class TestIdentityMap(unittest.TestCase):
+    class _Obj(object):
+        pass
+
+    def test_eviction(self):
+        idmap = IdentityMap('test', capacity=2)
+        held = TestIdentityMap._Obj()
+        idmap[1] = held
+        idmap[2] = TestIdentityMap._Obj()
+        idmap[3] = TestIdentityMap._Obj()
+        idmap[4] = TestIdentityMap._Obj()
+
+        # 1 is no longer recent, but is still referred to here; 2 is gone
+        self.assertIs(idmap.get(1), held)
+        self.assertIsNone(idmap.get(2))
+        self.assertIn(4, idmap)
+        self.assertEqual((idmap.hits, idmap.misses), (1, 1))
+
+    def test_pin_and_clear(self):
+        idmap = IdentityMap('test', capacity=1)
+        idmap[1] = TestIdentityMap._Obj()
+        idmap.pin(1)
+        idmap[2] = TestIdentityMap._Obj()
+        idmap[3] = TestIdentityMap._Obj()
+        self.assertIn(1, idmap)
+        self.assertNotIn(2, idmap)
+
+        self.assertEqual(idmap.clear(), 1)
+        self.assertIn(1, idmap)
+        self.assertNotIn(3, idmap)
+
+        # Once unpinned and unreferenced, 1 is dropped
+        idmap.unpin(1)
+        self.assertNotIn(1, idmap)
+        self.assertEqual(len(idmap), 0)
+
+    def test_invalidate(self):
+        idmap = IdentityMap('test', capacity=2)
+        held = TestIdentityMap._Obj()
+        idmap[1] = held
+        self.assertTrue(idmap.invalidate(1))
+        self.assertFalse(idmap.invalidate(1))
+        self.assertIsNone(idmap.get(1))
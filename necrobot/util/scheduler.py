@@ -0,0 +1,327 @@
+"""
+A single scheduler for all of the bot's timed work.
+
+Jobs are kept in a heap ordered by the time they are due, and one task sleeps until the earliest of them is due and
+then starts it. Each job runs in its own task, so a slow job doesn't hold up the others. Scheduling a job returns a
+JobHandle, which can be used to cancel it.
+
+A job may be given a key. Keyed jobs, and when each of them ran, are saved to the file Config.SCHEDULE_FILE. If a
+keyed job has already run, scheduling it again (for instance, after a restart) does nothing, so match alerts are not
+sent twice. Keyed jobs saved before a restart are listed as waiting until their owner schedules them again.
+"""
+
+import asyncio
+import datetime
+import heapq
+import itertools
+import json
+import os
+import tempfile
+import time
+import unittest
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+import pytz
+
+from necrobot.config import Config
+from necrobot.util import console
+from necrobot.util.singleton import Singleton
+
+
+class JobHandle(object):
+    """A job scheduled to run at a certain time."""
+    def __init__(self, when: datetime.datetime, callback: Callable[[], Awaitable], name: str, key: str = None):
+        self.when = when
+        self.name = name
+        self.key = key
+        self.started_at = None      # type: Optional[datetime.datetime]
+        self.finished_at = None     # type: Optional[datetime.datetime]
+        self._callback = callback
+        self._cancelled = False
+        self._scheduler = None      # type: Optional[Scheduler]
+
+    def __str__(self):
+        return '{0} ({1})'.format(self.name, self.when.strftime('%Y-%m-%d %H:%M:%S UTC'))
+
+    @property
+    def pending(self) -> bool:
+        """True if the job has neither started nor been cancelled."""
+        return not self._cancelled and self.started_at is None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    @property
+    def lateness(self) -> Optional[datetime.timedelta]:
+        """How long after its scheduled time the job started, if it has started."""
+        return self.started_at - self.when if self.started_at is not None else None
+
+    def cancel(self) -> bool:
+        """Cancel the job. Returns False if the job has already started or been cancelled."""
+        if not self.pending:
+            return False
+        self._cancelled = True
+        if self._scheduler is not None:
+            self._scheduler._on_cancel(self)
+        return True
+
+
+class Scheduler(object, metaclass=Singleton):
+    def __init__(self):
+        self._heap = list()                 # type: List[Tuple[float, int, JobHandle]]
+        self._counter = itertools.count()
+        self._num_cancelled = 0
+        self._wakeup = None                 # type: Optional[asyncio.Event]
+        self._runner = None                 # type: Optional[asyncio.Future]
+        self._history = deque(maxlen=Config.SCHEDULE_HISTORY_SIZE)  # type: Deque[JobHandle]
+        self._keyed_jobs = dict()           # type: Dict[str, JobHandle]
+        self._saved = None                  # type: Optional[dict]
+
+    @property
+    def num_pending(self) -> int:
+        return len(self._heap) - self._num_cancelled
+
+    def schedule(
+            self,
+            when: datetime.datetime,
+            callback: Callable[[], Awaitable],
+            name: str,
+            key: str = None
+    ) -> JobHandle:
+        """Schedule a job. If the time has already passed, the job runs as soon as possible.
+
+        Parameters
+        ----------
+        when: datetime.datetime
+            When to run the job. If no tzinfo, UTC is assumed.
+        callback: Callable[[], Awaitable]
+            The coroutine function to run.
+        name: str
+            A description of the job, for listing jobs.
+        key: str
+            If not None, a unique key for this job, which is saved so that the job is only ever run once.
+
+        Returns
+        -------
+        JobHandle
+            A handle for the job. If the job has a key that has already run, the job is not scheduled, and the
+            handle is already cancelled.
+        """
+        if when.tzinfo is None:
+            when = pytz.utc.localize(when)
+        job = JobHandle(when=when, callback=callback, name=name, key=key)
+
+        if key is not None:
+            saved = self._get_saved()
+            if key in saved['ran']:
+                job._cancelled = True
+                return job
+
+            old_job = self._keyed_jobs.get(key)
+            if old_job is not None:
+                old_job.cancel()
+            self._keyed_jobs[key] = job
+            saved['pending'][key] = {'name': name, 'when': when.isoformat()}
+            self._save()
+
+        job._scheduler = self
+        entry = (when.timestamp(), next(self._counter), job,)
+        heapq.heappush(self._heap, entry)
+        self._start_runner()
+        if self._heap[0] is entry:
+            self._wakeup.set()
+        return job
+
+    def schedule_in(
+            self,
+            delay: float or datetime.timedelta,
+            callback: Callable[[], Awaitable],
+            name: str,
+            key: str = None
+    ) -> JobHandle:
+        """Schedule a job to run after the given delay (in seconds, or as a timedelta). See schedule()."""
+        if not isinstance(delay, datetime.timedelta):
+            delay = datetime.timedelta(seconds=delay)
+        return self.schedule(datetime.datetime.utcnow() + delay, callback, name=name, key=key)
+
+    def has_run(self, key: str) -> bool:
+        """True if the job with the given key has run (including before a restart)."""
+        return key in self._get_saved()['ran']
+
+    def pending_jobs(self) -> List[JobHandle]:
+        """All jobs waiting to run, in the order they will run."""
+        return [job for _, _, job in sorted(self._heap) if job.pending]
+
+    def recent_jobs(self) -> List[JobHandle]:
+        """The most recent jobs to have started, most recent last."""
+        return list(self._history)
+
+    def waiting_jobs(self) -> List[Tuple[str, str, datetime.datetime]]:
+        """Keyed jobs saved before the last restart that haven't been scheduled again, as (key, name, when)."""
+        return [
+            (key, job['name'], datetime.datetime.fromisoformat(job['when']),)
+            for key, job in self._get_saved()['pending'].items() if key not in self._keyed_jobs
+        ]
+
+    def close(self) -> None:
+        """Cancel every pending job and stop the scheduler."""
+        for _, _, job in self._heap:
+            job._cancelled = True
+        self._heap.clear()
+        self._num_cancelled = 0
+        if self._runner is not None:
+            self._runner.cancel()
+            self._runner = None
+
+    def _start_runner(self) -> None:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.ensure_future(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            while self._heap and not self._heap[0][2].pending:
+                heapq.heappop(self._heap)
+                self._num_cancelled -= 1
+
+            timeout = self._heap[0][0] - time.time() if self._heap else None
+            if timeout is not None and timeout <= 0:
+                self._start_job(heapq.heappop(self._heap)[2])
+                continue
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _start_job(self, job: JobHandle) -> None:
+        job.started_at = pytz.utc.localize(datetime.datetime.utcnow())
+        self._history.append(job)
+        if job.key is not None:
+            self._keyed_jobs.pop(job.key, None)
+            saved = self._get_saved()
+            saved['pending'].pop(job.key, None)
+            saved['ran'][job.key] = job.started_at.isoformat()
+            self._save()
+        asyncio.ensure_future(self._run_job(job))
+
+    @staticmethod
+    async def _run_job(job: JobHandle) -> None:
+        try:
+            await job._callback()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            console.error('Scheduled job {0} raised an exception: {1}', job.name, e)
+        finally:
+            job.finished_at = pytz.utc.localize(datetime.datetime.utcnow())
+
+    def _on_cancel(self, job: JobHandle) -> None:
+        self._num_cancelled += 1
+        if job.key is not None and self._keyed_jobs.get(job.key) is job:
+            del self._keyed_jobs[job.key]
+            self._get_saved()['pending'].pop(job.key, None)
+            self._save()
+
+        # Cancelled jobs are left in the heap until they reach the top; rebuild it if they make up most of it
+        if self._num_cancelled > 64 and 2*self._num_cancelled > len(self._heap):
+            self._heap = [entry for entry in self._heap if entry[2].pending]
+            heapq.heapify(self._heap)
+            self._num_cancelled = 0
+
+    def _get_saved(self) -> dict:
+        if self._saved is None:
+            self._saved = self._load()
+        return self._saved
+
+    @staticmethod
+    def _load() -> dict:
+        try:
+            with open(Config.SCHEDULE_FILE, 'r') as file:
+                data = json.load(file)
+            return {'pending': dict(data['pending']), 'ran': dict(data['ran'])}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            console.warning('Could not read schedule file {0}: {1}', Config.SCHEDULE_FILE, e)
+        return {'pending': dict(), 'ran': dict()}
+
+    def _save(self) -> None:
+        # Forget keyed jobs that ran long enough ago that they won't be scheduled again
+        oldest = (pytz.utc.localize(datetime.datetime.utcnow()) - Config.SCHEDULE_KEEP_RUN_JOBS).isoformat()
+        ran = self._saved['ran']
+        for key in [key for key, ran_at in ran.items() if ran_at < oldest]:
+            del ran[key]
+
+        tmp_filename = Config.SCHEDULE_FILE + '.tmp'
+        try:
+            with open(tmp_filename, 'w') as file:
+                json.dump(self._saved, file)
+            os.replace(tmp_filename, Config.SCHEDULE_FILE)
+        except OSError as e:
+            console.warning('Could not write schedule file {0}: {1}', Config.SCHEDULE_FILE, e)
+
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        self._old_filename = Config.SCHEDULE_FILE
+        self._tmpdir = tempfile.TemporaryDirectory()
+        Config.SCHEDULE_FILE = os.path.join(self._tmpdir.name, 'schedule.json')
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+        Config.SCHEDULE_FILE = self._old_filename
+        self._tmpdir.cleanup()
+
+    @staticmethod
+    def _new_scheduler() -> Scheduler:
+        scheduler = object.__new__(Scheduler)
+        scheduler.__init__()
+        return scheduler
+
+    def test_order_and_cancel(self):
+        scheduler = self._new_scheduler()
+        ran = []
+
+        def job(n):
+            async def run():
+                ran.append(n)
+            return run
+
+        async def go():
+            scheduler.schedule_in(0.03, job(3), name='3')
+            scheduler.schedule_in(0.01, job(1), name='1')
+            cancelled = scheduler.schedule_in(0.02, job(2), name='2')
+            self.assertTrue(cancelled.cancel())
+            self.assertFalse(cancelled.cancel())
+            await asyncio.sleep(0.1)
+            scheduler.close()
+
+        self.loop.run_until_complete(go())
+        self.assertEqual(ran, [1, 3])
+        self.assertEqual([job.name for job in scheduler.recent_jobs()], ['1', '3'])
+        self.assertEqual(scheduler.num_pending, 0)
+
+    def test_keyed_job_runs_once(self):
+        ran = []
+
+        async def job():
+            ran.append(1)
+
+        async def go(scheduler):
+            scheduler.schedule_in(0, job, name='alert', key='alert')
+            await asyncio.sleep(0.05)
+            scheduler.close()
+
+        self.loop.run_until_complete(go(self._new_scheduler()))
+
+        restarted = self._new_scheduler()
+        self.assertTrue(restarted.has_run('alert'))
+        self.assertTrue(restarted.schedule_in(0, job, name='alert', key='alert').cancelled)
+        self.assertEqual(ran, [1])
@@ -5,20 +5,70 @@ discord.py.
 
 import discord
 import discord.http
-from typing import List, Optional, Union
+import unittest
+from typing import Dict, Iterable, List, Optional, Union
 from necrobot.config import Config
 
 
+class NameIndex(object):
+    """Index of discord objects by casefolded name. Objects with the same name are kept in the order added. Each object
+    is indexed under one name at a time."""
+    def __init__(self):
+        self._index = dict()    # type: Dict[str, Dict[int, object]]
+        self._keys = dict()     # type: Dict[int, str]
+
+    def add(self, name: str, obj) -> None:
+        """Index the object under the given name, in place of any name it is already indexed under."""
+        key = name.casefold()
+        if self._keys.get(obj.id) == key:
+            self._index[key][obj.id] = obj
+            return
+        self.remove(obj)
+        self._index.setdefault(key, dict())[obj.id] = obj
+        self._keys[obj.id] = key
+
+    def remove(self, obj) -> None:
+        """Remove the object from the index, whatever name it is indexed under."""
+        key = self._keys.pop(obj.id, None)
+        objs = self._index.get(key) if key is not None else None
+        if objs is not None:
+            objs.pop(obj.id, None)
+            if not objs:
+                del self._index[key]
+
+    def first(self, name: str):
+        objs = self._index.get(name.casefold())
+        return next(iter(objs.values())) if objs else None
+
+    def all(self, name: str) -> list:
+        return list(self._index.get(name.casefold(), dict()).values())
+
+    def rebuild(self, objs: Iterable, name_attr: str) -> None:
+        self._index.clear()
+        self._keys.clear()
+        for obj in objs:
+            self.add(getattr(obj, name_attr), obj)
+
+
 client = None           # type: Optional[discord.Client]
 guild = None           # type: Optional[discord.Guild]
 admin_roles = list()    # type: List[discord.Role]
 referee_roles = list()    # type: List[discord.Role]
 
+# Name indexes for the guild, kept up to date by the on_* functions below (which the client's event handlers call)
+_channels_by_name = NameIndex()
+_text_channels_by_name = NameIndex()
+_categories_by_name = NameIndex()
+_members_by_display_name = NameIndex()
+_members_by_name = NameIndex()
+_roles_by_name = NameIndex()
+
 
 def init(client_: discord.Client, guild_: discord.Guild) -> None:
     global client, guild, admin_roles
     client = client_
     guild = guild_
+    _rebuild_indexes()
     for rolename in Config.ADMIN_ROLE_NAMES:
         for role in guild.roles:
             if role.name == rolename:
@@ -46,40 +96,25 @@ def find_admin(ignore: Optional[List[str]] = None) -> Optional[discord.Member]:
 def find_channel(channel_name: str = None, channel_id: Union[str, int] = None) -> Optional[discord.TextChannel]:
     """Returns a channel with the given name on the server, if any"""
     if channel_id is not None:
-        for channel in guild.channels:
-            if int(channel.id) == int(channel_id):
-                return channel
+        return guild.get_channel(int(channel_id))
     elif channel_name is not None:
-        for channel in guild.channels:
-            if channel.name.lower() == channel_name.lower():
-                return channel
+        return _channels_by_name.first(channel_name)
     return None
 
 
 def find_category(channel_name: str = None) -> Optional[discord.CategoryChannel]:
     """Returns a channel with the given name on the server, if any"""
-    for channel in guild.categories:
-        if channel.name.lower() == channel_name.lower():
-            return channel
-    return None
+    return _categories_by_name.first(channel_name)
 
 
 def find_all_channels(channel_name: str) -> List[discord.TextChannel]:
     """Returns all channels with the given name on the server"""
-    found_channels = []
-    for channel in guild.text_channels:
-        if channel.name.lower() == channel_name.lower():
-            found_channels.append(channel)
-    return found_channels
+    return _text_channels_by_name.all(channel_name)
 
 
 def find_all_categories(channel_name: str) -> List[discord.CategoryChannel]:
     """Returns all channels with the given name on the server"""
-    found_channels = []
-    for channel in guild.categories:
-        if channel.name.lower() == channel_name.lower():
-            found_channels.append(channel)
-    return found_channels
+    return _categories_by_name.all(channel_name)
 
 
 def find_member(discord_name: str = None, discord_id: Union[str, int] = None) -> Optional[discord.Member]:
@@ -88,32 +123,23 @@ def find_member(discord_name: str = None, discord_id: Union[str, int] = None) ->
         return None
 
     if discord_id is not None:
-        for member in guild.members:
-            if int(member.id) == int(discord_id):
-                return member
+        member = guild.get_member(int(discord_id))
+        if member is not None:
+            return member
 
     if discord_name is not None:
-        for member in guild.members:
-            if member.display_name.lower() == discord_name.lower() \
-                    or member.name.lower() == discord_name.lower():
-                return member
+        member = _members_by_display_name.first(discord_name)
+        return member if member is not None else _members_by_name.first(discord_name)
 
 
 def find_members(username: str) -> List[discord.Member]:
     """Returns a list of all members with a given username (capitalization ignored)"""
-    to_return = []
-    for member in guild.members:
-        if member.display_name.lower() == username.lower():
-            to_return.append(member)
-    return to_return
+    return _members_by_display_name.all(username)
 
 
 def find_role(role_name: str) -> Optional[discord.Role]:
     """Finds a discord.Role with the given name, if any"""
-    for role in guild.roles:
-        if role.name.lower() == role_name.lower():
-            return role
-    return None
+    return _roles_by_name.first(role_name)
 
 
 def get_as_member(user: discord.User) -> Optional[discord.Member]:
@@ -153,3 +179,108 @@ async def set_channel_category(channel: discord.TextChannel, category: discord.C
 
 async def create_channel_category(name: str) -> discord.CategoryChannel:
     return await guild.create_category(name=name)
+
+
+# Index maintenance; the client's event handlers call these for events on any guild.
+def on_channel_create(channel: discord.abc.GuildChannel) -> None:
+    if guild is None or channel.guild.id != guild.id:
+        return
+    _channels_by_name.add(channel.name, channel)
+    if isinstance(channel, discord.TextChannel):
+        _text_channels_by_name.add(channel.name, channel)
+    elif isinstance(channel, discord.CategoryChannel):
+        _categories_by_name.add(channel.name, channel)
+
+
+def on_channel_delete(channel: discord.abc.GuildChannel) -> None:
+    if guild is None or channel.guild.id != guild.id:
+        return
+    for index in [_channels_by_name, _text_channels_by_name, _categories_by_name]:
+        index.remove(channel)
+
+
+def on_channel_update(before: discord.abc.GuildChannel, after: discord.abc.GuildChannel) -> None:
+    on_channel_delete(before)
+    on_channel_create(after)
+
+
+def on_member_join(member: discord.Member) -> None:
+    if guild is None or member.guild.id != guild.id:
+        return
+    _members_by_display_name.add(member.display_name, member)
+    _members_by_name.add(member.name, member)
+
+
+def on_member_remove(member: discord.Member) -> None:
+    if guild is None or member.guild.id != guild.id:
+        return
+    _members_by_display_name.remove(member)
+    _members_by_name.remove(member)
+
+
+def on_member_update(before: discord.Member, after: discord.Member) -> None:
+    on_member_remove(before)
+    on_member_join(after)
+
+
+def on_user_update(before: discord.User, after: discord.User) -> None:
+    """A user's name is also the name of their guild member, and their display name if they have no nickname"""
+    if guild is None or before.name == after.name:
+        return
+    member = guild.get_member(after.id)
+    if member is not None:
+        _members_by_display_name.add(member.display_name, member)
+        _members_by_name.add(member.name, member)
+
+
+def on_role_create(role: discord.Role) -> None:
+    if guild is None or role.guild.id != guild.id:
+        return
+    _roles_by_name.add(role.name, role)
+
+
+def on_role_delete(role: discord.Role) -> None:
+    if guild is None or role.guild.id != guild.id:
+        return
+    _roles_by_name.remove(role)
+
+
+def on_role_update(before: discord.Role, after: discord.Role) -> None:
+    on_role_delete(before)
+    on_role_create(after)
+
+
+def _rebuild_indexes() -> None:
+    _channels_by_name.rebuild(guild.channels, 'name')
+    _text_channels_by_name.rebuild(guild.text_channels, 'name')
+    _categories_by_name.rebuild(guild.categories, 'name')
+    _members_by_display_name.rebuild(guild.members, 'display_name')
+    _members_by_name.rebuild(guild.members, 'name')
+    _roles_by_name.rebuild(guild.roles, 'name')
+
+
+class TestNameIndex(unittest.TestCase):
+    class _Obj(object):
+        def __init__(self, obj_id, name):
+            self.id = obj_id
+            self.name = name
+
+    def test_index(self):
+        index = NameIndex()
+        a = TestNameIndex._Obj(1, 'Match-Room')
+        b = TestNameIndex._Obj(2, 'match-room')
+        c = TestNameIndex._Obj(3, 'other')
+        index.rebuild([a, b, c], 'name')
+
+        self.assertIs(index.first('MATCH-ROOM'), a)
+        self.assertEqual(index.all('match-room'), [a, b])
+
+        a.name = 'renamed'
+        index.add(a.name, a)
+        self.assertEqual(index.all('match-room'), [b])
+        self.assertIs(index.first('Renamed'), a)
+
+        index.remove(b)
+        self.assertEqual(index.all('match-room'), [])
+        self.assertIsNone(index.first('nothing'))
+        self.assertEqual(index.all('nothing'), [])
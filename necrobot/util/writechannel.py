@@ -1,28 +1,154 @@
-import codecs
+"""
+Write the text of discord channels to log files in Config.LOG_DIRECTORY.
+
+Messages are read oldest-first and written out in chunks as they arrive, by a worker thread, so that logging a long
+channel neither holds its whole history in memory nor blocks the event loop on file I/O. Logs are plain text
+(`<name>.log`), or one JSON object per message (`<name>.jsonl`) if Config.LOG_FORMAT is 'jsonl'; if
+Config.LOG_COMPRESS is True, they are gzipped (`<name>.log.gz`, `<name>.jsonl.gz`).
+"""
+
+import asyncio
+import gzip
+import json
 import os
+from typing import Iterable, List, Optional, Tuple
+
 import discord
 
 from necrobot.config import Config
+from necrobot.util import console
+
+TEXT = 'text'
+JSONL = 'jsonl'
+
+# The number of messages to collect before handing them to the writer thread
+_WRITE_CHUNK_SIZE = 100
+
+
+def get_log_path(outfile_name: str, fmt: str = None, compress: bool = None) -> str:
+    """Get the path of the log file with the given name.
+
+    Parameters
+    ----------
+    outfile_name: str
+        The name of the log, without an extension.
+    fmt: str
+        Either TEXT or JSONL. If None, uses Config.LOG_FORMAT.
+    compress: bool
+        Whether the log is gzipped. If None, uses Config.LOG_COMPRESS.
+    """
+    fmt = fmt if fmt is not None else Config.LOG_FORMAT
+    compress = compress if compress is not None else Config.LOG_COMPRESS
+
+    outfile_name = outfile_name.encode('utf-8').decode('ascii', 'replace')
+    return os.path.join(
+        Config.LOG_DIRECTORY,
+        '{0}.{1}{2}'.format(outfile_name, 'jsonl' if fmt == JSONL else 'log', '.gz' if compress else '')
+    )
+
+
+async def write_channel(
+        channel: discord.TextChannel,
+        outfile_name: str,
+        fmt: str = None,
+        compress: bool = None
+) -> bool:
+    """Write the channel's messages, oldest first, to a log file.
+
+    Parameters
+    ----------
+    channel: discord.TextChannel
+        The channel to log.
+    outfile_name: str
+        The name of the log, without an extension.
+    fmt: str
+        Either TEXT or JSONL. If None, uses Config.LOG_FORMAT.
+    compress: bool
+        Whether to gzip the log. If None, uses Config.LOG_COMPRESS.
+
+    Returns
+    -------
+    bool
+        True if the whole channel was logged.
+    """
+    fmt = fmt if fmt is not None else Config.LOG_FORMAT
+    compress = compress if compress is not None else Config.LOG_COMPRESS
+    pathname = get_log_path(outfile_name, fmt, compress)
+    loop = asyncio.get_event_loop()
 
+    try:
+        outfile = await loop.run_in_executor(None, _open_log, pathname, compress)
+    except OSError as e:
+        console.warning('Could not open log file {0}: {1}', pathname, e)
+        return False
 
-async def write_channel(channel: discord.TextChannel, outfile_name: str):
+    # Write each chunk while the next one is being fetched
+    pending_write = None    # type: Optional[asyncio.Future]
     try:
-        messages = []
-        async for message in channel.history(limit=5000):
-            messages.insert(0, message)
-
-        outfile_name = outfile_name.encode('utf-8').decode('ascii', 'replace')
-        pathname = os.path.join(Config.LOG_DIRECTORY, '{0}.log'.format(outfile_name))
-        with codecs.open(pathname, 'w', 'utf-8') as outfile:
-            for message in messages:
-                try:
-                    outfile.write('{1} ({0}): {2}\n'.format(
-                        message.created_at.strftime("%m/%d %H:%M:%S"), message.author.name, message.clean_content))
-                except UnicodeEncodeError:
-                    try:
-                        outfile.write('{1} ({0}): {2}\n'.format(
-                            message.created_at.strftime("%m/%d %H:%M:%S"), message.author.name, message.content))
-                    except UnicodeEncodeError:
-                        pass
-    except UnicodeEncodeError:
-        pass
+        lines = []
+        async for message in channel.history(limit=Config.LOG_MESSAGE_LIMIT, oldest_first=True):
+            lines.append(_format_message(message, fmt))
+            if len(lines) >= _WRITE_CHUNK_SIZE:
+                if pending_write is not None:
+                    await pending_write
+                pending_write = loop.run_in_executor(None, outfile.write, ''.join(lines))
+                lines = []
+
+        if pending_write is not None:
+            await pending_write
+            pending_write = None
+        if lines:
+            await loop.run_in_executor(None, outfile.write, ''.join(lines))
+        return True
+    except (OSError, discord.HTTPException) as e:
+        console.warning('Could not log channel {0} to {1}: {2}', channel.name, pathname, e)
+        return False
+    finally:
+        if pending_write is not None:
+            await asyncio.wait([pending_write])
+        await loop.run_in_executor(None, outfile.close)
+
+
+async def write_channels(channels: Iterable[Tuple[discord.TextChannel, str]]) -> List[bool]:
+    """Log several channels at once, at most Config.LOG_WRITE_CONCURRENCY at a time.
+
+    Parameters
+    ----------
+    channels: Iterable[tuple[discord.TextChannel, str]]
+        The channels to log, each with the name of its log.
+
+    Returns
+    -------
+    list[bool]
+        For each channel, in order, whether it was logged.
+    """
+    semaphore = asyncio.Semaphore(Config.LOG_WRITE_CONCURRENCY)
+
+    async def write_one(channel, outfile_name):
+        async with semaphore:
+            return await write_channel(channel, outfile_name)
+
+    return await asyncio.gather(*[write_one(channel, outfile_name) for channel, outfile_name in channels])
+
+
+def _open_log(pathname: str, compress: bool):
+    os.makedirs(os.path.dirname(pathname) or '.', exist_ok=True)
+    if compress:
+        return gzip.open(pathname, 'wt', encoding='utf-8')
+    return open(pathname, 'w', encoding='utf-8')
+
+
+def _format_message(message: discord.Message, fmt: str) -> str:
+    if fmt == JSONL:
+        return json.dumps({
+            'id': message.id,
+            'created_at': message.created_at.isoformat(),
+            'author_id': message.author.id,
+            'author': message.author.name,
+            'content': message.clean_content,
+            'attachments': [attachment.url for attachment in message.attachments],
+        }, ensure_ascii=False) + '\n'
+
+    return '{1} ({0}): {2}\n'.format(
+        message.created_at.strftime("%m/%d %H:%M:%S"), message.author.name, message.clean_content
+    )
@@ -1,4 +1,5 @@
 from necrobot.util import server
+from necrobot.botbase.necroevent import NEDispatch
 from necrobot.condorbot.condoradminchannel import CondorAdminChannel
 from necrobot.condorbot.condormainchannel import CondorMainChannel
 from necrobot.condorbot.condormgr import CondorMgr
@@ -6,12 +7,16 @@ from necrobot.condorbot.condorpmchannel import CondorPMChannel
 from necrobot.ladder import ratingutil
 from necrobot.league.leaguemgr import LeagueMgr
 from necrobot.match.matchmgr import MatchMgr
+from necrobot.database import migrations
 from necrobot.util import console
 from necrobot import logon
 from necrobot.config import Config
 
 
 async def load_condorbot_config(necrobot):
+    # Database
+    await migrations.run_migrations()
+
     # PM Channel
     necrobot.register_pm_channel(CondorPMChannel())
 
@@ -33,6 +38,11 @@ async def load_condorbot_config(necrobot):
     necrobot.register_manager(LeagueMgr())
     necrobot.register_manager(MatchMgr())
 
+    # Subscribers can process each event concurrently: none of them depends on another having processed the event first
+    # (CondorMgr and ScheduleIndex share some event types, but CondorMgr's sheet rewrites are queued, not made during
+    # the event), and with concurrent dispatch an exception in one subscriber is logged without affecting the others
+    NEDispatch().concurrent = True
+
     # Ratings
     ratingutil.init()
 
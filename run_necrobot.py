@@ -7,6 +7,8 @@ from necrobot.config import Config
 # from necrobot.match.matchmgr import MatchMgr
 from necrobot.racebot.mainchannel import MainBotChannel
 from necrobot.racebot.pmbotchannel import PMBotChannel
+from necrobot.race import raceutil
+from necrobot.database import migrations
 from necrobot.util import console
 from necrobot import logon
 
@@ -14,6 +16,9 @@ from necrobot import logon
 async def load_necrobot_config(necrobot):
     Config.RECORDING_ACTIVATED = False
 
+    # Database
+    await migrations.run_migrations()
+
     # PM Channel
     necrobot.register_pm_channel(PMBotChannel())
 
@@ -23,6 +28,9 @@ async def load_necrobot_config(necrobot):
         console.warning(f'Could not find the main channel <#{Config.MAIN_CHANNEL_ID}>.')
     necrobot.register_bot_channel(main_discord_channel, MainBotChannel())
 
+    # Race rooms that were running when the bot went down
+    await raceutil.recover_race_rooms()
+
     # Ladder Channels
     # ladder_main_channel = server.find_channel(Config.LADDER_MAIN_CHANNEL_NAME)
     # if ladder_main_channel is None: